@@ -1,66 +1,79 @@
 import requests # requêtes HTTP
-from bs4 import BeautifulSoup # scraper
-from datetime import datetime
 import re # regex
-import time # Pour délai optionnel
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as futures_wait
+from urllib.parse import urljoin, urlparse
 
 # custom
 from utils.debug_color import debug_print
+from http_client import get_fetcher
+from parse_pool import get_parse_pool # parsing multi-processus (optionnel)
+from html_parsing import make_soup, HOME_STRAINER, LISTING_STRAINER, ARTICLE_STRAINER # parser lxml/html.parser + parsing partiel
+from extraction import extract_article, extract_preview # sélecteurs CSS compilés (spec déclaratif)
+from dedup import canonicalize_url, get_duplicate_detector # URLs canoniques + quasi-doublons (optionnel)
 
 headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
-# scrap les articles d'une catégorie
-def scrape_category_urls(base_url):
-
-    global headers
+# concurrence pour la récup des pages articles
+MAX_WORKERS = 8 # nb de threads
+PER_HOST_LIMIT = 4 # nb max de requêtes simultanées vers un même host
 
+# extraction des URLs des catégories depuis le menu principal (HTML de la page d'accueil)
+def parse_category_urls(html, base_url, parser=None):
+    soup = make_soup(html, HOME_STRAINER, parser)
     category_urls = []
-    try:
-        debug_print(f"Fetching base page to find category URLs: {base_url}...", level="fetch")
-        response = requests.get(base_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
 
-        primary_menu = soup.find('ul', id='primary-menu')
-        if not primary_menu:
-            debug_print("Primary menu ('ul#primary-menu') not found.", level="warning")
-            return []
+    primary_menu = soup.find('ul', id='primary-menu')
+    if not primary_menu:
+        debug_print("Primary menu ('ul#primary-menu') not found.", level="warning")
+        return []
 
-        menu_items = primary_menu.find_all('li', class_='menu-item-object-category', recursive=False) # Look for direct li children with the specific class
+    menu_items = primary_menu.find_all('li', class_='menu-item-object-category', recursive=False) # Look for direct li children with the specific class
 
-        if not menu_items:
-             # si pas de 'li' trouvé, on cherche tous les 'a'
-             menu_links = primary_menu.find_all('a', href=True)
-             if not menu_links:
-                 debug_print("No category links found within the primary menu.", level="warning")
-                 return []
-             menu_items = menu_links # mettre les liens comme items de menu
+    if not menu_items:
+         # si pas de 'li' trouvé, on cherche tous les 'a'
+         menu_links = primary_menu.find_all('a', href=True)
+         if not menu_links:
+             debug_print("No category links found within the primary menu.", level="warning")
+             return []
+         menu_items = menu_links # mettre les liens comme items de menu
 
-        # debug_print(f"Found {len(menu_items)} potential category items in the menu.", level="debug") # Optionnel, peut être bruyant
+    # debug_print(f"Found {len(menu_items)} potential category items in the menu.", level="debug") # Optionnel, peut être bruyant
 
-        for item in menu_items:
-             if item.name == 'a':
-                 link = item
-             else:
-                 link = item.find('a', href=True)
+    for item in menu_items:
+         if item.name == 'a':
+             link = item
+         else:
+             link = item.find('a', href=True)
 
-             if link:
-                 href = link['href']
-                 # Vérifier si l'URL commence par base_url OU est une URL relative commençant par /
-                 # Exclure les URLs non pertinentes comme /tools/ ou la page d'accueil elle-même
-                 if href.startswith(base_url) and href != base_url:
-                     category_urls.append(href)
-                 elif href.startswith('/') and not href.startswith('/tools/') and href != '/':
-                     # Construire l'URL absolue pour les liens relatifs
-                     from urllib.parse import urljoin
-                     absolute_url = urljoin(base_url, href)
-                     category_urls.append(absolute_url)
+         if link:
+             href = link['href']
+             # Vérifier si l'URL commence par base_url OU est une URL relative commençant par /
+             # Exclure les URLs non pertinentes comme /tools/ ou la page d'accueil elle-même
+             if href.startswith(base_url) and href != base_url:
+                 category_urls.append(href)
+             elif href.startswith('/') and not href.startswith('/tools/') and href != '/':
+                 # Construire l'URL absolue pour les liens relatifs
+                 absolute_url = urljoin(base_url, href)
+                 category_urls.append(absolute_url)
 
+    # Supprimer les doublons potentiels
+    return list(dict.fromkeys(category_urls))
 
-        # Supprimer les doublons potentiels
-        category_urls = list(dict.fromkeys(category_urls))
+
+# scrap les articles d'une catégorie
+def scrape_category_urls(base_url):
+    try:
+        debug_print(f"Fetching base page to find category URLs: {base_url}...", level="fetch")
+        response = get_fetcher().get(base_url, url_class='listing', headers=headers)
+        response.raise_for_status()
+
+        category_urls = parse_category_urls(response.text, base_url)
+        if not category_urls:
+            return []
 
         debug_print(f"Extracted {len(category_urls)} unique category URLs.", level="success")
         return category_urls
@@ -73,186 +86,380 @@ def scrape_category_urls(base_url):
         return []
 
 
-# scrap une liste d'articles d'une page
-# utilisé dans ./pages/Scrap_category.py et main.py
-def scrape_articles_from_listing(listing_url):
-    global headers
-    articles_data = []
-
-    try:
-        debug_print(f"Fetching listing page: {listing_url}...", level="fetch")
-        response_listing = requests.get(listing_url, headers=headers, timeout=10)
-        response_listing.raise_for_status()
-        soup_listing = BeautifulSoup(response_listing.text, 'html.parser')
+# extraction des infos de l'aperçu d'un article (page de listing)
+def parse_article_preview(article_html):
+    data = { # Initialiser le dictionnaire pour chaque article
+        'url': None, 'title': None, 'thumbnail': None, 'category': None,
+        'date_display': None, 'date_iso': None, 'summary': None,
+        'author': None, 'content_images': [], 'tags': []
+    }
 
-        # Trouver les blocs d'aperçu d'articles
-        article_tags_html = soup_listing.find_all('article', class_=re.compile(r'\bpost-\d+\b'))
+    preview = extract_preview(article_html)
+    data['url'] = canonicalize_url(preview['url']) # sans paramètres de suivi ni fragment
+    title_preview = preview['title'] or "No Title Found"
+    data['thumbnail'] = preview['thumbnail'] # Sera potentiellement écrasé par l'image de l'article
+    data['category'] = preview['category'] # Catégorie de l'aperçu
+    data['date_display'] = preview['date_display']
+    data['date_iso'] = preview['date_iso']
+    data['summary'] = preview['summary'] # Extrait du listing, écrasé par le chapô de l'article
+
+    return data, title_preview
+
+
+# extraction d'une page de listing -> (liste de (data, title_preview), numéro de la dernière page)
+def parse_listing_page(html, parser=None):
+    soup_listing = make_soup(html, LISTING_STRAINER, parser)
+    # Trouver les blocs d'aperçu d'articles
+    article_tags_html = soup_listing.find_all('article', class_=re.compile(r'\bpost-\d+\b'))
+    previews = [parse_article_preview(article_html) for article_html in article_tags_html]
+
+    # pagination WordPress : liens/spans 'page-numbers' (1, 2, ..., 245), 1 si pas de pagination
+    page_numbers = []
+    for tag in soup_listing.find_all(class_='page-numbers'):
+        digits = re.sub(r'\D', '', tag.get_text(strip=True)) # "1 245" -> "1245"
+        if digits:
+            page_numbers.append(int(digits))
+    last_page = max(page_numbers) if page_numbers else 1
+
+    return previews, last_page
+
+# extraction de tous les aperçus d'une page de listing -> liste de (data, title_preview)
+def parse_listing_previews(html, parser=None):
+    return parse_listing_page(html, parser)[0]
+
+
+# URL de la page N d'une catégorie (WordPress : /web/page/2/)
+def listing_page_url(listing_url, page):
+    if page <= 1:
+        return listing_url
+    if not listing_url.endswith('/'):
+        listing_url += '/'
+    return urljoin(listing_url, f"page/{page}/")
+
+
+# date_cutoff (YYYY-MM-DD) : garde les aperçus publiés à partir de cette date
+# -> (aperçus gardés, True si la page contient des articles plus anciens = inutile d'aller plus loin)
+def filter_previews_since(previews, date_cutoff):
+    kept = [(data, title_preview) for data, title_preview in previews
+            if not data['date_iso'] or data['date_iso'] >= date_cutoff]
+    cutoff_reached = any(data['date_iso'] and data['date_iso'] < date_cutoff for data, _ in previews)
+    return kept, cutoff_reached
+
+
+# extraction des détails depuis le HTML d'une page article, complète le dict de l'aperçu
+def parse_article_details(html, data, title_preview, parser=None):
+    soup_article = make_soup(html, ARTICLE_STRAINER, parser)
+
+    details = extract_article(soup_article)
+
+    # --- Valeurs de la page article (prioritaires sur l'aperçu) ---
+    for field in ('title', 'summary', 'author', 'date_display', 'date_iso', 'thumbnail'):
+        if details[field]: data[field] = details[field]
+
+    # Si le titre n'a pas été trouvé sur la page article, utiliser celui de l'aperçu
+    if not data['title']: data['title'] = title_preview
+
+    # Images du contenu
+    data['content_images'].extend(details['content_images'])
+    data['body_hash'] = details['body_hash']
+    if details.get('body'):
+        data['body'] = details['body'] # main.py --bodies (stocké à part, bodies.py)
+
+    # Tags (depuis la page article)
+    if details['tags']:
+        data['tags'] = details['tags']
+        # Si la catégorie de l'aperçu était None, utiliser le premier tag
+        if not data['category']:
+            data['category'] = data['tags'][0]
+
+    return data
+
+
+# mode incrémental : retire les aperçus déjà connus (en base) avant la récup des pages articles
+# le listing est trié du plus récent au plus ancien -> après stop_after_known articles connus d'affilée,
+# le reste de la page est considéré comme déjà vu
+# -> (nouveaux aperçus, nb d'articles connus ignorés, arrêt anticipé ou non)
+def filter_new_previews(previews, known_urls, stop_after_known=None):
+    new_previews = []
+    skipped_known = 0
+    consecutive_known = 0
+    for data, title_preview in previews:
+        if data['url'] and data['url'] in known_urls:
+            skipped_known += 1
+            consecutive_known += 1
+            if stop_after_known and consecutive_known >= stop_after_known:
+                return new_previews, skipped_known, True
+            continue
+        consecutive_known = 0
+        new_previews.append((data, title_preview))
+    return new_previews, skipped_known, False
+
+
+# semaphore par host (limite les requêtes simultanées vers un même serveur)
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+def _get_host_semaphore(url, per_host_limit):
+    host = urlparse(url).netloc
+    with _host_semaphores_lock:
+        key = (host, per_host_limit)
+        if key not in _host_semaphores:
+            _host_semaphores[key] = threading.BoundedSemaphore(per_host_limit)
+        return _host_semaphores[key]
+
+
+# récup + parse la page d'un article, complète le dict de l'aperçu
+# exécuté dans le pool de threads de scrape_articles_from_listing
+# en échec avec une frontière : None tant que l'article sera retenté (--resume l'écrira en entier),
+# l'aperçu seul n'est gardé qu'à la dernière tentative
+def _fetch_article_details(data, title_preview, idx, total, per_host_limit, frontier=None):
+    article_url = data['url']
+    start_time = time.time() # Pour mesurer le temps par article
+    if frontier is not None:
+        frontier.mark_in_flight(article_url)
 
-        if not article_tags_html:
-            debug_print(f"No article previews found on {listing_url}.", level="warning")
-            return []
+    try:
+        with _get_host_semaphore(article_url, per_host_limit):
+            response_article = get_fetcher().get(article_url, url_class='article', headers=headers)
+        response_article.raise_for_status()
+
+        parse_pool = get_parse_pool()
+        if parse_pool is not None:
+            # parsing dans un processus du pool -> le thread repart aussitôt sur une autre page
+            return parse_pool.submit(response_article.content, response_article.encoding, data, title_preview), data, title_preview
+        parse_article_details(response_article.text, data, title_preview)
+
+        elapsed_time = time.time() - start_time
+        print(f"  [{idx+1}/{total}] Done: {data.get('title', 'N/A')[:40]}... ({elapsed_time:.2f}s, ttfb {response_article.timing['ttfb']:.2f}s)      ", end='\r')
+
+    except requests.exceptions.RequestException as e_article:
+        print(' ' * 100, end='\r') # Clear line
+        debug_print(f"  [{idx+1}/{total}] Request Error for {article_url}: {e_article}", level="error")
+        if frontier is not None and frontier.mark_failed(article_url, e_article):
+            return None # retenté au prochain --resume
+        # Garder les infos de l'aperçu si l'article n'a pas pu être chargé
+        if not data['title']: data['title'] = title_preview
+        # On ne peut pas récupérer summary, author, content_images, tags
+    except Exception as e_parse:
+        print(' ' * 100, end='\r') # Clear line
+        debug_print(f"  [{idx+1}/{total}] Parsing Error for {article_url}: {e_parse}", level="error")
+        if frontier is not None and frontier.mark_failed(article_url, e_parse):
+            return None
+        # Garder les infos de l'aperçu et ce qui a pu être parsé avant l'erreur
+        if not data['title']: data['title'] = title_preview
+
+    return data
+
+
+# résultat d'un article : dict, Future du thread de récupération ou (Future du pool de parsing, data, title_preview)
+# -> dict, ou None si l'article en échec sera retenté (frontier)
+def _article_result(item, frontier=None):
+    if isinstance(item, Future):
+        item = item.result()
+    if isinstance(item, tuple):
+        parse_future, data, title_preview = item
+        try:
+            return parse_future.result()
+        except Exception as e_parse:
+            debug_print(f"  Parsing Error for {data['url']}: {e_parse}", level="error")
+            if frontier is not None and frontier.mark_failed(data['url'], e_parse):
+                return None
+            if not data['title']: data['title'] = title_preview
+            return data
+    return item
+
+
+def _fetch_listing_page(page_url, per_host_limit):
+    with _get_host_semaphore(page_url, per_host_limit):
+        response = get_fetcher().get(page_url, url_class='listing', headers=headers)
+    response.raise_for_status()
+    return parse_listing_page(response.text)
+
+
+# pages d'une catégorie -> générateur de listes d'aperçus (une liste par page, dans l'ordre)
+# la page 1 donne le nb de pages, les pages 2..N sont ensuite récupérées en parallèle
+# max_pages : profondeur max (None ou 0 = toutes), date_cutoff : arrêt aux articles plus anciens
+def iter_listing_pages(listing_url, max_pages=1, date_cutoff=None, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT):
+    debug_print(f"Fetching listing page: {listing_url}...", level="fetch")
+    previews, last_page = _fetch_listing_page(listing_url, per_host_limit) # erreur page 1 -> remontée à l'appelant
+    cutoff_reached = False
+    if date_cutoff:
+        previews, cutoff_reached = filter_previews_since(previews, date_cutoff)
+    yield previews
+
+    if max_pages:
+        last_page = min(last_page, max_pages)
+    if cutoff_reached or last_page <= 1:
+        return
+
+    page_urls = [listing_page_url(listing_url, page) for page in range(2, last_page + 1)]
+    debug_print(f"Fetching {len(page_urls)} more listing pages ({max_workers} workers)...", level="fetch")
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = [executor.submit(_fetch_listing_page, page_url, per_host_limit) for page_url in page_urls]
+        for page_url, future in zip(page_urls, futures):
+            try:
+                previews, _ = future.result()
+            except requests.exceptions.RequestException as e_page:
+                debug_print(f"Request Error fetching listing page {page_url}: {e_page}", level="error")
+                continue
+            if date_cutoff:
+                previews, cutoff_reached = filter_previews_since(previews, date_cutoff)
+            yield previews
+            if cutoff_reached:
+                debug_print(f"Date cutoff {date_cutoff} reached on {page_url}.", level="info")
+                break
+    finally:
+        # arrêt anticipé (date, mode incrémental) -> les pages pas encore récupérées sont annulées
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# article prêt à être renvoyé (sans attente) ?
+def _article_ready(item):
+    if not isinstance(item, Future):
+        return True
+    if not item.done():
+        return False
+    if item.exception() is None and isinstance(item.result(), tuple):
+        return item.result()[0].done() # parsing encore en cours dans le pool de processus
+    return True
+
+# Future à attendre pour un article pas encore prêt
+def _article_waitable(item):
+    if item.done() and item.exception() is None and isinstance(item.result(), tuple):
+        return item.result()[0]
+    return item
+
+# renvoie les articles prêts de pending (liste modifiée sur place)
+# ordered : dans l'ordre du listing (s'arrête au premier article pas prêt), sinon dans l'ordre de fin
+# wait : attend jusqu'à ce que pending soit vide
+def _drain_articles(pending, ordered, wait, frontier=None):
+    while pending:
+        if ordered:
+            if not wait and not _article_ready(pending[0]):
+                return
+            yield _article_result(pending.pop(0), frontier)
+            continue
+
+        ready = [item for item in pending if _article_ready(item)]
+        if not ready:
+            if not wait:
+                return
+            futures_wait([_article_waitable(item) for item in pending], return_when=FIRST_COMPLETED)
+            continue
+        for item in ready:
+            pending.remove(item)
+            yield _article_result(item, frontier)
+
+
+# quasi-doublons d'articles déjà en base ou déjà vus pendant le run (dedup.py) : ignorés ou marqués avant la récup
+def filter_duplicate_previews(previews):
+    detector = get_duplicate_detector()
+    return detector.filter_previews(previews) if detector is not None else previews
+
+
+# scrap les articles d'une page (et des pages suivantes si max_pages > 1) -> générateur de dicts d'articles
+# chaque article est renvoyé dès que sa page est récupérée et parsée (ordered=False : ordre de fin,
+# un article lent ne bloque pas les suivants ; ordered=True : ordre du listing)
+# les pages articles sont récupérées en parallèle (max_workers threads, per_host_limit requêtes max par host)
+# known_urls_lookup (optionnel) : fonction liste d'URLs -> set des URLs déjà connues (mode incrémental)
+# frontier (optionnel) : frontière persistante (frontier.py), les articles déjà enregistrés lors d'un run précédent sont ignorés
+def iter_articles_from_listing(listing_url, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                               known_urls_lookup=None, stop_after_known=None, max_pages=1, date_cutoff=None, ordered=False,
+                               frontier=None):
+    scraped = 0
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
 
-        debug_print(f"Found {len(article_tags_html)} article previews. Fetching full details for each...", level="info")
-
-        for idx, article_html in enumerate(article_tags_html):
-            data = { # Initialiser le dictionnaire pour chaque article
-                'url': None, 'title': None, 'thumbnail': None, 'category': None,
-                'date_display': None, 'date_iso': None, 'summary': None,
-                'author': None, 'content_images': [], 'tags': []
-            }
-            start_time = time.time() # Pour mesurer le temps par article
-
-            # --- Extraction depuis l'aperçu (fallback ou info primaire) ---
-            header_preview = article_html.find('header', class_='entry-header')
-            a_tag_preview = header_preview.find('a') if header_preview else None
-            article_url = a_tag_preview['href'] if a_tag_preview and a_tag_preview.has_attr('href') else None
-            data['url'] = article_url
-
-            title_tag_preview = header_preview.find('h3', class_='entry-title') if header_preview else None
-            title_preview = title_tag_preview.get_text(strip=True) if title_tag_preview else "No Title Found"
-
-            img_div_preview = article_html.find('div', class_='post-thumbnail')
-            img_tag_preview = img_div_preview.find('img') if img_div_preview else None
-            thumbnail_preview = img_tag_preview.get('data-lazy-src') or img_tag_preview.get('src') if img_tag_preview else None
-            data['thumbnail'] = thumbnail_preview # Sera potentiellement écrasé par l'image de l'article
-
-            meta_div_preview = article_html.find('div', class_='entry-meta')
-            category_tag_preview = meta_div_preview.find('span', class_=re.compile(r'\bfavtag\b')) if meta_div_preview else None
-            data['category'] = category_tag_preview.get_text(strip=True) if category_tag_preview else None # Catégorie de l'aperçu
-
-            date_tag_preview = meta_div_preview.find('time', class_='published') if meta_div_preview else None
-            if date_tag_preview:
-                 data['date_display'] = date_tag_preview.get_text(strip=True)
-                 if date_tag_preview.has_attr('datetime'):
-                     try:
-                         date_iso_str = date_tag_preview['datetime'].replace(' ', 'T')
-                         data['date_iso'] = datetime.fromisoformat(date_iso_str.split('T')[0]).strftime('%Y-%m-%d')
-                     except (ValueError, IndexError): pass # date_iso reste None
-
-            # --- Si URL trouvée, scraper la page de l'article pour les détails complets ---
-            if article_url:
-                debug_print(f"  [{idx+1}/{len(article_tags_html)}] Fetching details: {article_url}", level="fetch", end='\r')
-                try:
-                    # time.sleep(0.2) # Délai très court optionnel
-                    response_article = requests.get(article_url, headers=headers, timeout=10)
-                    response_article.raise_for_status()
-                    soup_article = BeautifulSoup(response_article.text, 'html.parser')
-
-                    # --- Extraction depuis la page article (prioritaire) ---
-                    main_header_article = soup_article.find('header', class_='article-header')
-                    if main_header_article:
-                        # Titre (prioritaire)
-                        title_tag_article = main_header_article.find('h1', class_='entry-title')
-                        if title_tag_article: data['title'] = title_tag_article.get_text(strip=True)
-
-                        # Résumé
-                        summary_div_article = main_header_article.find('div', class_='article-hat')
-                        summary_p_article = summary_div_article.find('p') if summary_div_article else None
-                        if summary_p_article: data['summary'] = summary_p_article.get_text(strip=True)
-
-                        # Auteur & Date (prioritaire)
-                        meta_section_article = main_header_article.find('div', class_=re.compile(r'\bentry-meta\b'))
-                        if meta_section_article:
-                            meta_info_div_article = meta_section_article.find('div', class_='meta-info')
-                            if meta_info_div_article:
-                                # Auteur
-                                byline_span = meta_info_div_article.find('span', class_='byline')
-                                if byline_span:
-                                    author_a = byline_span.find('a')
-                                    if author_a: data['author'] = author_a.get_text(strip=True)
-                                # Date (prioritaire si trouvée)
-                                posted_on_span = meta_info_div_article.find('span', class_='posted-on')
-                                if posted_on_span:
-                                    time_tag_article = posted_on_span.find('time', class_='published')
-                                    if time_tag_article:
-                                        data['date_display'] = time_tag_article.get_text(strip=True)
-                                        if time_tag_article.has_attr('datetime'):
-                                            try:
-                                                date_iso_str = time_tag_article['datetime'].replace(' ', 'T')
-                                                data['date_iso'] = datetime.fromisoformat(date_iso_str.split('T')[0]).strftime('%Y-%m-%d')
-                                            except ValueError: pass # date_iso reste celui de l'aperçu ou None
-
-                        # Miniature (Image d'en-tête prioritaire)
-                        figure_hat_img = main_header_article.find('figure', class_='article-hat-img')
-                        if figure_hat_img:
-                            img_tag_hat = figure_hat_img.find('img')
-                            if img_tag_hat:
-                                data['thumbnail'] = img_tag_hat.get('data-lazy-src') or img_tag_hat.get('src')
-
-                    # Si le titre n'a pas été trouvé sur la page article, utiliser celui de l'aperçu
-                    if not data['title']: data['title'] = title_preview
-
-                    # Images du contenu
-                    content_div_article = soup_article.find('div', class_='entry-content')
-                    if content_div_article:
-                        figures = content_div_article.find_all('figure')
-                        if figures:
-                            for figure in figures:
-                                img_tag = figure.find('img')
-                                if img_tag:
-                                    img_url = img_tag.get('data-lazy-src') or img_tag.get('src')
-                                    if not img_url or img_url.startswith('data:image'): continue
-                                    figcaption = figure.find('figcaption')
-                                    caption = figcaption.get_text(strip=True) if figcaption else img_tag.get('alt', '')
-                                    data['content_images'].append({'url': img_url, 'caption_or_alt': caption})
-                        else: # Fallback si pas de <figure>
-                            images_in_content = content_div_article.find_all('img')
-                            for img_tag in images_in_content:
-                                img_url = img_tag.get('data-lazy-src') or img_tag.get('src')
-                                if not img_url or img_url.startswith('data:image'): continue
-                                caption = img_tag.get('alt', '')
-                                data['content_images'].append({'url': img_url, 'caption_or_alt': caption})
-
-                    # Tags (depuis la page article)
-                    terms_div_article = soup_article.find('div', class_='article-terms')
-                    if terms_div_article:
-                        tags_list_ul = terms_div_article.find('ul', class_='tags-list')
-                        if tags_list_ul:
-                            tag_links = tags_list_ul.find_all('a', class_='post-tags')
-                            if tag_links:
-                                data['tags'] = [link.get_text(strip=True) for link in tag_links]
-                                # Si la catégorie de l'aperçu était None, utiliser le premier tag
-                                if not data['category'] and data['tags']:
-                                    data['category'] = data['tags'][0]
-
-                    # Effacer la ligne de progression
-                    elapsed_time = time.time() - start_time
-                    print(f"  [{idx+1}/{len(article_tags_html)}] Done: {data.get('title', 'N/A')[:40]}... ({elapsed_time:.2f}s)      ", end='\r')
-
-
-                except requests.exceptions.RequestException as e_article:
-                    print(' ' * 100, end='\r') # Clear line
-                    debug_print(f"  [{idx+1}/{len(article_tags_html)}] Request Error for {article_url}: {e_article}", level="error")
-                    # Garder les infos de l'aperçu si l'article n'a pas pu être chargé
-                    if not data['title']: data['title'] = title_preview
-                    # On ne peut pas récupérer summary, author, content_images, tags
-                except Exception as e_parse:
+    try:
+        pages = iter_listing_pages(listing_url, max_pages, date_cutoff, max_workers, per_host_limit)
+        pending = [] # Future ou dict, dans l'ordre du listing
+        total = 0
+        known_total = 0
+
+        # les aperçus de chaque page sont envoyés au pool dès que la page est parsée
+        for previews in pages:
+            stop_paging = False
+
+            # --- mode incrémental : une seule requête par page, seuls les nouveaux articles sont récupérés ---
+            if known_urls_lookup:
+                known_urls = known_urls_lookup([data['url'] for data, _ in previews if data['url']])
+                previews, skipped_known, stop_paging = filter_new_previews(previews, known_urls, stop_after_known)
+                known_total += skipped_known
+
+            # --- reprise : articles déjà faits ignorés, les nouveaux ajoutés à la frontière ---
+            if frontier is not None:
+                urls = [data['url'] for data, _ in previews if data['url']]
+                done_urls = frontier.skip_urls(urls)
+                previews = [(data, title_preview) for data, title_preview in previews if data['url'] not in done_urls]
+                frontier.add(urls, 'article', parent=listing_url)
+                if done_urls:
+                    debug_print(f"Frontier: {len(done_urls)} articles already done, skipped.", level="info")
+
+            previews = filter_duplicate_previews(previews)
+
+            debug_print(f"Found {len(previews)} article previews. Fetching full details for each ({max_workers} workers)...", level="info")
+            seen = total + len(previews) # nb d'aperçus connus jusqu'ici (pour l'affichage)
+            for data, title_preview in previews:
+                idx = total
+                total += 1
+                if data['url']:
+                    debug_print(f"  [{idx+1}/{seen}] Fetching details: {data['url']}", level="fetch", end='\r')
+                    pending.append(executor.submit(_fetch_article_details, data, title_preview, idx, seen, per_host_limit, frontier))
+                else:
+                    # Cas où l'URL n'a pas été trouvée dans l'aperçu
                     print(' ' * 100, end='\r') # Clear line
-                    debug_print(f"  [{idx+1}/{len(article_tags_html)}] Parsing Error for {article_url}: {e_parse}", level="error")
-                    # Garder les infos de l'aperçu et ce qui a pu être parsé avant l'erreur
-                    if not data['title']: data['title'] = title_preview
-
-            else:
-                # Cas où l'URL n'a pas été trouvée dans l'aperçu
-                print(' ' * 100, end='\r') # Clear line
-                debug_print(f"  [{idx+1}/{len(article_tags_html)}] Skipping details fetch (no URL found in preview). Title: {title_preview}", level="warning")
-                data['title'] = title_preview # Assigner le titre de l'aperçu
+                    debug_print(f"  [{idx+1}/{seen}] Skipping details fetch (no URL found in preview). Title: {title_preview}", level="warning")
+                    data['title'] = title_preview # Assigner le titre de l'aperçu
+                    pending.append(data)
+
+            if stop_paging:
+                debug_print(f"Incremental: {stop_after_known} known articles in a row, stopping {listing_url}.", level="info")
+                pages.close()
+                break
+
+            # articles déjà prêts renvoyés pendant la lecture des pages suivantes
+            for data in _drain_articles(pending, ordered, wait=False, frontier=frontier):
+                # Renvoyer les données (même si incomplètes) si on a au moins une URL ou un titre valide
+                # (None : article en échec retenté au prochain --resume)
+                if data is not None and (data.get('url') or data.get('title') != "No Title Found"):
+                    scraped += 1
+                    yield data
+
+        if known_urls_lookup:
+            debug_print(f"Incremental: {total} new, {known_total} already known.", level="info")
+        if total == 0:
+            debug_print(f"No article previews found on {listing_url}.", level="warning")
+            return
 
-            # Ajouter les données (même si incomplètes) si on a au moins une URL ou un titre valide
-            if data.get('url') or data.get('title') != "No Title Found":
-                articles_data.append(data)
+        for data in _drain_articles(pending, ordered, wait=True, frontier=frontier):
+            if data is not None and (data.get('url') or data.get('title') != "No Title Found"):
+                scraped += 1
+                yield data
 
         print() # Saut de ligne après la boucle
-        debug_print(f"Successfully scraped {len(articles_data)} articles with details from {listing_url}.", level="success")
-        return articles_data
+        debug_print(f"Successfully scraped {scraped} articles with details from {listing_url}.", level="success")
 
     # gestion des exceptions pour la page de listing principale
+    # avec une frontière : listing marqué en échec (jamais done), retenté au prochain --resume
     except requests.exceptions.RequestException as e_listing:
         debug_print(f"Request Error fetching listing page {listing_url}: {e_listing}", level="error")
-        return []
+        if frontier is not None:
+            frontier.mark_failed(listing_url, e_listing)
     except Exception as e_general:
         debug_print(f"An unexpected error occurred while scraping {listing_url}: {e_general}", level="error")
-        return []
+        if frontier is not None:
+            frontier.mark_failed(listing_url, e_general)
+    finally:
+        # arrêt par l'appelant -> les articles pas encore récupérés sont annulés
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# scrap une liste d'articles d'une page (et des pages suivantes si max_pages > 1) -> liste complète, ordre du listing
+# utilisé dans ./pages/Scrap_category.py et main.py
+def scrape_articles_from_listing(listing_url, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                                 known_urls_lookup=None, stop_after_known=None, max_pages=1, date_cutoff=None):
+    return list(iter_articles_from_listing(listing_url, max_workers, per_host_limit, known_urls_lookup,
+                                           stop_after_known, max_pages, date_cutoff, ordered=True))
 
 
 # scrap les détails complets d'un article (sans complément et sans passer par l'aperçu)
@@ -274,90 +481,20 @@ def scrape_article_full_details(article_url, headers):
 
     try:
         debug_print(f"Fetching full details for: {article_url}", level="fetch")
-        # time.sleep(0.5) # Délai optionnel
-        response = requests.get(article_url, headers=headers, timeout=10)
+        response = get_fetcher().get(article_url, url_class='article', headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # recup le header de l'article
-        main_header = soup.find('header', class_='article-header')
-        if not main_header:
-            debug_print(f"Main header ('header.article-header') not found on {article_url}", level="warning")
-        else:
-            # extract titre
-            title_tag = main_header.find('h1', class_='entry-title')
-            data['title'] = title_tag.get_text(strip=True) if title_tag else None
-
-            # extract résumé
-            summary_div = main_header.find('div', class_='article-hat')
-            summary_p = summary_div.find('p') if summary_div else None
-            data['summary'] = summary_p.get_text(strip=True) if summary_p else None
-
-            # extract auteur & date
-            meta_section_header = main_header.find('div', class_=re.compile(r'\bentry-meta\b'))
-            if meta_section_header:
-                meta_info_div_header = meta_section_header.find('div', class_='meta-info')
-                if meta_info_div_header:
-                    # extract auteur
-                    byline_span = meta_info_div_header.find('span', class_='byline')
-                    # debug_print(f"  -> byline_span: {byline_span}", level="debug")
-                    if byline_span:
-                        author_a = byline_span.find('a')
-                        data['author'] = author_a.get_text(strip=True) if author_a else None
-                    # extract date
-                    posted_on_span = meta_info_div_header.find('span', class_='posted-on')
-                    if posted_on_span:
-                        time_tag = posted_on_span.find('time', class_='published')
-                        if time_tag:
-                            data['date_display'] = time_tag.get_text(strip=True)
-                            if time_tag.has_attr('datetime'):
-                                try:
-                                    date_iso_str = time_tag['datetime']
-                                    date_iso_str = date_iso_str.replace(' ', 'T')
-                                    data['date_iso'] = datetime.fromisoformat(date_iso_str.split('T')[0]).strftime('%Y-%m-%d')
-                                except ValueError:
-                                    debug_print(f"Could not parse date: {time_tag.get('datetime')}", level="warning")
-                                    pass
-
-            # extract miniature / (normalment image de preview)
-            figure_hat_img = main_header.find('figure', class_='article-hat-img')
-            if figure_hat_img:
-                img_tag = figure_hat_img.find('img')
-                if img_tag:
-                    data['thumbnail'] = img_tag.get('data-lazy-src') or img_tag.get('src')
-
-        # extract images de l'article
-        content_div = soup.find('div', class_='entry-content')
-        if content_div:
-            figures = content_div.find_all('figure')
-            if figures:
-                for figure in figures:
-                    img_tag = figure.find('img')
-                    if img_tag:
-                        img_url = img_tag.get('data-lazy-src') or img_tag.get('src')
-                        if not img_url or img_url.startswith('data:image'): continue
-                        figcaption = figure.find('figcaption')
-                        caption = figcaption.get_text(strip=True) if figcaption else img_tag.get('alt', '')
-                        data['content_images'].append({'url': img_url, 'caption_or_alt': caption})
-            else: # Fallback
-                images_in_content = content_div.find_all('img')
-                for img_tag in images_in_content:
-                    img_url = img_tag.get('data-lazy-src') or img_tag.get('src')
-                    if not img_url or img_url.startswith('data:image'): continue
-                    caption = img_tag.get('alt', '')
-                    data['content_images'].append({'url': img_url, 'caption_or_alt': caption})
-
-        # extract Tags/Catégories
-        terms_div = soup.find('div', class_='article-terms')
-        if terms_div:
-            tags_list_ul = terms_div.find('ul', class_='tags-list')
-            if tags_list_ul:
-                tag_links = tags_list_ul.find_all('a', class_='post-tags')
-                if tag_links:
-                    data['tags'] = [link.get_text(strip=True) for link in tag_links]
-                    if data['tags']:
-                        # Si category n'a pas été trouvée dans l'aperçu (ce qui est le cas ici)
-                        data['category'] = data['tags'][0] # Utilise le premier tag comme catégorie
+        soup = make_soup(response.text, ARTICLE_STRAINER)
+
+        details = extract_article(soup)
+        if not details['title']:
+            debug_print(f"Article title ('header.article-header h1.entry-title') not found on {article_url}", level="warning")
+        for field in ('title', 'summary', 'author', 'date_display', 'date_iso', 'thumbnail', 'tags', 'content_images', 'body_hash'):
+            data[field] = details[field]
+        if details.get('body'):
+            data['body'] = details['body']
+        if data['tags']:
+            # Si category n'a pas été trouvée dans l'aperçu (ce qui est le cas ici)
+            data['category'] = data['tags'][0] # Utilise le premier tag comme catégorie
 
         debug_print(f"Successfully scraped full details for: {data.get('title', article_url)}", level="success")
         return data
@@ -1,7 +1,8 @@
 import streamlit as st
-import subprocess # pour exécuter un script Python
-import sys
-import os # pour aller à un fichier 
+from datetime import datetime
+
+# custom
+import job_runner # scrapings complets en arrière-plan (main.py dans un process séparé)
 
 st.set_page_config(
     layout="wide",
@@ -42,53 +43,111 @@ with col3:
 
 st.divider()
 
-# lancer ./main.py
+# lancer ./main.py (job en arrière-plan : l'interface reste utilisable, plusieurs utilisateurs peuvent suivre les runs)
 st.subheader("🚀 Lancer un Scraping Complet")
-st.write("Démarrez un nouveau processus de scraping complet **(HOME & TOUTES LES CATEGORIES)** pour récupérer les derniers articles de la page d'accueil du Blog du Modérateur et les insérer dans la base de données. La sortie de la console s'affichera ci-dessous.")
+st.write("Démarrez un nouveau processus de scraping complet **(HOME & TOUTES LES CATEGORIES)** pour récupérer les derniers articles de la page d'accueil du Blog du Modérateur et les insérer dans la base de données. Le scraping tourne en arrière-plan : sa progression et la fin de la sortie console s'affichent ci-dessous.")
+
+#CONFIG
+REFRESH_INTERVAL = 1.0 # secondes entre 2 rafraîchissements du suivi
+JOBS_SHOWN = 20 # nb de jobs récents dans la liste
+STATUS_ICONS = {job_runner.RUNNING: "⏳", job_runner.SUCCEEDED: "✅", job_runner.FAILED: "❌"}
 
-console_output_placeholder = st.empty()
-console_output_placeholder.code("La sortie du script apparaîtra ici...", language=None)
+if 'selected_job' not in st.session_state:
+    st.session_state.selected_job = None
+if 'job_progress' not in st.session_state:
+    st.session_state.job_progress = {} # job_id -> {'offset': position lue dans events.jsonl, 'state': dernier état}
 
 if st.button("Lancer le Scraping Complet", use_container_width=True, type="primary"):
-    console_output = ""
-    console_output_placeholder.code("Lancement du scraping...", language=None)
-    try:
-        # chemin main.py
-        script_path = os.path.join(os.path.dirname(__file__), "main.py")
-        process = subprocess.Popen(
-            [sys.executable, script_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT, # récupérer les erreurs dans la sortie standard
-            text=True,
-            encoding='utf-8',
-            errors='replace', #  caractères invalides -> '?'
-            bufsize=1 # ligne par ligne
-        )
-
-        for line in iter(process.stdout.readline, ''):
-            console_output += line
-            console_output_placeholder.code(console_output, language=None)
-
-        process.stdout.close()
-        return_code = process.wait()
-
-        if return_code == 0:
-            console_output += "\n--- Scraping terminé avec succès ---"
+    job_id = job_runner.start_job()
+    if job_id is None:
+        st.warning(f"{job_runner.MAX_RUNNING_JOBS} scrapings sont déjà en cours, réessayez quand l'un d'eux sera terminé.")
+    else:
+        st.session_state.selected_job = job_id
+
+# rafraîchissement partiel de la page (st.fragment), sinon bouton de rafraîchissement
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+def auto_refresh(render):
+    return _fragment(run_every=REFRESH_INTERVAL)(render) if _fragment else render
+
+
+# métriques du pipeline (metrics.json du job)
+def render_metrics(summary):
+    counters = summary['counters']
+    total = lambda name: sum(counters.get(name, {}).values())
+    st.caption(f"Métriques du pipeline ({summary['uptime']:.0f}s)")
+    cols = st.columns(4)
+    cols[0].metric("Requêtes HTTP", total('http_requests_total'))
+    cols[1].metric("Téléchargé", f"{total('http_bytes_downloaded_total') / (1024 * 1024):.1f} Mo")
+    cols[2].metric("Hits cache", total('http_cache_hits_total'))
+    cols[3].metric("Retries", total('http_retries_total'))
+    st.table([{
+        'étape': stage,
+        'nb': stats['count'],
+        'total (s)': round(stats['total'], 2),
+        'moy (ms)': round(stats['avg'] * 1000, 1),
+        'p50 (ms)': round(stats['p50'] * 1000, 1),
+        'p99 (ms)': round(stats['p99'] * 1000, 1),
+    } for stage, stats in summary['stages'].items()])
+
+
+# état d'un job -> son statut : seuls les nouveaux événements sont lus à chaque appel, le log est limité à sa fin
+def render_job(job_id):
+    job = job_runner.read_job(job_id)
+    if job is None:
+        st.info("Job introuvable.")
+        return None
+    status = job_runner.job_status(job)
+
+    tracked = st.session_state.job_progress.setdefault(job_id, {'offset': 0, 'state': {}})
+    events, tracked['offset'] = job_runner.read_events(job_id, tracked['offset'])
+    for event in events:
+        tracked['state'].update(event)
+    state = tracked['state']
+
+    with st.container(border=True):
+        st.write(f"**Job {job_id}** — {STATUS_ICONS.get(status, '')} {status}")
+        if state.get('categories_total'):
+            st.progress(min(1.0, state.get('categories_done', 0) / state['categories_total']),
+                        text=f"Catégories : {state.get('categories_done', 0)}/{state['categories_total']}")
+        cols = st.columns(3)
+        cols[0].metric("Articles scrapés", state.get('articles_done', 0))
+        cols[1].metric("Articles / s", state.get('rate', 0))
+        cols[2].metric("Articles insérés", state.get('inserted', 0))
+
+        summary = job_runner.read_metrics(job_id)
+        if summary:
+            render_metrics(summary)
+
+        st.code(job_runner.read_log_tail(job_id) or "La sortie du script apparaîtra ici...", language=None)
+        if status == job_runner.SUCCEEDED:
             st.success("Scraping complet terminé avec succès !")
-        else:
-            console_output += f"\n--- Erreur lors du scraping (code de sortie: {return_code}) ---"
-            st.error(f"Le scraping s'est terminé avec une erreur (code: {return_code}). Vérifiez la sortie ci-dessus.")
-        console_output_placeholder.code(console_output, language=None)
-
-    except FileNotFoundError:
-        error_msg = f"Erreur: Le script '{script_path}' est introuvable."
-        console_output_placeholder.code(error_msg, language=None)
-        st.error(error_msg)
-    except Exception as e:
-        error_msg = f"Une erreur inattendue est survenue : {e}"
-        if console_output:
-                console_output += f"\n{error_msg}"
-        else:
-                console_output = error_msg
-        console_output_placeholder.code(console_output, language=None)
-        st.error(error_msg)
+        elif status == job_runner.FAILED:
+            st.error(f"Le scraping s'est terminé avec une erreur (code: {job.get('return_code')}). Vérifiez la sortie ci-dessus.")
+    if not _fragment and status == job_runner.RUNNING:
+        st.button("Rafraîchir")
+    return status
+
+# suivi d'un job en cours (rafraîchi toutes les REFRESH_INTERVAL s) ; à sa fin, la page est relancée
+# et le job terminé est affiché une seule fois, sans rafraîchissement
+@auto_refresh
+def follow_job(job_id):
+    if render_job(job_id) != job_runner.RUNNING and _fragment:
+        st.rerun()
+
+
+jobs = job_runner.list_jobs()[:JOBS_SHOWN]
+if jobs:
+    job_ids = [job['id'] for job in jobs]
+    labels = {job['id']: f"{STATUS_ICONS.get(job['status'], '')} {job['id']} (lancé le {datetime.fromtimestamp(job['started']):%d/%m %H:%M:%S})"
+              for job in jobs}
+    selected_job = st.selectbox("Scrapings récents :", options=job_ids, format_func=labels.get,
+                                index=job_ids.index(st.session_state.selected_job) if st.session_state.selected_job in job_ids else 0)
+    st.session_state.selected_job = selected_job
+    statuses = {job['id']: job['status'] for job in jobs}
+    if statuses[selected_job] == job_runner.RUNNING:
+        follow_job(selected_job)
+    else:
+        render_job(selected_job)
+else:
+    st.code("La sortie du script apparaîtra ici...", language=None)
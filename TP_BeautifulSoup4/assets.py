@@ -0,0 +1,263 @@
+import argparse
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from pymongo import UpdateOne
+
+# custom
+from http_client import get_fetcher
+from metrics import get_metrics
+from utils.debug_color import debug_print
+
+# Pillow optionnel : sans lui les images sont téléchargées et dédupliquées, mais pas de miniatures
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# étape "assets" (optionnelle, main.py --assets) : les images des articles (miniature + images du contenu)
+# sont téléchargées en parallèle et rangées par empreinte SHA-256 (une image publiée sous plusieurs URLs
+# n'est stockée qu'une fois), avec une petite miniature JPEG générée une seule fois.
+# les chemins locaux (relatifs à ASSETS_DIR) sont ajoutés aux documents des articles :
+#   thumbnail_local, thumbnail_sha256, content_images[].local_path / thumb_path / sha256,
+#   assets_at (toutes les images stockées) ou assets_missing (nb d'images en échec, réessayées par python assets.py)
+# arborescence : originals/ab/abcdef....jpg, thumbs/ab/abcdef....jpg, index.sqlite (URL -> empreinte)
+
+#CONFIG (surcharge possible par variables d'environnement)
+ASSETS_DIR = os.environ.get("ASSETS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets"))
+ASSET_WORKERS = int(os.environ.get("ASSET_WORKERS", 8)) # téléchargements simultanés
+THUMBNAIL_SIZE = (400, 225) # taille max des miniatures (px)
+THUMBNAIL_QUALITY = 80 # qualité JPEG des miniatures
+MAX_ASSET_BYTES = int(os.environ.get("ASSET_MAX_BYTES", 20 * 1024 * 1024)) # images plus lourdes ignorées
+BACKFILL_BATCH_SIZE = 50
+EXTENSIONS = {
+    'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif',
+    'image/avif': '.avif', 'image/svg+xml': '.svg',
+}
+
+
+# stockage adressé par contenu + index SQLite des URLs déjà téléchargées
+class AssetStore:
+    def __init__(self, root=ASSETS_DIR, workers=ASSET_WORKERS, thumbnail_size=THUMBNAIL_SIZE):
+        self.root = root
+        self.workers = max(1, workers)
+        self.thumbnail_size = thumbnail_size
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS assets (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT,
+                path TEXT,
+                thumb_path TEXT,
+                content_type TEXT,
+                size INTEGER,
+                fetched_at REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_sha256 ON assets(sha256)")
+        self._conn.commit()
+        self._failed = set() # URLs en échec pendant ce run (pas retentées avant le prochain)
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT sha256, path, thumb_path FROM assets WHERE url = ?", (url,)).fetchone()
+        return {'sha256': row[0], 'path': row[1], 'thumb_path': row[2]} if row else None
+
+    def _remember(self, url, record, content_type, size):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO assets (url, sha256, path, thumb_path, content_type, size, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, record['sha256'], record['path'], record['thumb_path'], content_type, size, time.time()))
+            self._conn.commit()
+
+    def _write(self, rel_path, data):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path) # 2 URLs de même contenu en parallèle -> même fichier, écrit en entier
+
+    # miniature JPEG (None si Pillow absent ou format non lisible, ex: SVG)
+    def _make_thumbnail(self, body, sha256):
+        if Image is None:
+            return None
+        rel_path = f"thumbs/{sha256[:2]}/{sha256}.jpg"
+        if os.path.exists(os.path.join(self.root, rel_path)):
+            return rel_path
+        try:
+            with Image.open(io.BytesIO(body)) as image:
+                image.draft('RGB', self.thumbnail_size) # JPEG : décodage directement à taille réduite
+                image.thumbnail(self.thumbnail_size)
+                output = io.BytesIO()
+                image.convert('RGB').save(output, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        except (OSError, ValueError) as e: # UnidentifiedImageError hérite d'OSError
+            debug_print(f"  Thumbnail Error for {sha256[:12]}: {e}", level="warning")
+            return None
+        self._write(rel_path, output.getvalue())
+        get_metrics().inc('thumbnails_created_total')
+        return rel_path
+
+    # une image -> {'sha256', 'path', 'thumb_path'} (None si échec)
+    def fetch(self, url):
+        record = self.lookup(url)
+        if record is not None or url in self._failed:
+            return record
+
+        metrics = get_metrics()
+        try:
+            response = get_fetcher().get(url, url_class='asset', use_cache=False)
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if not content_type.startswith('image/'):
+                raise ValueError(f"not an image ({content_type or 'no content type'})")
+            body = response.content
+            if len(body) > MAX_ASSET_BYTES:
+                raise ValueError(f"too large ({len(body)} bytes)")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            debug_print(f"  Asset Error for {url}: {e}", level="warning")
+            metrics.inc('assets_failed_total')
+            self._failed.add(url)
+            return None
+
+        sha256 = hashlib.sha256(body).hexdigest()
+        rel_path = f"originals/{sha256[:2]}/{sha256}{EXTENSIONS.get(content_type, '.bin')}"
+        if os.path.exists(os.path.join(self.root, rel_path)):
+            metrics.inc('assets_deduplicated_total') # même contenu déjà stocké (autre URL)
+        else:
+            self._write(rel_path, body)
+            metrics.inc('assets_stored_bytes_total', len(body))
+        metrics.inc('assets_downloaded_total')
+        record = {'sha256': sha256, 'path': rel_path, 'thumb_path': self._make_thumbnail(body, sha256)}
+        self._remember(url, record, content_type, len(body))
+        return record
+
+    # plusieurs images en parallèle (URLs en double récupérées une fois) -> {url: record ou None}
+    def fetch_many(self, urls):
+        urls = list(dict.fromkeys(url for url in urls if url and not url.startswith('data:')))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(urls))) as executor:
+            return dict(zip(urls, executor.map(self.fetch, urls)))
+
+    # complète les articles (sur place) avec les chemins locaux de leurs images
+    # assets_at seulement si toutes les images sont stockées, sinon assets_missing : l'article reste à compléter
+    def process_articles(self, articles):
+        with get_metrics().timer('assets'):
+            urls = []
+            for article in articles:
+                urls.append(article.get('thumbnail'))
+                urls.extend(image.get('url') for image in article.get('content_images') or [])
+            records = self.fetch_many(urls)
+
+            for article in articles:
+                missing = 0
+                record = records.get(article.get('thumbnail'))
+                if record:
+                    article['thumbnail_local'] = record['thumb_path'] or record['path']
+                    article['thumbnail_sha256'] = record['sha256']
+                elif article.get('thumbnail') in records:
+                    missing += 1
+                for image in article.get('content_images') or []:
+                    record = records.get(image.get('url'))
+                    if record:
+                        image.update(sha256=record['sha256'], local_path=record['path'], thumb_path=record['thumb_path'])
+                    elif image.get('url') in records:
+                        missing += 1
+                if missing:
+                    article['assets_missing'] = missing
+                    article.pop('assets_at', None)
+                else:
+                    article['assets_at'] = time.time()
+                    article.pop('assets_missing', None)
+        return articles
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# chemin absolu d'un fichier du stockage (champ thumbnail_local / thumb_path d'un article), None s'il n'existe pas
+# utilisé par les pages Streamlit pour afficher les miniatures locales plutôt que les images distantes
+def local_image(rel_path, root=ASSETS_DIR):
+    if not rel_path:
+        return None
+    path = os.path.join(root, rel_path)
+    return path if os.path.isfile(path) else None
+
+
+# stockage partagé (désactivé par défaut : seules les URLs des images sont enregistrées)
+_asset_store = None
+_asset_store_lock = threading.Lock()
+
+def configure_asset_store(enabled=True, **kwargs):
+    global _asset_store
+    with _asset_store_lock:
+        if _asset_store is not None:
+            _asset_store.close()
+        _asset_store = AssetStore(**kwargs) if enabled else None
+        return _asset_store
+
+def get_asset_store():
+    return _asset_store
+
+
+# articles déjà en base sans images locales (ou avec des images en échec lors d'un run précédent)
+# -> téléchargement + mise à jour des documents -> nb d'articles dont toutes les images sont stockées
+def backfill_assets(collection, store, limit=0, batch_size=BACKFILL_BATCH_SIZE):
+    query = {'assets_at': {'$exists': False}}
+    cursor = collection.find(query, {'thumbnail': 1, 'content_images': 1})
+    if limit:
+        cursor = cursor.limit(limit)
+    updated = 0
+    batch = []
+    for article in cursor:
+        batch.append(article)
+        if len(batch) >= batch_size:
+            updated += _backfill_batch(collection, store, batch)
+            batch = []
+    if batch:
+        updated += _backfill_batch(collection, store, batch)
+    return updated
+
+def _backfill_batch(collection, store, articles):
+    store.process_articles(articles)
+    fields = ('thumbnail_local', 'thumbnail_sha256', 'content_images', 'assets_at', 'assets_missing')
+    operations = []
+    for article in articles:
+        update = {'$set': {field: article[field] for field in fields if field in article}}
+        if 'assets_at' in article:
+            update['$unset'] = {'assets_missing': ""}
+        operations.append(UpdateOne({'_id': article['_id']}, update))
+    collection.bulk_write(operations, ordered=False)
+    complete = sum('assets_at' in article for article in articles)
+    debug_print(f"Assets: {complete} articles complete, {len(articles) - complete} with missing images (retried next run).", level="info")
+    return complete
+
+
+if __name__ == "__main__":
+    import mongo_connect as db_connector
+
+    parser = argparse.ArgumentParser(description="Télécharge les images des articles déjà en base (stockage local + miniatures).")
+    parser.add_argument("--limit", type=int, default=0, help="nb max d'articles à traiter (0 = tous)")
+    args = parser.parse_args()
+
+    articles_collection = db_connector.connect_to_mongo()
+    if articles_collection is None:
+        print("Failed to connect to MongoDB. Exiting.")
+    else:
+        if Image is None:
+            print("Pillow not installed: images are stored without thumbnails (pip install pillow).")
+        asset_store = configure_asset_store()
+        print(f"Articles with all images stored: {backfill_assets(articles_collection, asset_store, args.limit)}")
+        asset_store.close()
@@ -0,0 +1,297 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+# custom
+import TP_BeautifulSoup4 as scraper
+import mongo_connect as db_connector
+from metrics import get_metrics
+from parse_pool import get_parse_pool
+from rate_limiter import THROTTLE_STATUSES, get_rate_limiter
+from utils.debug_color import debug_print
+
+#CONFIG
+GLOBAL_CONCURRENCY = 16 # nb max de requêtes HTTP simultanées
+PER_HOST_CONCURRENCY = 4 # nb max de requêtes simultanées vers un même host
+WRITE_BATCH_SIZE = 20 # nb d'articles par écriture MongoDB
+WRITE_QUEUE_SIZE = 200 # articles scrapés en attente (back-pressure sur le scraping)
+REQUEST_TIMEOUT = 10 # secondes
+MAX_THROTTLE_RETRIES = 3 # nouvelles tentatives sur 429 / 503
+
+
+# moteur de crawl asyncio : pages de listing, pages articles et écritures Mongo dans un seul pipeline
+# le parsing HTML réutilise les fonctions de TP_BeautifulSoup4 (exécutées dans des threads)
+# stream() renvoie les articles au fil de l'eau (async for), run() les écrit dans MongoDB par lots
+class AsyncCrawler:
+    def __init__(self, base_url, collection, global_limit=GLOBAL_CONCURRENCY,
+                 per_host_limit=PER_HOST_CONCURRENCY, batch_size=WRITE_BATCH_SIZE,
+                 incremental=False, stop_after_known=None, max_pages=1, date_cutoff=None):
+        self.base_url = base_url
+        self.collection = collection
+        self.max_pages = max_pages # profondeur de pagination (None ou 0 = toutes les pages)
+        self.date_cutoff = date_cutoff # YYYY-MM-DD
+        self.incremental = incremental # ne récupère que les articles absents de la base
+        self.stop_after_known = stop_after_known
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self.batch_size = batch_size
+
+        self.global_semaphore = asyncio.Semaphore(global_limit)
+        self.host_semaphores = {}
+        self.rate_limiter = get_rate_limiter() # même limiteur que le client synchrone (None si désactivé)
+        self.article_queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.seen_urls = set() # évite de récupérer 2 fois un article présent dans plusieurs catégories
+        self.bulk_writer = None # créé par run() (stream() seul n'a pas besoin de MongoDB)
+
+        self.stats = {
+            'categories': 0,
+            'articles_scraped': 0,
+            'inserted': 0,
+            'skipped': 0,
+            'errors': 0,
+            'known': 0,
+            'fetch_errors': 0,
+        }
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self.host_semaphores[host]
+
+    async def fetch(self, session, url):
+        body, charset = await self.fetch_raw(session, url)
+        return body.decode(charset or 'utf-8', errors='replace')
+
+    # page brute (bytes, charset), aussi utilisée par le pool de parsing multi-processus
+    # 429 / 503 -> nouvelle tentative après la pause imposée par le limiteur de débit (Retry-After, AIMD)
+    async def fetch_raw(self, session, url):
+        metrics = get_metrics()
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.wait_async(url)
+            async with self.global_semaphore, self._host_semaphore(url):
+                start = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        ttfb = time.perf_counter() - start
+                        if self.rate_limiter:
+                            self.rate_limiter.record(url, response.status, ttfb, retry_after=response.headers.get('Retry-After'))
+                            if response.status in THROTTLE_STATUSES and attempt < MAX_THROTTLE_RETRIES:
+                                metrics.record_fetch(response.status, ttfb, ttfb, 0, retries=1)
+                                continue
+                        if response.status >= 400:
+                            metrics.record_fetch(response.status, ttfb, ttfb, 0)
+                        response.raise_for_status()
+                        body = await response.read()
+                        metrics.record_fetch(response.status, ttfb, time.perf_counter() - start, len(body))
+                        return body, response.charset
+                except aiohttp.ClientResponseError:
+                    raise # code HTTP d'erreur, déjà compté avec son statut
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    metrics.inc('http_errors_total') # erreur réseau / timeout
+                    raise
+
+    # --- étape 1 : page d'accueil -> URLs des catégories ---
+    async def crawl_category_urls(self, session):
+        try:
+            debug_print(f"Fetching base page to find category URLs: {self.base_url}...", level="fetch")
+            html = await self.fetch(session, self.base_url)
+            category_urls = await asyncio.to_thread(scraper.parse_category_urls, html, self.base_url)
+            debug_print(f"Extracted {len(category_urls)} unique category URLs.", level="success")
+            return category_urls
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            debug_print(f"Request Error fetching base page {self.base_url}: {e}", level="error")
+            self.stats['fetch_errors'] += 1
+            return []
+
+    async def fetch_listing_page(self, session, page_url):
+        html = await self.fetch(session, page_url)
+        return await asyncio.to_thread(scraper.parse_listing_page, html)
+
+    # --- étape 2 : pages de listing -> aperçus, puis une tâche par article ---
+    # la page 1 donne le nb de pages, les suivantes sont récupérées en parallèle
+    # et leurs articles programmés dans l'ordre des pages
+    async def crawl_listing(self, session, listing_url):
+        try:
+            debug_print(f"Fetching listing page: {listing_url}...", level="fetch")
+            previews, last_page = await self.fetch_listing_page(session, listing_url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            debug_print(f"Request Error fetching listing page {listing_url}: {e}", level="error")
+            self.stats['fetch_errors'] += 1
+            return
+
+        if not previews:
+            debug_print(f"No article previews found on {listing_url}.", level="warning")
+            return
+
+        self.stats['categories'] += 1
+        if self.max_pages:
+            last_page = min(last_page, self.max_pages)
+
+        tasks = []
+        stop_paging = await self._schedule_previews(session, listing_url, previews, tasks)
+
+        if not stop_paging and last_page > 1:
+            page_urls = [scraper.listing_page_url(listing_url, page) for page in range(2, last_page + 1)]
+            page_tasks = [asyncio.create_task(self.fetch_listing_page(session, page_url)) for page_url in page_urls]
+            try:
+                for page_url, page_task in zip(page_urls, page_tasks):
+                    try:
+                        previews, _ = await page_task
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        debug_print(f"Request Error fetching listing page {page_url}: {e}", level="error")
+                        self.stats['fetch_errors'] += 1
+                        continue
+                    if await self._schedule_previews(session, page_url, previews, tasks):
+                        break
+            finally:
+                # arrêt anticipé -> les pages pas encore récupérées sont annulées
+                for page_task in page_tasks:
+                    page_task.cancel()
+                await asyncio.gather(*page_tasks, return_exceptions=True)
+
+        await asyncio.gather(*tasks)
+        debug_print(f"Listing done: {listing_url} ({len(tasks)} articles scheduled).", level="success")
+
+    # filtre (date, mode incrémental) et programme les articles d'une page
+    # -> True s'il est inutile de lire les pages suivantes
+    async def _schedule_previews(self, session, page_url, previews, tasks):
+        stop_paging = False
+        if self.date_cutoff:
+            previews, stop_paging = scraper.filter_previews_since(previews, self.date_cutoff)
+
+        if self.incremental:
+            urls = [data['url'] for data, _ in previews if data['url']]
+            known_urls = await asyncio.to_thread(db_connector.find_known_urls, self.collection, urls)
+            previews, skipped_known, stopped_early = scraper.filter_new_previews(previews, known_urls, self.stop_after_known)
+            self.stats['known'] += skipped_known
+            stop_paging = stop_paging or stopped_early
+            debug_print(f"Incremental: {page_url} -> {len(previews)} new, {skipped_known} already known{' (stopped early)' if stopped_early else ''}.", level="info")
+
+        previews = await asyncio.to_thread(scraper.filter_duplicate_previews, previews)
+
+        for data, title_preview in previews:
+            if not data['url']:
+                # pas d'URL -> on garde l'aperçu (même règle que scrape_articles_from_listing)
+                data['title'] = title_preview
+                if title_preview != "No Title Found":
+                    await self.article_queue.put(data)
+                continue
+            if data['url'] in self.seen_urls:
+                continue
+            self.seen_urls.add(data['url'])
+            tasks.append(asyncio.create_task(self.crawl_article(session, data, title_preview)))
+
+        return stop_paging
+
+    # --- étape 3 : page article -> détails, puis file d'écriture ---
+    async def crawl_article(self, session, data, title_preview):
+        try:
+            parse_pool = get_parse_pool()
+            if parse_pool is not None:
+                body, encoding = await self.fetch_raw(session, data['url'])
+                data = await asyncio.wrap_future(parse_pool.submit(body, encoding, data, title_preview))
+            else:
+                html = await self.fetch(session, data['url'])
+                await asyncio.to_thread(scraper.parse_article_details, html, data, title_preview)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            debug_print(f"  Request Error for {data['url']}: {e}", level="error")
+            self.stats['fetch_errors'] += 1
+            # Garder les infos de l'aperçu si l'article n'a pas pu être chargé
+            if not data['title']: data['title'] = title_preview
+        except Exception as e:
+            debug_print(f"  Parsing Error for {data['url']}: {e}", level="error")
+            if not data['title']: data['title'] = title_preview
+
+        self.stats['articles_scraped'] += 1
+        await self.article_queue.put(data)
+
+    # --- étape 4 : articles renvoyés au fil de l'eau ---
+    # listing_urls : pages de listing à crawler (par défaut : catégories trouvées sur la page d'accueil)
+    async def stream(self, listing_urls=None):
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        connector = aiohttp.TCPConnector(limit=self.global_limit, limit_per_host=self.per_host_limit)
+        async with aiohttp.ClientSession(headers=scraper.headers, timeout=timeout, connector=connector) as session:
+            producer_task = asyncio.create_task(self._produce(session, listing_urls))
+            try:
+                while True:
+                    article = await self.article_queue.get()
+                    if article is None: # fin du crawl
+                        break
+                    yield article
+                await producer_task # remonte une éventuelle erreur du crawl
+            finally:
+                # arrêt anticipé de l'appelant -> le crawl en cours est annulé
+                producer_task.cancel()
+                await asyncio.gather(producer_task, return_exceptions=True)
+
+    async def _produce(self, session, listing_urls):
+        try:
+            if not listing_urls:
+                listing_urls = await self.crawl_category_urls(session)
+                if not listing_urls:
+                    debug_print("No category URLs found or error fetching them. Scraping only the homepage.", level="warning")
+                    listing_urls = [self.base_url]
+
+            await asyncio.gather(*(self.crawl_listing(session, url) for url in listing_urls))
+        except Exception:
+            await self.article_queue.put(None) # fin du flux, l'erreur est remontée par stream()
+            raise
+        await self.article_queue.put(None)
+
+    # --- étape 5 : écritures MongoDB par lots ---
+    # compteurs de ce lot = écart des compteurs du writer (add_many peut déjà avoir écrit des lots complets)
+    def _write_batch(self, batch):
+        counts_before = dict(self.bulk_writer.counts)
+        self.bulk_writer.add_many(batch)
+        self.bulk_writer.flush()
+        return {key: self.bulk_writer.counts[key] - counts_before[key] for key in self.bulk_writer.counts}
+
+    async def _flush(self, batch):
+        # pymongo est bloquant -> thread
+        counts = await asyncio.to_thread(self._write_batch, batch)
+        for key, value in counts.items():
+            self.stats[key] += value
+        debug_print(f"Saved batch: {counts['inserted']} inserted, {counts['skipped']} skipped, {counts['errors']} errors.", level="info")
+
+    async def run(self):
+        self.bulk_writer = db_connector.BulkWriter(self.collection, batch_size=self.batch_size)
+        batch = []
+        try:
+            async for article in self.stream():
+                batch.append(article)
+                if len(batch) >= self.batch_size:
+                    await self._flush(batch)
+                    batch = []
+        finally:
+            if batch:
+                await self._flush(batch)
+
+        return self.stats
+
+
+# point d'entrée synchrone (utilisé par main.py --async)
+def run_async_crawl(base_url, collection, global_limit=GLOBAL_CONCURRENCY, per_host_limit=PER_HOST_CONCURRENCY,
+                    incremental=False, stop_after_known=None, max_pages=1, date_cutoff=None):
+    crawler = AsyncCrawler(base_url, collection, global_limit=global_limit, per_host_limit=per_host_limit,
+                           incremental=incremental, stop_after_known=stop_after_known,
+                           max_pages=max_pages, date_cutoff=date_cutoff)
+    start_time = time.time()
+    stats = asyncio.run(crawler.run())
+    stats['elapsed'] = time.time() - start_time
+    return stats
+
+
+# itérateur asynchrone des articles d'une page de listing (et des pages suivantes si max_pages > 1)
+# ex : async for article in aiter_articles_from_listing(url): ...
+# collection nécessaire seulement en mode incrémental
+async def aiter_articles_from_listing(listing_url, collection=None, global_limit=GLOBAL_CONCURRENCY, per_host_limit=PER_HOST_CONCURRENCY,
+                                      incremental=False, stop_after_known=None, max_pages=1, date_cutoff=None):
+    crawler = AsyncCrawler(listing_url, collection, global_limit=global_limit, per_host_limit=per_host_limit,
+                           incremental=incremental, stop_after_known=stop_after_known,
+                           max_pages=max_pages, date_cutoff=date_cutoff)
+    async for article in crawler.stream([listing_url]):
+        yield article
@@ -0,0 +1,72 @@
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+# accès aux modules du projet (lancé depuis TP_BeautifulSoup4/ ou benchmarks/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bodies
+from extraction import extract_body
+from html_parsing import make_soup, ARTICLE_STRAINER
+from utils.replay_server import DEFAULT_FIXTURES_DIR
+
+# benchmark du stockage des corps d'articles (main.py --bodies) : taille brute / compressée,
+# temps de compression et de décompression par article, pour chaque codec disponible
+
+CODECS = ['zlib', 'zstd']
+
+
+def load_bodies(fixtures_dir):
+    article_bodies = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            soup = make_soup(f.read(), ARTICLE_STRAINER)
+        body = extract_body(soup.select_one('div.entry-content'))
+        if body:
+            article_bodies.append(body)
+    return article_bodies
+
+
+def run(article_bodies, repeat):
+    results = []
+    for codec in CODECS:
+        if codec == 'zstd' and bodies.zstandard is None:
+            print("zstandard not installed, zstd skipped (pip install zstandard).")
+            continue
+        raw_bytes = stored_bytes = 0
+        compress_times, decompress_times = [], []
+        for body in article_bodies:
+            raw_bytes += len(body['text'].encode('utf-8')) + len(body['html'].encode('utf-8'))
+            for _ in range(repeat):
+                start = time.perf_counter()
+                blobs = [bodies.compress(body['text'], codec), bodies.compress(body['html'], codec)]
+                compress_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                for blob in blobs:
+                    bodies.decompress(blob, codec)
+                decompress_times.append(time.perf_counter() - start)
+            stored_bytes += sum(len(blob) for blob in blobs)
+        results.append({
+            'codec': codec, 'articles': len(article_bodies),
+            'raw_kib': raw_bytes / 1024, 'stored_kib': stored_bytes / 1024,
+            'ratio': raw_bytes / stored_bytes if stored_bytes else 0.0,
+            'compress_ms': statistics.median(compress_times) * 1000,
+            'decompress_ms': statistics.median(decompress_times) * 1000,
+        })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de la compression des corps d'articles (zlib / zstd).")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="dossier de pages HTML sauvegardées")
+    parser.add_argument("--repeat", type=int, default=50, help="nb de compressions / décompressions par article (médiane)")
+    args = parser.parse_args()
+
+    article_bodies = load_bodies(args.fixtures)
+    print(f"{'codec':<6} {'articles':>8} {'raw KiB':>8} {'stored KiB':>11} {'ratio':>6} {'compress ms':>12} {'decompress ms':>14}")
+    for row in run(article_bodies, args.repeat):
+        print(f"{row['codec']:<6} {row['articles']:>8} {row['raw_kib']:>8.1f} {row['stored_kib']:>11.1f} {row['ratio']:>6.2f} "
+              f"{row['compress_ms']:>12.3f} {row['decompress_ms']:>14.3f}")
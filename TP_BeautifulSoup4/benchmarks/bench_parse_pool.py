@@ -0,0 +1,72 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+# accès aux modules du projet (lancé depuis TP_BeautifulSoup4/ ou benchmarks/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import TP_BeautifulSoup4 as scraper
+from parse_pool import ParsePool, parse_article_job
+from utils.replay_server import DEFAULT_FIXTURES_DIR
+
+# débit du parsing des pages articles : dans le processus courant puis avec 1..N processus (ParsePool)
+# les pages articles des fixtures sont répétées pour simuler un gros rattrapage (backfill)
+
+
+def empty_article(url):
+    return {
+        'url': url, 'title': None, 'thumbnail': None, 'category': None,
+        'date_display': None, 'date_iso': None, 'summary': None,
+        'author': None, 'content_images': [], 'tags': []
+    }
+
+
+def load_jobs(fixtures_dir, pages):
+    bodies = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        name = os.path.basename(path)[:-5]
+        if name in ("index", "web", "social", "tech") or "__page__" in name:
+            continue # seulement les pages articles
+        with open(path, 'rb') as f:
+            bodies.append((name, f.read()))
+    return [(body, 'utf-8', empty_article(name), name) for name, body in (bodies[i % len(bodies)] for i in range(pages))]
+
+
+def bench_inline(jobs):
+    start = time.perf_counter()
+    for job in jobs:
+        parse_article_job(job)
+    return time.perf_counter() - start
+
+
+def bench_pool(jobs, workers):
+    pool = ParsePool(workers)
+    try:
+        pool.parse_many(jobs[:workers]) # démarrage des processus hors mesure
+        start = time.perf_counter()
+        pool.parse_many(jobs)
+        return time.perf_counter() - start
+    finally:
+        pool.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark du parsing des pages articles (processus courant vs pool de processus).")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="dossier de pages HTML sauvegardées")
+    parser.add_argument("--pages", type=int, default=2000, help="nb de pages articles à parser")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="nb max de processus testé")
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.fixtures, args.pages)
+    print(f"Parser: {scraper.make_soup('<p></p>').builder.NAME} | {len(jobs)} pages | {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+
+    baseline = bench_inline(jobs)
+    print(f"{'inline':>8} {baseline:>9.2f} {len(jobs) / baseline:>9.0f} {1.0:>8.2f}")
+    workers = 1
+    while workers <= args.max_workers:
+        elapsed = bench_pool(jobs, workers)
+        print(f"{workers:>8} {elapsed:>9.2f} {len(jobs) / elapsed:>9.0f} {baseline / elapsed:>8.2f}")
+        workers = workers * 2 if workers * 2 <= args.max_workers or workers == args.max_workers else args.max_workers
@@ -0,0 +1,90 @@
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+# accès aux modules du projet (lancé depuis TP_BeautifulSoup4/ ou benchmarks/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parsing import make_soup, HOME_STRAINER, LISTING_STRAINER, ARTICLE_STRAINER
+from utils.replay_server import DEFAULT_FIXTURES_DIR
+
+# benchmark du parsing HTML : temps et pic mémoire par page,
+# pour chaque parser (lxml, html.parser) avec l'arbre complet ou seulement les zones utiles (SoupStrainer)
+
+PARSERS = ['html.parser', 'lxml']
+
+
+# type de page d'une fixture -> strainer utilisé par le scraper
+def strainer_for_fixture(file_name):
+    if file_name == "index.html":
+        return "home", HOME_STRAINER
+    if file_name in ("web.html", "social.html", "tech.html") or "__page__" in file_name:
+        return "listing", LISTING_STRAINER
+    return "article", ARTICLE_STRAINER
+
+
+def available_parsers():
+    parsers = []
+    for parser in PARSERS:
+        try:
+            make_soup("<p></p>", parser=parser)
+            parsers.append(parser)
+        except Exception:
+            print(f"Parser '{parser}' not available, skipped.")
+    return parsers
+
+
+def measure(html, strainer, parser, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_soup(html, strainer, parser)
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    soup = make_soup(html, strainer, parser)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del soup
+    return statistics.median(durations), peak
+
+
+def run(fixtures_dir, repeat):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        page_type, strainer = strainer_for_fixture(os.path.basename(path))
+        pages.setdefault(page_type, []).append((html, strainer))
+
+    results = []
+    for parser in available_parsers():
+        for page_type, page_list in pages.items():
+            for mode in ("full", "strained"):
+                durations, peaks = [], []
+                for html, strainer in page_list:
+                    duration, peak = measure(html, strainer if mode == "strained" else None, parser, repeat)
+                    durations.append(duration)
+                    peaks.append(peak)
+                results.append({
+                    'parser': parser, 'page_type': page_type, 'mode': mode, 'pages': len(page_list),
+                    'ms_per_page': statistics.mean(durations) * 1000,
+                    'peak_kib_per_page': statistics.mean(peaks) / 1024,
+                })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark du parsing HTML (parser x parsing complet/partiel).")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="dossier de pages HTML sauvegardées")
+    parser.add_argument("--repeat", type=int, default=20, help="nb de parsings par page (médiane)")
+    args = parser.parse_args()
+
+    print(f"{'parser':<12} {'page':<8} {'mode':<9} {'pages':>5} {'ms/page':>9} {'peak KiB/page':>14}")
+    for row in run(args.fixtures, args.repeat):
+        print(f"{row['parser']:<12} {row['page_type']:<8} {row['mode']:<9} {row['pages']:>5} "
+              f"{row['ms_per_page']:>9.2f} {row['peak_kib_per_page']:>14.1f}")
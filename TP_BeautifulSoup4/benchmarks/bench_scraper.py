@@ -0,0 +1,196 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import time
+
+try:
+    import resource # pas disponible sous Windows
+except ImportError:
+    resource = None
+
+# accès aux modules du projet (lancé depuis TP_BeautifulSoup4/ ou benchmarks/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import TP_BeautifulSoup4 as scraper
+import http_client
+import mongo_connect as db_connector
+from utils.replay_server import start_replay_server, DEFAULT_FIXTURES_DIR
+
+# suite de benchmarks hors ligne : les fixtures HTML sont servies par le serveur de rejeu local,
+# chaque scénario mesure pages/s, latence p50/p99 par appel et pic de mémoire (RSS) du process,
+# puis est comparé à une référence (baseline.json) -> code de sortie 1 en cas de régression
+# seuls le débit, le p50 et la mémoire sont comparés : avec quelques dizaines d'appels le p99 est le max (bruit)
+
+#CONFIG
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOLERANCE = 0.25 # écart toléré par rapport à la référence (25 %)
+MIN_LATENCY_DELTA_MS = 2.0 # écart de p50 ignoré en dessous (bruit de mesure sur quelques ms)
+DEFAULT_ROUNDS = 5
+MONGO_BENCH_COLLECTION = "bench_articles"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+# pic de mémoire du process (Mo)
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024 # octets sous macOS, Ko sous Linux
+
+
+# exécute fn(*args) pour chaque args de calls (sorties console masquées)
+# pages : requêtes reçues par le serveur de rejeu, ou (sans serveur) somme des nb renvoyés par fn
+def measure(name, fn, calls, server=None):
+    latencies = []
+    pages = 0
+    start_requests = server.requests if server else 0
+    start = time.perf_counter()
+    for args in calls:
+        call_start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            processed = fn(*args)
+        latencies.append(time.perf_counter() - call_start)
+        if server is None:
+            pages += processed
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        pages = server.requests - start_requests
+    return {
+        'name': name,
+        'calls': len(latencies),
+        'pages': pages,
+        'pages_per_sec': pages / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+# collection pour le chemin d'écriture Mongo : mongomock (en mémoire) ou vraie base
+def bench_collection(backend):
+    if backend == 'mongomock':
+        try:
+            import mongomock
+        except ImportError:
+            print("mongomock not installed, Mongo write benchmark skipped (pip install mongomock or --mongo real).")
+            return None
+        return mongomock.MongoClient().db[MONGO_BENCH_COLLECTION]
+    if not db_connector.check_health():
+        print("MongoDB not reachable, Mongo write benchmark skipped.")
+        return None
+    collection = db_connector.get_client()[db_connector.DATABASE_NAME][MONGO_BENCH_COLLECTION]
+    collection.drop()
+    return collection
+
+# articles synthétiques (copies des articles des fixtures avec des URLs uniques)
+def synthetic_articles(templates, count):
+    articles = []
+    for i in range(count):
+        article = {key: value for key, value in templates[i % len(templates)].items() if key != '_id'}
+        article['url'] = f"{article['url']}?bench={i}"
+        articles.append(article)
+    return articles
+
+def write_articles(collection, articles, batch_size):
+    writer = db_connector.BulkWriter(collection, batch_size=batch_size)
+    writer.add_many([dict(article) for article in articles])
+    writer.close()
+    return len(articles)
+
+
+def run(rounds, mongo_backend, mongo_docs, batch_size):
+    http_client.configure_fetcher(use_cache=False, rate_limit=False) # on mesure le scraper, pas le cache ni la politesse
+    server, base_url = start_replay_server(DEFAULT_FIXTURES_DIR)
+    results = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            category_urls = scraper.scrape_category_urls(base_url)
+            article_urls = sorted({article['url'] for url in category_urls
+                                   for article in scraper.scrape_articles_from_listing(url, max_pages=0)})
+
+        results.append(measure("scrape_category_urls", scraper.scrape_category_urls,
+                               [(base_url,)] * rounds * 10, server))
+        results.append(measure("scrape_articles_from_listing", lambda url: scraper.scrape_articles_from_listing(url, max_pages=0),
+                               [(url,) for url in category_urls] * rounds, server))
+        results.append(measure("scrape_article_full_details", scraper.scrape_article_full_details,
+                               [(url, scraper.headers) for url in article_urls] * rounds, server))
+
+        collection = bench_collection(mongo_backend) if mongo_backend else None # --mongo none
+        if collection is not None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                templates = [scraper.scrape_article_full_details(url, scraper.headers) for url in article_urls]
+            articles = synthetic_articles(templates, mongo_docs)
+            chunks = [articles[i:i + batch_size * 5] for i in range(0, len(articles), batch_size * 5)]
+            # 1er passage : insertions, 2e passage : mêmes URLs (upserts sans effet)
+            results.append(measure("mongo_bulk_insert", lambda chunk: write_articles(collection, chunk, batch_size),
+                                   [(chunk,) for chunk in chunks]))
+            results.append(measure("mongo_bulk_upsert_existing", lambda chunk: write_articles(collection, chunk, batch_size),
+                                   [(chunk,) for chunk in chunks]))
+            if mongo_backend == 'real':
+                collection.drop()
+    finally:
+        server.shutdown()
+    return results
+
+
+# régressions par rapport à la référence : débit plus bas, latence p50 ou mémoire plus hautes que la tolérance
+def compare(results, baseline, tolerance):
+    regressions = []
+    for result in results:
+        reference = baseline.get(result['name'])
+        if not reference:
+            continue
+        if result['pages_per_sec'] < reference['pages_per_sec'] * (1 - tolerance):
+            regressions.append(f"{result['name']}: {result['pages_per_sec']:.0f} pages/s < baseline {reference['pages_per_sec']:.0f}")
+        if result['p50_ms'] > reference['p50_ms'] * (1 + tolerance) and result['p50_ms'] - reference['p50_ms'] > MIN_LATENCY_DELTA_MS:
+            regressions.append(f"{result['name']}: p50 {result['p50_ms']:.1f} ms > baseline {reference['p50_ms']:.1f}")
+        if result['peak_rss_mb'] and reference.get('peak_rss_mb') and result['peak_rss_mb'] > reference['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{result['name']}: peak RSS {result['peak_rss_mb']:.0f} MB > baseline {reference['peak_rss_mb']:.0f}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne du scraper (fixtures + serveur de rejeu local).")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="nb de passages sur les fixtures")
+    parser.add_argument("--mongo", choices=["mongomock", "real", "none"], default="mongomock",
+                        help="base pour le benchmark d'écriture (mongomock en mémoire, vraie base MONGO_URI, ou aucun)")
+    parser.add_argument("--mongo-docs", type=int, default=2000, help="nb d'articles écrits par passage")
+    parser.add_argument("--batch-size", type=int, default=db_connector.BULK_BATCH_SIZE)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="fichier de référence (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="enregistrer les résultats comme nouvelle référence")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="écart toléré (0.25 = 25 %%)")
+    args = parser.parse_args()
+
+    results = run(args.rounds, None if args.mongo == "none" else args.mongo, args.mongo_docs, args.batch_size)
+
+    print(f"{'benchmark':<30} {'calls':>6} {'pages':>7} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak RSS MB':>12}")
+    for result in results:
+        rss = f"{result['peak_rss_mb']:.0f}" if result['peak_rss_mb'] is not None else "n/a"
+        print(f"{result['name']:<30} {result['calls']:>6} {result['pages']:>7} {result['pages_per_sec']:>9.0f} "
+              f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {rss:>12}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({result['name']: result for result in results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}.")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} (run with --save-baseline).")
+        sys.exit(0)
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print(f"No regression against {args.baseline} (tolerance {args.tolerance:.0%}).")
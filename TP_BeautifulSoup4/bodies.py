@@ -0,0 +1,165 @@
+import argparse
+import os
+import threading
+import time
+import zlib
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+# custom
+import extraction
+from metrics import get_metrics
+
+# zstandard optionnel : sans lui les corps sont compressés avec zlib (un peu plus gros et plus lents à relire)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# corps des articles (optionnel, main.py --bodies) : texte nettoyé + HTML minimal (extraction.extract_body),
+# compressés et rangés dans une collection séparée pour garder légers les documents des articles
+# (listes de l'explorateur, filtres) ; le corps n'est lu qu'à la demande
+# document : {_id: url, codec, text, html (binaires compressés), raw_bytes, stored_bytes, body_hash, updated_at}
+
+#CONFIG (surcharge possible par variables d'environnement)
+BODIES_COLLECTION_NAME = os.environ.get("MONGO_BODIES_COLLECTION", "bodies")
+CODEC = os.environ.get("BODY_CODEC", "zstd" if zstandard else "zlib") # 'zstd' ou 'zlib'
+if CODEC == 'zstd' and zstandard is None:
+    CODEC = 'zlib'
+ZSTD_LEVEL = 9
+ZLIB_LEVEL = 6
+STATS_SAMPLE_SIZE = 200 # corps relus pour mesurer la latence de décompression
+
+# compresseurs zstd : un par thread (un ZstdCompressor ne s'utilise pas depuis 2 threads à la fois)
+_local = threading.local()
+
+
+def compress(value, codec=CODEC):
+    data = value.encode('utf-8')
+    if codec == 'zstd':
+        if not hasattr(_local, 'compressor'):
+            _local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        return _local.compressor.compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+def decompress(blob, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard not installed, cannot read zstd bodies (pip install zstandard)")
+        if not hasattr(_local, 'decompressor'):
+            _local.decompressor = zstandard.ZstdDecompressor()
+        return _local.decompressor.decompress(blob).decode('utf-8')
+    return zlib.decompress(blob).decode('utf-8')
+
+
+# active l'extraction du corps dans ce process et dans les processus du pool de parsing lancés ensuite
+def configure_bodies(enabled=True):
+    extraction.EXTRACT_BODY = enabled
+    os.environ["CRAWL_BODIES"] = "1" if enabled else "0"
+
+def get_bodies_collection(articles_collection):
+    return articles_collection.database[BODIES_COLLECTION_NAME]
+
+
+# {'text', 'html'} -> document compressé
+def body_document(body, body_hash=None, codec=CODEC):
+    with get_metrics().timer('body_compress'):
+        text = compress(body['text'], codec)
+        html = compress(body['html'], codec)
+    return {
+        'codec': codec, 'text': text, 'html': html,
+        'raw_bytes': len(body['text'].encode('utf-8')) + len(body['html'].encode('utf-8')),
+        'stored_bytes': len(text) + len(html),
+        'body_hash': body_hash, 'updated_at': time.time(),
+    }
+
+# items : [(url, body, body_hash)] -> nb de corps écrits
+# replace=False : seulement les corps absents (comme les articles), True : remplacés (corps modifié, refresh.py)
+def write_bodies(collection, items, replace=False):
+    operations = []
+    raw_bytes = stored_bytes = 0
+    for url, body, body_hash in items:
+        doc = body_document(body, body_hash)
+        raw_bytes += doc['raw_bytes']
+        stored_bytes += doc['stored_bytes']
+        operations.append(UpdateOne({'_id': url}, {'$set' if replace else '$setOnInsert': doc}, upsert=True))
+    if not operations:
+        return 0
+
+    metrics = get_metrics()
+    try:
+        with metrics.timer('body_write'):
+            result = collection.bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e: # 11000 : corps inséré entre-temps par un autre process
+        details = e.details
+        errors = [error for error in details.get('writeErrors', []) if error.get('code') != 11000]
+        for error in errors:
+            print(f"  Error writing body (op #{error.get('index')}): {error.get('errmsg')}")
+    except PyMongoError as e:
+        print(f"  Error writing batch of {len(operations)} bodies: {e}")
+        return 0
+    written = details.get('nUpserted', 0) + details.get('nModified', 0)
+    if written:
+        metrics.inc('bodies_written_total', written)
+        metrics.inc('bodies_raw_bytes_total', raw_bytes)
+        metrics.inc('bodies_stored_bytes_total', stored_bytes)
+    return written
+
+# corps d'un article -> {'text', 'html' (si html=True), 'body_hash', 'updated_at'} ou None s'il n'est pas enregistré
+def load_body(collection, url, html=False):
+    projection = {'codec': 1, 'text': 1, 'body_hash': 1, 'updated_at': 1}
+    if html:
+        projection['html'] = 1
+    doc = collection.find_one({'_id': url}, projection)
+    if doc is None:
+        return None
+    with get_metrics().timer('body_decompress'):
+        body = {'text': decompress(doc['text'], doc['codec']), 'body_hash': doc.get('body_hash'), 'updated_at': doc.get('updated_at')}
+        if html:
+            body['html'] = decompress(doc['html'], doc['codec'])
+    return body
+
+
+# place occupée par les corps et latence de décompression (mesurée sur sample_size corps)
+def body_stats(collection, sample_size=STATS_SAMPLE_SIZE):
+    totals = list(collection.aggregate([{'$group': {
+        '_id': '$codec', 'count': {'$sum': 1}, 'raw_bytes': {'$sum': '$raw_bytes'}, 'stored_bytes': {'$sum': '$stored_bytes'},
+    }}]))
+    stats = {
+        'count': sum(row['count'] for row in totals),
+        'raw_bytes': sum(row['raw_bytes'] for row in totals),
+        'stored_bytes': sum(row['stored_bytes'] for row in totals),
+        'codecs': {row['_id']: row['count'] for row in totals},
+    }
+    stats['ratio'] = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0.0
+
+    durations = []
+    for doc in collection.find({}, {'codec': 1, 'text': 1, 'html': 1}).limit(sample_size):
+        start = time.perf_counter()
+        decompress(doc['text'], doc['codec'])
+        decompress(doc['html'], doc['codec'])
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    stats['decompress_p50_ms'] = durations[len(durations) // 2] * 1000 if durations else 0.0
+    stats['decompress_p99_ms'] = durations[min(len(durations) - 1, int(0.99 * len(durations)))] * 1000 if durations else 0.0
+    return stats
+
+
+if __name__ == "__main__":
+    import mongo_connect as db_connector
+
+    parser = argparse.ArgumentParser(description="Place occupée par les corps d'articles et latence de décompression.")
+    parser.add_argument("--sample", type=int, default=STATS_SAMPLE_SIZE, help="nb de corps relus pour la latence")
+    args = parser.parse_args()
+
+    articles_collection = db_connector.connect_to_mongo()
+    if articles_collection is None:
+        print("Failed to connect to MongoDB. Exiting.")
+    else:
+        stats = body_stats(get_bodies_collection(articles_collection), args.sample)
+        print(f"Bodies: {stats['count']} ({', '.join(f'{codec}: {count}' for codec, count in stats['codecs'].items()) or 'none'})")
+        print(f"Raw: {stats['raw_bytes'] / 1024:.0f} KiB | Stored: {stats['stored_bytes'] / 1024:.0f} KiB | Ratio: {stats['ratio']:.2f}x"
+              f" | Avg stored per article: {stats['stored_bytes'] / max(1, stats['count']):.0f} bytes")
+        print(f"Decompression (text + html): p50 {stats['decompress_p50_ms']:.3f} ms, p99 {stats['decompress_p99_ms']:.3f} ms")
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import time
+
+# custom
+import mongo_indexes
+
+# détection des modifications d'un article déjà en base :
+#   content_hash  empreinte des champs extraits normalisés (titre, résumé, auteur, date, tags, images...)
+#   body_hash     empreinte du HTML de div.entry-content (extraction.body_hash)
+#   last_seen     dernière récupération de la page (timestamp)
+#   last_changed  dernière modification détectée (insertion comprise)
+# le mode refresh (refresh.py) compare les empreintes et n'écrit que les champs modifiés
+
+# champs pris en compte dans content_hash (date_display se déduit de date_iso, les champs de assets.py
+# sont ajoutés après coup et ne font pas partie du contenu publié)
+HASHED_FIELDS = ('title', 'summary', 'author', 'date_iso', 'thumbnail', 'category', 'tags', 'content_images')
+# champs réécrits quand ils changent
+UPDATABLE_FIELDS = HASHED_FIELDS + ('date_display',)
+# champs de assets.py devenus faux quand la miniature ou les images du contenu changent
+ASSET_FIELDS = ('thumbnail_local', 'thumbnail_sha256', 'assets_at', 'assets_missing')
+
+
+# espaces multiples / en bord ignorés, images du contenu réduites à (url, légende)
+def normalize_value(field, value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if field == 'content_images':
+        return [[normalize_value(None, image.get('url')), normalize_value(None, image.get('caption_or_alt'))]
+                for image in value or []]
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(field, item) for item in value]
+    return value
+
+def content_hash(article):
+    normalized = {field: normalize_value(field, article.get(field)) for field in HASHED_FIELDS}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+# champs dont la valeur normalisée diffère entre l'article en base et la version récupérée
+def changed_fields(stored, fresh):
+    return [field for field in UPDATABLE_FIELDS
+            if normalize_value(field, stored.get(field)) != normalize_value(field, fresh.get(field))]
+
+def is_unchanged(stored, fresh):
+    return (stored.get('content_hash') is not None and stored.get('content_hash') == fresh.get('content_hash')
+            and stored.get('body_hash') == fresh.get('body_hash'))
+
+
+# nouvel article : empreinte + dates (last_seen = last_changed = date d'insertion)
+def stamp_new_article(article, now=None):
+    now = now or time.time()
+    article['content_hash'] = content_hash(article)
+    article['last_seen'] = now
+    article['last_changed'] = now
+    return article
+
+# article en base + version récupérée (avec content_hash) -> (champs modifiés, update MongoDB)
+# update None si rien n'a changé ; un article enregistré avant les empreintes reçoit les siennes
+def build_update(stored, fresh, now=None):
+    now = now or time.time()
+    if is_unchanged(stored, fresh):
+        return [], None
+    changes = changed_fields(stored, fresh)
+    # sans body_hash en base (article enregistré avant les empreintes), le corps n'est pas comparable
+    body_changed = stored.get('body_hash') is not None and stored['body_hash'] != fresh.get('body_hash')
+    update = {'$set': {'content_hash': fresh['content_hash'], 'body_hash': fresh.get('body_hash'), 'last_seen': now}}
+    if changes or body_changed:
+        update['$set']['last_changed'] = now
+    for field in changes:
+        update['$set'][field] = fresh.get(field)
+    if 'author' in changes or 'tags' in changes:
+        normalized = mongo_indexes.normalize_article({'author': fresh.get('author'), 'tags': fresh.get('tags')})
+        update['$set'].update(author_lc=normalized['author_lc'], tags_lc=normalized['tags_lc'])
+    if 'thumbnail' in changes or 'content_images' in changes:
+        assets = {field: fresh[field] for field in ASSET_FIELDS if field in fresh}
+        update['$set'].update(assets)
+        unset = {field: "" for field in ASSET_FIELDS if field not in assets}
+        if unset:
+            update['$unset'] = unset # images à retélécharger (python assets.py)
+    return changes, update
@@ -0,0 +1,273 @@
+import argparse
+import hashlib
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+# custom
+from metrics import get_metrics
+from search_index import query_terms # mêmes mots que l'index de recherche (minuscules, sans accents)
+from utils.debug_color import debug_print
+
+# doublons d'articles :
+# - URLs canoniques : paramètres de suivi (utm_*, fbclid...), fragment, port par défaut, majuscules du host et
+#   slash final ignorés -> un même article n'a qu'une URL (index unique sur url)
+# - quasi-doublons (même article publié sous plusieurs URLs / catégories, légèrement retouché) : empreinte SimHash
+#   64 bits du titre + résumé (simhash), 2 articles sont des quasi-doublons si leurs empreintes diffèrent d'au plus
+#   HAMMING_THRESHOLD bits ; si les 2 ont un corps enregistré (main.py --bodies), l'empreinte du corps (body_simhash)
+#   doit aussi être proche (les corps seuls ne suffisent pas : paragraphes types communs à beaucoup d'articles)
+# recherche sous-linéaire : l'empreinte est découpée en SIMHASH_BANDS bandes de 10-11 bits (simhash_bands, index multiclé) ;
+# 2 empreintes à <= 5 bits d'écart ont forcément une bande identique (6 bandes) -> seuls ces articles sont comparés
+# (~0.3 % de la collection par article)
+# vérifié sur les aperçus des listings (avant la récup de la page article) puis à l'écriture (BulkWriter)
+
+#CONFIG (surcharge possible par variables d'environnement)
+DUPLICATE_POLICY = os.environ.get("CRAWL_DUPLICATES", "skip") # skip (ignoré), flag (enregistré avec duplicate_of), keep
+HAMMING_THRESHOLD = 5 # un mot modifié dans titre + résumé : ~5 bits, articles distincts : > 15 bits
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 6 # > HAMMING_THRESHOLD
+MIN_TOKENS = 4 # texte trop court -> pas d'empreinte (trop de faux positifs)
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'ref', 'ref_src', '_ga', 'amp'}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'at_')
+BACKFILL_BATCH_SIZE = 500
+
+# politiques
+SKIP = 'skip'
+FLAG = 'flag'
+KEEP = 'keep'
+
+
+# --- URLs ---
+
+def canonicalize_url(url):
+    if not url:
+        return url
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == 'http' and parts.port == 80 or scheme == 'https' and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if path.endswith("/amp/"): # version AMP de WordPress
+        path = path[:-len("amp/")]
+    last_segment = path.rsplit("/", 1)[-1]
+    if last_segment and "." not in last_segment: # /article -> /article/ (forme des permaliens WordPress)
+        path += "/"
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+# --- SimHash ---
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+# texte -> empreinte 64 bits (mots + paires de mots, mots de moins de 3 lettres ignorés), None si trop court
+def simhash(text):
+    tokens = [token for token in query_terms(text) if len(token) > 2]
+    if len(tokens) < MIN_TOKENS:
+        return None
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = _feature_hash(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+# MongoDB stocke des entiers signés 64 bits
+def to_signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def from_signed(value):
+    return value + (1 << 64) if value < 0 else value
+
+def bands(value):
+    edges = [SIMHASH_BITS * i // SIMHASH_BANDS for i in range(SIMHASH_BANDS + 1)]
+    return [f"{i}:{value >> edges[i] & ((1 << (edges[i + 1] - edges[i])) - 1):03x}" for i in range(SIMHASH_BANDS)]
+
+def signature_text(article):
+    return " ".join(part for part in (article.get('title'), article.get('summary')) if part)
+
+# ajoute simhash / simhash_bands (et body_simhash si body_text) à un document
+def stamp_signatures(doc, body_text=None):
+    value = simhash(signature_text(doc))
+    if value is not None:
+        doc['simhash'] = to_signed(value)
+        doc['simhash_bands'] = bands(value)
+    body_value = simhash(body_text) if body_text else None
+    if body_value is not None:
+        doc['body_simhash'] = to_signed(body_value)
+    return doc
+
+# (empreinte, empreinte du corps ou None) d'un document déjà signé
+def _signature(doc):
+    if doc.get('simhash') is None:
+        return None
+    body_value = doc.get('body_simhash')
+    return from_signed(doc['simhash']), from_signed(body_value) if body_value is not None else None
+
+# distance entre 2 signatures, None si ce ne sont pas des quasi-doublons
+def _distance(signature, other, threshold):
+    distance = hamming(signature[0], other[0])
+    if distance > threshold:
+        return None
+    if signature[1] is not None and other[1] is not None and hamming(signature[1], other[1]) > threshold:
+        return None # titres proches mais corps différents
+    return distance
+
+
+# --- détection ---
+
+# quasi-doublons d'un run : articles en base (requête sur les bandes) + articles déjà vus pendant le run (mémoire)
+class DuplicateDetector:
+    def __init__(self, collection, policy=DUPLICATE_POLICY, threshold=HAMMING_THRESHOLD):
+        self.collection = collection
+        self.policy = policy
+        self.threshold = threshold
+        self.stats = {'previews': 0, 'articles': 0}
+        self._seen = {} # {bande: [(signature, url)]}
+        self._lock = threading.Lock()
+
+    def remember(self, url, signature):
+        with self._lock:
+            for band in bands(signature[0]):
+                self._seen.setdefault(band, []).append((signature, url))
+
+    # articles en base et articles du run partageant une bande avec une des signatures -> [(signature, url)]
+    def _candidates(self, signatures):
+        wanted = sorted({band for signature in signatures for band in bands(signature[0])})
+        candidates = []
+        try:
+            for doc in self.collection.find({'simhash_bands': {'$in': wanted}}, {'url': 1, 'simhash': 1, 'body_simhash': 1, '_id': 0}):
+                candidates.append((_signature(doc), doc.get('url')))
+        except PyMongoError as e:
+            print(f"Error looking up near-duplicates: {e}")
+        with self._lock:
+            for band in wanted:
+                candidates.extend(self._seen.get(band, []))
+        return candidates
+
+    # items : [(url, signature, cible)] -> id des cibles à retirer (skip) ; les autres quasi-doublons sont marqués (flag)
+    # un article n'est jamais son propre doublon ; seuls les originaux sont mémorisés (comparés aussi au reste du lot)
+    def _filter(self, items, stage):
+        if not items:
+            return set()
+        candidates = self._candidates([signature for _, signature, _ in items])
+        duplicates = set()
+        for url, signature, data in items:
+            best = None
+            for other, other_url in candidates:
+                distance = _distance(signature, other, self.threshold) if other_url != url else None
+                if distance is not None and (best is None or distance < best[1]):
+                    best = (other_url, distance)
+            if best is None:
+                candidates.append((signature, url))
+                self.remember(url, signature)
+                continue
+            original, distance = best
+            self.stats[stage] += 1
+            get_metrics().inc('duplicates_total', stage=stage, policy=self.policy)
+            debug_print(f"  Near-duplicate of {original} (distance {distance}): {url}", level="info")
+            if self.policy == SKIP:
+                duplicates.add(id(data))
+            else:
+                data.update(duplicate_of=original, duplicate_distance=distance)
+        return duplicates
+
+    # aperçus d'une page de listing -> aperçus à récupérer
+    # l'extrait du listing est le résumé de l'article (WordPress) : même empreinte que l'article en base
+    def filter_previews(self, previews):
+        items = []
+        for data, title_preview in previews:
+            value = simhash(signature_text(dict(data, title=data.get('title') or title_preview)))
+            if data.get('url') and value is not None:
+                items.append((data['url'], (value, None), data))
+        duplicates = self._filter(items, 'previews')
+        return [(data, title_preview) for data, title_preview in previews if id(data) not in duplicates]
+
+    # documents prêts à écrire (stamp_signatures déjà appliqué) -> documents à écrire
+    # (l'empreinte du corps n'est connue qu'ici ; un aperçu déjà marqué n'est pas revérifié)
+    def filter_documents(self, docs):
+        items = [(doc['url'], _signature(doc), doc) for doc in docs
+                 if doc.get('url') and not doc.get('duplicate_of') and _signature(doc) is not None]
+        duplicates = self._filter(items, 'articles')
+        return [doc for doc in docs if id(doc) not in duplicates]
+
+
+# nouveau détecteur (ex : un enregistrement depuis l'interface) -> None si la vérification est désactivée (keep)
+def make_duplicate_detector(collection, policy=DUPLICATE_POLICY):
+    return DuplicateDetector(collection, policy) if collection is not None and policy != KEEP else None
+
+# détecteur partagé (configuré par main.py, None sinon : seules les URLs sont canonicalisées)
+_detector = None
+
+def configure_duplicate_detector(collection=None, policy=DUPLICATE_POLICY):
+    global _detector
+    _detector = make_duplicate_detector(collection, policy)
+    return _detector
+
+def get_duplicate_detector():
+    return _detector
+
+
+# empreintes des articles enregistrés avant la détection des doublons -> nb d'articles mis à jour
+def backfill_signatures(collection, batch_size=BACKFILL_BATCH_SIZE):
+    import bodies # corps enregistrés (main.py --bodies) -> body_simhash
+
+    bodies_collection = bodies.get_bodies_collection(collection)
+    updated = 0
+    operations = []
+    for doc in collection.find({'simhash': {'$exists': False}}, {'url': 1, 'title': 1, 'summary': 1}):
+        body = bodies.load_body(bodies_collection, doc['url']) if doc.get('url') else None
+        signed = stamp_signatures({'title': doc.get('title'), 'summary': doc.get('summary')}, body['text'] if body else None)
+        fields = {key: value for key, value in signed.items() if key not in ('title', 'summary')}
+        fields.setdefault('simhash', None) # texte trop court : marqué comme traité
+        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': fields}))
+        if len(operations) >= batch_size:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+# quasi-doublons parmi les articles en base -> [(url, url de l'article proche, distance)]
+def find_duplicate_pairs(collection, threshold=HAMMING_THRESHOLD):
+    by_band = {}
+    for doc in collection.find({'simhash': {'$ne': None}}, {'url': 1, 'simhash': 1, 'body_simhash': 1, '_id': 0}):
+        signature = _signature(doc)
+        for band in bands(signature[0]):
+            by_band.setdefault(band, []).append((signature, doc.get('url')))
+    pairs = {}
+    for entries in by_band.values():
+        for i, (signature, url) in enumerate(entries):
+            for other, other_url in entries[i + 1:]:
+                distance = _distance(signature, other, threshold)
+                if distance is not None:
+                    pairs[tuple(sorted((url, other_url)))] = distance
+    return [(url, other_url, distance) for (url, other_url), distance in sorted(pairs.items())]
+
+
+if __name__ == "__main__":
+    import mongo_connect as db_connector
+
+    parser = argparse.ArgumentParser(description="Empreintes SimHash des articles déjà en base et liste des quasi-doublons.")
+    parser.add_argument("--threshold", type=int, default=HAMMING_THRESHOLD, help="écart max en bits (sur 64, <= 5 pour l'index à 6 bandes)")
+    args = parser.parse_args()
+
+    articles_collection = db_connector.connect_to_mongo()
+    if articles_collection is None:
+        print("Failed to connect to MongoDB. Exiting.")
+    else:
+        print(f"Signatures added: {backfill_signatures(articles_collection)}")
+        duplicate_pairs = find_duplicate_pairs(articles_collection, args.threshold)
+        print(f"Near-duplicate pairs: {len(duplicate_pairs)}")
+        for url, other_url, distance in duplicate_pairs:
+            print(f"  [{distance} bits] {url}\n      ~ {other_url}")
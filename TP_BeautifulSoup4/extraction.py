@@ -0,0 +1,190 @@
+import hashlib
+import os
+from datetime import datetime
+from html import escape
+
+import soupsieve as sv # moteur CSS de BeautifulSoup (installé avec beautifulsoup4)
+from bs4.element import NavigableString, PreformattedString
+
+# custom
+from metrics import get_metrics
+
+# moteur d'extraction déclaratif : un spec = {champ: (sélecteur CSS, extracteur, plusieurs résultats ou non)}
+# les sélecteurs sont compilés une seule fois au chargement du module, puis appliqués à chaque page parsée
+
+
+# --- extracteurs (élément -> valeur) ---
+def text(tag):
+    return tag.get_text(strip=True)
+
+def href(tag):
+    return tag.get('href')
+
+def image_url(tag):
+    return tag.get('data-lazy-src') or tag.get('src')
+
+def element(tag):
+    return tag
+
+# "2025-03-14 09:12:00" -> "2025-03-14" (None si invalide)
+def parse_date_iso(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace(' ', 'T').split('T')[0]).strftime('%Y-%m-%d')
+    except (ValueError, IndexError):
+        return None
+
+
+# aperçu d'un article dans une page de listing (appliqué à chaque <article>)
+PREVIEW_SPEC = {
+    'url': ('header.entry-header a', href, False),
+    'title': ('header.entry-header h3.entry-title', text, False),
+    'thumbnail': ('div.post-thumbnail img', image_url, False),
+    'category': ('div.entry-meta span.favtag', text, False),
+    'date': ('div.entry-meta time.published', element, False),
+    'summary': ('div.entry-excerpt', text, False),
+}
+
+# page article (titre, résumé, auteur, date, miniature, images du contenu, tags)
+ARTICLE_SPEC = {
+    'title': ('header.article-header h1.entry-title', text, False),
+    'summary': ('header.article-header div.article-hat p', text, False),
+    'author': ('header.article-header div.entry-meta div.meta-info span.byline a', text, False),
+    'date': ('header.article-header div.entry-meta div.meta-info span.posted-on time.published', element, False),
+    'thumbnail': ('header.article-header figure.article-hat-img img', image_url, False),
+    'content': ('div.entry-content', element, False),
+    'tags': ('div.article-terms ul.tags-list a.post-tags', text, True),
+}
+
+
+# spec -> {champ: (sélecteur compilé, extracteur, plusieurs)}
+def compile_spec(spec):
+    return {field: (sv.compile(selector), extractor, many) for field, (selector, extractor, many) in spec.items()}
+
+COMPILED_PREVIEW_SPEC = compile_spec(PREVIEW_SPEC)
+COMPILED_ARTICLE_SPEC = compile_spec(ARTICLE_SPEC)
+
+
+# applique un spec compilé à un élément -> {champ: valeur} (None / [] si absent)
+def extract(root, compiled_spec):
+    values = {}
+    for field, (selector, extractor, many) in compiled_spec.items():
+        if many:
+            values[field] = [extractor(tag) for tag in selector.select(root)]
+        else:
+            tag = selector.select_one(root)
+            values[field] = extractor(tag) if tag is not None else None
+    return values
+
+
+# balise <time> -> (date affichée, date ISO)
+def extract_date(time_tag):
+    if time_tag is None:
+        return None, None
+    return text(time_tag), parse_date_iso(time_tag.get('datetime'))
+
+
+FIGURE_SELECTOR = sv.compile('figure')
+FIGURE_IMG_SELECTOR = sv.compile('img')
+FIGCAPTION_SELECTOR = sv.compile('figcaption')
+
+# images du contenu : <figure> (légende ou alt), sinon toutes les <img> (alt)
+def extract_content_images(content_tag):
+    images = []
+    if content_tag is None:
+        return images
+
+    figures = FIGURE_SELECTOR.select(content_tag)
+    if figures:
+        candidates = []
+        for figure in figures:
+            img_tag = FIGURE_IMG_SELECTOR.select_one(figure)
+            if img_tag is not None:
+                candidates.append((img_tag, FIGCAPTION_SELECTOR.select_one(figure)))
+    else: # Fallback si pas de <figure>
+        candidates = [(img_tag, None) for img_tag in FIGURE_IMG_SELECTOR.select(content_tag)]
+
+    for img_tag, figcaption in candidates:
+        img_url = image_url(img_tag)
+        if not img_url or img_url.startswith('data:image'): continue
+        caption = text(figcaption) if figcaption is not None else img_tag.get('alt', '')
+        images.append({'url': img_url, 'caption_or_alt': caption})
+    return images
+
+
+# empreinte SHA-256 du HTML de div.entry-content (None si absent) : détecte une modification du corps
+# de l'article même quand les champs extraits sont identiques (change_detection.py)
+def body_hash(content_tag):
+    if content_tag is None:
+        return None
+    return hashlib.sha256(str(content_tag).encode('utf-8')).hexdigest()
+
+
+# corps de l'article (optionnel, main.py --bodies / bodies.py) : texte nettoyé + HTML minimal
+# (balises de mise en forme sans attributs, liens et images gardés, scripts / iframes / formulaires retirés)
+# variable d'environnement lue aussi par les processus du pool de parsing
+EXTRACT_BODY = os.environ.get("CRAWL_BODIES", "0") == "1"
+BODY_DROPPED_TAGS = {'script', 'style', 'noscript', 'iframe', 'form', 'button', 'svg', 'ins', 'aside', 'template'}
+BODY_KEPT_TAGS = {'p', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'blockquote', 'a', 'strong', 'em', 'b', 'i',
+                  'figure', 'figcaption', 'table', 'thead', 'tbody', 'tr', 'th', 'td', 'pre', 'code'}
+BODY_BLOCK_TAGS = {'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'blockquote', 'figcaption', 'pre', 'tr', 'div', 'ul', 'ol', 'table', 'figure'}
+
+def _clean_body(node, html, blocks):
+    for child in node.children:
+        if isinstance(child, NavigableString):
+            if not isinstance(child, PreformattedString): # commentaires, CDATA...
+                html.append(escape(str(child), quote=False))
+                blocks[-1].append(str(child))
+            continue
+        name = child.name
+        if name in BODY_DROPPED_TAGS:
+            continue
+        if name == 'img':
+            src = image_url(child)
+            if src and not src.startswith('data:'):
+                html.append(f'<img src="{escape(src)}" alt="{escape(child.get("alt", ""))}">')
+            continue
+        if name == 'br':
+            html.append('<br>')
+            blocks[-1].append(" ")
+            continue
+        kept = name in BODY_KEPT_TAGS
+        if kept:
+            html.append(f'<a href="{escape(child.get("href", ""))}">' if name == 'a' else f'<{name}>')
+        if name in BODY_BLOCK_TAGS:
+            blocks.append([])
+        _clean_body(child, html, blocks)
+        if name in BODY_BLOCK_TAGS:
+            blocks.append([])
+        if kept:
+            html.append(f'</{name}>')
+
+# div.entry-content -> {'text': paragraphes séparés par une ligne vide, 'html': HTML minimal} (None si absent)
+def extract_body(content_tag):
+    if content_tag is None:
+        return None
+    html, blocks = [], [[]]
+    _clean_body(content_tag, html, blocks)
+    paragraphs = (" ".join("".join(block).split()) for block in blocks)
+    return {'text': "\n\n".join(paragraph for paragraph in paragraphs if paragraph), 'html': "".join(html).strip()}
+
+
+# extraction complète d'une page article -> dict avec les champs de l'article (None / [] si absents)
+def extract_article(soup):
+    with get_metrics().timer('extract'):
+        values = extract(soup, COMPILED_ARTICLE_SPEC)
+        values['date_display'], values['date_iso'] = extract_date(values.pop('date'))
+        content = values.pop('content')
+        values['content_images'] = extract_content_images(content)
+        values['body_hash'] = body_hash(content)
+        if EXTRACT_BODY:
+            values['body'] = extract_body(content)
+    return values
+
+# extraction d'un aperçu de listing -> dict (None si absents)
+def extract_preview(article_tag):
+    with get_metrics().timer('extract'):
+        values = extract(article_tag, COMPILED_PREVIEW_SPEC)
+        values['date_display'], values['date_iso'] = extract_date(values.pop('date'))
+    return values
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+
+#CONFIG (surcharge possible par variables d'environnement)
+FRONTIER_PATH = os.environ.get("CRAWL_FRONTIER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "crawl_frontier.sqlite"))
+MAX_ATTEMPTS = int(os.environ.get("CRAWL_MAX_ATTEMPTS", 3)) # au-delà, une URL en échec n'est plus retentée
+
+# états d'une URL
+PENDING = 'pending' # découverte, pas encore récupérée
+IN_FLIGHT = 'in_flight' # en cours de récupération (ou récupérée, pas encore écrite en base)
+DONE = 'done' # écrite dans MongoDB (article) / entièrement traitée (catégorie)
+FAILED = 'failed' # erreur à la récupération, retentée au prochain --resume
+
+
+# frontière de crawl persistante (SQLite) : état de chaque URL (catégories, articles) d'un run
+# permet de reprendre un run interrompu (main.py --resume) sans retélécharger les articles déjà enregistrés
+class Frontier:
+    def __init__(self, path=FRONTIER_PATH, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                kind TEXT,
+                parent TEXT,
+                state TEXT,
+                attempts INTEGER DEFAULT 0,
+                last_fetch REAL,
+                last_error TEXT,
+                added_at REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_kind_state ON frontier(kind, state)")
+        self._conn.commit()
+
+    # nouvelles URLs -> pending (les URLs déjà présentes gardent leur état)
+    def add(self, urls, kind, parent=None):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (url, kind, parent, state, attempts, added_at) VALUES (?, ?, ?, ?, 0, ?)",
+                [(url, kind, parent, PENDING, now) for url in urls if url])
+            self._conn.commit()
+
+    # début de récupération : +1 tentative
+    def mark_in_flight(self, url):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE frontier SET state = ?, attempts = attempts + 1, last_fetch = ? WHERE url = ?",
+                (IN_FLIGHT, time.time(), url))
+            self._conn.commit()
+
+    # URLs enregistrées (seules celles en cours passent à done : une URL en échec reste à retenter)
+    def mark_done(self, urls, states=(IN_FLIGHT,)):
+        urls = [url for url in urls if url]
+        if not urls:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE frontier SET state = ?, last_error = NULL WHERE url = ? AND state IN (%s)" % ",".join("?" * len(states)),
+                [(DONE, url) + tuple(states) for url in urls])
+            self._conn.commit()
+
+    # -> True si l'URL sera retentée au prochain --resume (moins de max_attempts tentatives)
+    def mark_failed(self, url, error):
+        with self._lock:
+            self._conn.execute("UPDATE frontier SET state = ?, last_error = ? WHERE url = ?", (FAILED, str(error)[:500], url))
+            self._conn.commit()
+            row = self._conn.execute("SELECT attempts FROM frontier WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] < self.max_attempts
+
+    # URLs à ne pas (re)récupérer parmi une liste : déjà faites, ou en échec trop de fois
+    def skip_urls(self, urls):
+        urls = [url for url in urls if url]
+        skipped = set()
+        with self._lock:
+            for i in range(0, len(urls), 500): # limite de variables SQLite
+                chunk = urls[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT url FROM frontier WHERE url IN (%s) AND (state = ? OR (state = ? AND attempts >= ?))" % ",".join("?" * len(chunk)),
+                    chunk + [DONE, FAILED, self.max_attempts]).fetchall()
+                skipped.update(row[0] for row in rows)
+        return skipped
+
+    # nb d'URLs en échec encore à retenter parmi les URLs découvertes depuis parent (articles d'une catégorie)
+    def retryable_count(self, parent):
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM frontier WHERE parent = ? AND state = ? AND attempts < ?",
+                                     (parent, FAILED, self.max_attempts)).fetchone()
+        return row[0]
+
+    def state(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM frontier WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    # reprise : les URLs en cours lors de l'arrêt sont remises à pending -> nb d'URLs remises
+    def requeue_in_flight(self):
+        with self._lock:
+            count = self._conn.execute("UPDATE frontier SET state = ? WHERE state = ?", (PENDING, IN_FLIGHT)).rowcount
+            self._conn.commit()
+        return count
+
+    # {kind: {state: nb}}
+    def summary(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, state, COUNT(*) FROM frontier GROUP BY kind, state").fetchall()
+        counts = {}
+        for kind, state, count in rows:
+            counts.setdefault(kind, {})[state] = count
+        return counts
+
+    # nouveau run (sans --resume) : on repart d'une frontière vide
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM frontier")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,29 @@
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# custom
+from metrics import get_metrics
+
+# parser par défaut : lxml (C, bien plus rapide) s'il est installé, sinon html.parser (pur Python)
+try:
+    import lxml # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+#CONFIG
+PARSER_BACKEND = os.environ.get("HTML_PARSER", DEFAULT_PARSER) # 'lxml' ou 'html.parser'
+
+# parsing partiel : seules les zones utiles de chaque type de page sont construites en arbre
+# (menus, sidebars, footers, scripts... sont ignorés pendant le parsing)
+# les classes sont testées sur l'attribut class complet ("post-123 post type-post ...") -> \b
+HOME_STRAINER = SoupStrainer('ul', id='primary-menu')
+LISTING_STRAINER = SoupStrainer(class_=re.compile(r'\bpost-\d+\b|\bpage-numbers\b')) # aperçus + pagination
+ARTICLE_STRAINER = SoupStrainer(['header', 'div'], class_=re.compile(r'\b(article-header|entry-content|article-terms)\b'))
+
+
+def make_soup(html, strainer=None, parser=None):
+    with get_metrics().timer('parse'):
+        return BeautifulSoup(html, parser or PARSER_BACKEND, parse_only=strainer)
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+#CONFIG (surcharge possible par variables d'environnement)
+CACHE_PATH = os.environ.get("HTTP_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "http_cache.sqlite"))
+CACHE_MAX_BYTES = int(os.environ.get("HTTP_CACHE_MAX_BYTES", 200 * 1024 * 1024)) # 200 Mo
+# durée pendant laquelle une page est réutilisée sans même revalider (secondes)
+CACHE_TTLS = {
+    'listing': int(os.environ.get("HTTP_CACHE_TTL_LISTING", 10 * 60)), # accueil / catégories : changent souvent
+    'article': int(os.environ.get("HTTP_CACHE_TTL_ARTICLE", 24 * 3600)), # articles : quasi statiques
+}
+RESYNC_INTERVAL = 100 # nb d'écritures entre 2 recalculs de la taille réelle (autres process sur le même fichier)
+
+
+# cache HTTP persistant (SQLite) indexé par URL
+# garde le corps + ETag/Last-Modified pour les GET conditionnels, éviction LRU au-delà de max_bytes
+class HttpCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, ttls=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(CACHE_TTLS, **(ttls or {}))
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'bytes_saved': 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                encoding TEXT,
+                body BLOB,
+                size INTEGER,
+                fetched_at REAL,
+                last_access REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache(last_access)")
+        self._conn.commit()
+        # taille totale tenue à jour à chaque écriture (pas de SUM(size) sur toute la table par réponse)
+        self._total_bytes = self._table_size()
+        self._stores = 0
+
+    def _table_size(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, content_type, encoding, body, size, fetched_at FROM http_cache WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        keys = ('url', 'etag', 'last_modified', 'content_type', 'encoding', 'body', 'size', 'fetched_at')
+        return dict(zip(keys, row))
+
+    def is_fresh(self, entry, url_class):
+        return time.time() - entry['fetched_at'] < self.ttls.get(url_class, 0)
+
+    def count(self, stat, saved=0):
+        with self._lock:
+            self.stats[stat] += 1
+            self.stats['bytes_saved'] += saved
+
+    # headers à envoyer pour revalider une entrée
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get('etag'): headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'): headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, response):
+        body = response.content
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM http_cache WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 response.headers.get('Content-Type'), response.encoding, body, len(body), now, now))
+            self._conn.commit()
+            self._total_bytes += len(body) - (previous[0] if previous else 0)
+            self._stores += 1
+            if self._stores % RESYNC_INTERVAL == 0:
+                self._total_bytes = self._table_size()
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    # entrée toujours valide (hit ou 304) -> on repousse fetched_at / last_access
+    def touch(self, url, revalidated=False):
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._conn.execute("UPDATE http_cache SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            else:
+                self._conn.execute("UPDATE http_cache SET last_access = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+    # supprime les entrées les moins récemment utilisées jusqu'à repasser sous max_bytes
+    # (appelé quand la taille estimée dépasse max_bytes : la taille réelle est alors recalculée)
+    def evict(self):
+        with self._lock:
+            total = self._total_bytes = self._table_size()
+            if total <= self.max_bytes:
+                return 0
+            removed = 0
+            for url, size in self._conn.execute("SELECT url, size FROM http_cache ORDER BY last_access ASC").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+                total -= size
+                removed += 1
+            self._conn.commit()
+            self._total_bytes = total
+            return removed
+
+    # reconstruit une réponse requests à partir d'une entrée du cache
+    def build_response(self, entry):
+        response = requests.Response()
+        response._content = entry['body']
+        response.status_code = 200
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict({'Content-Type': entry['content_type'] or 'text/html'})
+        response.encoding = entry['encoding']
+        response.elapsed = timedelta(0)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
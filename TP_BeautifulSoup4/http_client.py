@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# custom
+from http_cache import HttpCache
+from metrics import get_metrics
+from rate_limiter import THROTTLE_STATUSES, get_rate_limiter
+
+# brotli optionnel : on n'annonce 'br' que si urllib3 peut le décoder
+try:
+    import brotli # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+#CONFIG
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+}
+DEFAULT_TIMEOUT = 10 # secondes
+POOL_CONNECTIONS = 10 # nb de hosts gardés en cache
+POOL_MAXSIZE = 16 # connexions keep-alive par host (>= nb de threads de scraping)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5 # 0.5s, 1s, 2s...
+BACKOFF_JITTER = 0.3 # aléa ajouté à chaque attente (secondes)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+TIMINGS_HISTORY = 1000 # nb de mesures gardées en mémoire
+
+
+# client HTTP partagé par tous les scrapers :
+# session requests (keep-alive, pool de connexions), retries avec backoff exponentiel + jitter,
+# débit par host limité et adapté (rate_limiter.py) et mesure du temps de chaque requête
+class Fetcher:
+    def __init__(self, headers=None, timeout=DEFAULT_TIMEOUT, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR,
+                 backoff_jitter=BACKOFF_JITTER, cache=None, rate_limiter=None):
+        self.timeout = timeout
+        self.cache = cache # HttpCache optionnel (http_cache.py)
+        self.rate_limiter = rate_limiter # RateLimiter optionnel (rate_limiter.py)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False, # la dernière réponse est renvoyée -> raise_for_status() côté appelant
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.timings = deque(maxlen=TIMINGS_HISTORY)
+        self._lock = threading.Lock()
+
+    # url_class ('listing' ou 'article') choisit la durée de validité du cache
+    # use_cache=False : ni lu ni écrit dans le cache HTTP (images : elles ont leur propre stockage, assets.py)
+    # rate_limit=False : hors limiteur de débit (robots.txt, lu par le limiteur lui-même)
+    def get(self, url, url_class='article', use_cache=True, rate_limit=True, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        cache = self.cache if use_cache else None
+        rate_limiter = self.rate_limiter if rate_limit else None
+
+        entry = cache.lookup(url) if cache else None
+        if entry and cache.is_fresh(entry, url_class):
+            # page encore valide -> aucune requête
+            cache.touch(url)
+            cache.count('hits', saved=entry['size'])
+            response = cache.build_response(entry)
+            return self._record(url, response, start, cache='hit', downloaded=0)
+
+        if entry:
+            # GET conditionnel (If-None-Match / If-Modified-Since)
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **cache.conditional_headers(entry))
+
+        if rate_limiter:
+            rate_limiter.wait(url)
+            start = time.perf_counter() # l'attente du limiteur est mesurée à part (rate_limit_wait)
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            get_metrics().inc('http_errors_total')
+            raise
+        downloaded = len(response.content)
+        if rate_limiter:
+            # un 429/503 absorbé par les retries compte aussi comme un ralentissement demandé
+            retries = getattr(response.raw, 'retries', None)
+            throttled = any(attempt.status in THROTTLE_STATUSES for attempt in (retries.history if retries else ()))
+            rate_limiter.record(url, response.status_code, response.elapsed.total_seconds(),
+                                     throttled=throttled, retry_after=response.headers.get('Retry-After'))
+
+        if entry and response.status_code == 304:
+            cache.touch(url, revalidated=True)
+            cache.count('revalidated', saved=entry['size'])
+            elapsed = response.elapsed
+            retries = getattr(response.raw, 'retries', None)
+            response = cache.build_response(entry)
+            response.elapsed = elapsed
+            return self._record(url, response, start, cache='revalidated', downloaded=downloaded, retries=retries)
+
+        if cache and response.status_code == 200:
+            cache.count('misses')
+            cache.store(url, response)
+        return self._record(url, response, start, cache='miss' if cache else None, downloaded=downloaded)
+
+    def _record(self, url, response, start, cache=None, downloaded=0, retries=None):
+        total = time.perf_counter() - start
+        retries = retries or getattr(response.raw, 'retries', None)
+        timing = {
+            'url': url,
+            'status': response.status_code,
+            'ttfb': response.elapsed.total_seconds(), # envoi de la requête -> headers reçus (retries compris)
+            'total': total, # + téléchargement du corps
+            'bytes': downloaded, # octets réellement téléchargés (0 si servi par le cache)
+            'retries': len(retries.history) if retries else 0,
+            'cache': cache,
+        }
+        response.timing = timing
+        with self._lock:
+            self.timings.append(timing)
+        get_metrics().record_fetch(timing['status'], timing['ttfb'], total, downloaded, cache, timing['retries'])
+        return response
+
+    # résumé des dernières requêtes (nb, temps moyen, octets, retries)
+    def timing_summary(self):
+        with self._lock:
+            timings = list(self.timings)
+        if not timings:
+            return {'requests': 0, 'avg_ttfb': 0.0, 'avg_total': 0.0, 'bytes': 0, 'retries': 0, 'cache_hits': 0}
+        return {
+            'requests': len(timings),
+            'avg_ttfb': sum(t['ttfb'] for t in timings) / len(timings),
+            'avg_total': sum(t['total'] for t in timings) / len(timings),
+            'bytes': sum(t['bytes'] for t in timings),
+            'retries': sum(t['retries'] for t in timings),
+            'cache_hits': sum(1 for t in timings if t['cache'] in ('hit', 'revalidated')),
+        }
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+
+# instance partagée (créée au premier appel)
+# cache HTTP actif par défaut, désactivable avec HTTP_CACHE=0 ou configure_fetcher(use_cache=False)
+# limiteur de débit partagé actif par défaut, désactivable avec CRAWL_RATE_LIMIT=0 ou configure_fetcher(rate_limit=False)
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+def configure_fetcher(use_cache=os.environ.get("HTTP_CACHE", "1") != "0", rate_limit=True, **kwargs):
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is not None:
+            _fetcher.close()
+        cache = HttpCache() if use_cache else None
+        _fetcher = Fetcher(cache=cache, rate_limiter=get_rate_limiter() if rate_limit else None, **kwargs)
+        return _fetcher
+
+def get_fetcher():
+    if _fetcher is None:
+        return configure_fetcher()
+    return _fetcher
@@ -0,0 +1,214 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+# lancement de scrapings complets (main.py) en arrière-plan, sans bloquer l'interface Streamlit
+# chaque job a un ID et un dossier jobs/<id>/ :
+#   job.json      état du job (args, pid, statut, code de sortie)
+#   log.txt       sortie console de main.py
+#   events.jsonl  événements de progression structurés (main.py --progress)
+#   metrics.json  métriques du pipeline (main.py --metrics-json)
+#   frontier.sqlite  frontière de crawl propre au job (plusieurs jobs en parallèle)
+# le job tourne dans un process détaché (python job_runner.py <id>) qui lance main.py et enregistre
+# la fin du job : plusieurs utilisateurs peuvent lancer et suivre des runs, un redémarrage de l'app ne les coupe pas
+
+#CONFIG (surcharge possible par variables d'environnement)
+JOBS_DIR = os.environ.get("SCRAPE_JOBS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs"))
+MAX_RUNNING_JOBS = int(os.environ.get("SCRAPE_MAX_RUNNING_JOBS", 2)) # runs simultanés (politesse envers le site)
+LOG_TAIL_BYTES = 16 * 1024 # fin du log affichée dans l'interface
+START_LOCK_TIMEOUT = 10 # secondes : verrou de lancement plus ancien = laissé par un process arrêté, supprimé
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# statuts d'un job
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+# --- côté main.py : événements de progression ---
+
+# écrit un événement JSON par ligne (lu au fil de l'eau par l'interface)
+class ProgressReporter:
+    def __init__(self, path):
+        self.path = path
+        self.started = time.time()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def emit(self, event, **fields):
+        fields = dict(fields, event=event, time=round(time.time(), 3), elapsed=round(time.time() - self.started, 3))
+        self._file.write(json.dumps(fields) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# --- côté interface ---
+
+def job_dir(job_id):
+    return os.path.join(JOBS_DIR, job_id)
+
+def _job_path(job_id, name):
+    return os.path.join(job_dir(job_id), name)
+
+def read_job(job_id):
+    try:
+        with open(_job_path(job_id, 'job.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_job(job):
+    path = _job_path(job['id'], 'job.json')
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(job, f)
+    os.replace(f"{path}.tmp", path)
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError: # Windows : pid inconnu
+        return False
+    return True
+
+# process des jobs lancés par ce process (récupérés à leur fin, sinon ils restent zombies et semblent vivants)
+_runners = {}
+
+# statut d'un job : running tant que son process tourne (process mort sans avoir enregistré sa fin -> failed)
+def job_status(job):
+    runner = _runners.get(job['id'])
+    if runner is not None and runner.poll() is not None:
+        del _runners[job['id']]
+    if job['status'] == RUNNING and job['runner_pid'] and not _pid_alive(job['runner_pid']):
+        job = read_job(job['id']) or job # fin enregistrée entre-temps ?
+        if job['status'] == RUNNING:
+            job['status'] = FAILED
+    return job['status']
+
+# jobs connus, du plus récent au plus ancien
+def list_jobs():
+    if not os.path.isdir(JOBS_DIR):
+        return []
+    jobs = [read_job(job_id) for job_id in os.listdir(JOBS_DIR)]
+    jobs = [job for job in jobs if job]
+    for job in jobs:
+        job['status'] = job_status(job)
+    return sorted(jobs, key=lambda job: job['started'], reverse=True)
+
+def running_jobs():
+    return [job for job in list_jobs() if job['status'] == RUNNING]
+
+
+# verrou entre process (fichier créé en exclusif) : plusieurs sessions Streamlit / apps sur le même JOBS_DIR
+@contextmanager
+def _start_lock():
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    path = os.path.join(JOBS_DIR, '.start.lock')
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > START_LOCK_TIMEOUT:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue # verrou libéré entre-temps
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.remove(path)
+
+# lance main.py en arrière-plan -> ID du job, ou None si MAX_RUNNING_JOBS runs sont déjà en cours
+# vérification du nb de jobs en cours et création du job sous verrou : 2 lancements simultanés ne dépassent pas la limite
+def start_job(args=()):
+    with _start_lock():
+        if len(running_jobs()) >= MAX_RUNNING_JOBS:
+            return None
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        os.makedirs(job_dir(job_id))
+        job = {'id': job_id, 'args': list(args), 'status': RUNNING, 'started': time.time(),
+               'finished': None, 'return_code': None, 'runner_pid': None}
+        _write_job(job) # compté comme en cours dès ici (runner_pid encore inconnu)
+
+    popen_kwargs = {}
+    if os.name == 'nt':
+        popen_kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        popen_kwargs['start_new_session'] = True # survit à l'arrêt de Streamlit
+    runner = subprocess.Popen([sys.executable, os.path.abspath(__file__), job_id],
+                              stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **popen_kwargs)
+    _runners[job_id] = runner
+    job['runner_pid'] = runner.pid
+    _write_job(job)
+    return job_id
+
+
+# nouveaux événements depuis offset -> (événements, nouvel offset) ; seule la partie non lue du fichier est lue
+def read_events(job_id, offset=0):
+    try:
+        with open(_job_path(job_id, 'events.jsonl'), 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+    except OSError:
+        return [], offset
+    complete = chunk[:chunk.rfind(b"\n") + 1] # une ligne en cours d'écriture est relue au prochain appel
+    events = []
+    for line in complete.decode('utf-8', errors='replace').splitlines():
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return events, offset + len(complete)
+
+# fin du log (taille bornée, quelle que soit la longueur du run)
+def read_log_tail(job_id, max_bytes=LOG_TAIL_BYTES):
+    try:
+        with open(_job_path(job_id, 'log.txt'), 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - max_bytes))
+            data = f.read()
+    except OSError:
+        return ""
+    text = data.decode('utf-8', errors='replace')
+    if size > max_bytes:
+        text = text[text.find("\n") + 1:] # première ligne tronquée
+    return text
+
+def read_metrics(job_id):
+    try:
+        with open(_job_path(job_id, 'metrics.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# --- process détaché d'un job ---
+
+def _run(job_id):
+    job = read_job(job_id)
+    env = dict(os.environ, PYTHONUNBUFFERED='1', CRAWL_FRONTIER_PATH=_job_path(job_id, 'frontier.sqlite'))
+    command = [sys.executable, MAIN_SCRIPT, *job['args'],
+               '--progress', _job_path(job_id, 'events.jsonl'),
+               '--metrics-json', _job_path(job_id, 'metrics.json')]
+    with open(_job_path(job_id, 'log.txt'), 'ab') as log:
+        return_code = subprocess.call(command, stdout=log, stderr=subprocess.STDOUT, env=env,
+                                      cwd=os.path.dirname(MAIN_SCRIPT))
+    job = read_job(job_id) # relu : runner_pid est écrit après le lancement de ce process
+    job.update(status=SUCCEEDED if return_code == 0 else FAILED, finished=time.time(), return_code=return_code)
+    _write_job(job)
+
+
+if __name__ == "__main__":
+    _run(sys.argv[1])
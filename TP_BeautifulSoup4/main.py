@@ -1,16 +1,29 @@
-from pymongo.errors import PyMongoError
+import argparse
+import sys
+import time
 
 # custom
 import TP_BeautifulSoup4 as scraper
 import mongo_connect as db_connector
+import http_client
+import parse_pool
+import frontier
+import metrics
+import job_runner
+import assets
+import bodies
+import search_index
+import dedup
 
-def main():
-    base_url = "https://www.blogdumoderateur.com/"
-    all_scraped_articles = []
-    total_inserted_count = 0
-    total_skipped_count = 0
-
+#CONFIG
+BASE_URL = "https://www.blogdumoderateur.com/"
+STOP_AFTER_KNOWN = 5 # mode incrémental : arrêt après N articles déjà connus d'affilée
+PROGRESS_INTERVAL = 1.0 # secondes entre 2 événements de progression 'articles'
 
+# progress (optionnel) : job_runner.ProgressReporter, événements de progression lus par app_front.py
+# main / main_async / main_worker / main_refresh -> False si MongoDB est injoignable (code de sortie 1 : job en échec)
+def main(base_url=BASE_URL, incremental=False, stop_after_known=STOP_AFTER_KNOWN, max_pages=1, date_cutoff=None, resume=False,
+         progress=None, duplicates=dedup.DUPLICATE_POLICY):
 
     print("--- Starting Category URL Scraping ---")
     category_urls = scraper.scrape_category_urls(base_url)
@@ -27,62 +40,295 @@ def main():
 
     if articles_collection is None:
         print("Failed to connect to MongoDB. Cannot save data. Exiting.")
-        return
+        return False
+    # quasi-doublons (dedup.py) ignorés ou marqués avant la récup de la page article
+    dedup.configure_duplicate_detector(articles_collection, duplicates)
     
+    # frontière persistante (crawl_frontier.sqlite) : état de chaque catégorie / article, pour reprendre un run interrompu
+    crawl_frontier = frontier.Frontier()
+    if resume:
+        requeued = crawl_frontier.requeue_in_flight()
+        print(f"--- Resuming previous run: {crawl_frontier.summary()} ({requeued} in-flight URLs requeued) ---")
+    else:
+        crawl_frontier.clear()
+    crawl_frontier.add(category_urls, 'category')
+
+    # index unique sur l'URL + écritures par lots (bulk upsert)
+    # un article n'est marqué fait dans la frontière qu'une fois écrit en base
+    writer = db_connector.BulkWriter(
+        articles_collection,
+        on_flush=lambda articles: crawl_frontier.mark_done([article.get('url') for article in articles]),
+    )
+
     print("--- Starting Article Scraping for Each Category ---")
+    if progress:
+        progress.emit('start', mode='sync', categories_total=len(category_urls))
+    categories_done = 0
+    articles_done = 0
+    last_progress = time.time()
 
     for category_url in category_urls:
+        if crawl_frontier.state(category_url) == frontier.DONE:
+            print(f"--- Skipping Category (already done): {category_url} ---")
+            continue
         print(f"--- Scraping Category: {category_url} ---")
+        crawl_frontier.mark_in_flight(category_url)
+
+        # les articles sont écrits au fur et à mesure (lots de BULK_BATCH_SIZE), sans attendre la fin de la catégorie
+        known_urls_lookup = None
+        if incremental:
+            # seuls les articles absents de la base sont récupérés
+            known_urls_lookup = lambda urls: db_connector.find_known_urls(articles_collection, urls)
+        articles = scraper.iter_articles_from_listing(
+            category_url,
+            known_urls_lookup=known_urls_lookup,
+            stop_after_known=stop_after_known,
+            max_pages=max_pages,
+            date_cutoff=date_cutoff,
+            frontier=crawl_frontier,
+        )
 
-        # Utiliser la nouvelle fonction fusionnée
-        scraped_articles = scraper.scrape_articles_from_listing(category_url)
+        counts_before = dict(writer.counts)
+        scraped_count = 0
+        for article in articles:
+            writer.add(article)
+            scraped_count += 1
+            articles_done += 1
+            if progress and time.time() - last_progress >= PROGRESS_INTERVAL:
+                progress.emit('articles', articles_done=articles_done, categories_done=categories_done, categories_total=len(category_urls),
+                              inserted=writer.counts['inserted'], rate=round(articles_done / (time.time() - progress.started), 2))
+                last_progress = time.time()
+        writer.flush()
+        counts = {key: writer.counts[key] - counts_before[key] for key in writer.counts}
+        # done seulement si la catégorie est encore en cours (un listing en échec reste failed) et sans article à retenter :
+        # sinon --resume relit la catégorie (articles déjà faits ignorés, articles en échec retentés)
+        failed_articles = crawl_frontier.retryable_count(category_url)
+        if failed_articles:
+            crawl_frontier.mark_failed(category_url, f"{failed_articles} articles failed")
+        else:
+            crawl_frontier.mark_done([category_url])
+        if crawl_frontier.state(category_url) == frontier.FAILED:
+            print(f"--- {category_url} not complete, it will be retried with --resume ---")
+        categories_done += 1
+        if progress:
+            # compteurs cumulés (articles_done, inserted...) + compteurs de la catégorie (category_*)
+            progress.emit('category_done', url=category_url, category_articles=scraped_count, category_inserted=counts['inserted'],
+                          inserted=writer.counts['inserted'], articles_done=articles_done, categories_done=categories_done, categories_total=len(category_urls),
+                          rate=round(articles_done / (time.time() - progress.started), 2))
 
-        if not scraped_articles:
+        if not scraped_count:
             print(f"No articles were scraped from {category_url}. Moving to next category.")
             continue # skip la catégorie si aucun article n'est trouvé
 
-        print(f"--- Scraping finished for {category_url}. Found {len(scraped_articles)} articles with details. ---")
-        print("--- Inserting scraped articles into MongoDB ---")
-
-        # preparer les données pour l'insertion dans MongoDB
-        inserted_count = 0
-        skipped_count = 0
-    
-        for article_data in scraped_articles:
-            try:
-                # éviter les doublons en vérifiant l'URL
-                if article_data.get('url'):
-                    existing_article = articles_collection.find_one({'url': article_data['url']})
-                    if existing_article:
-                        # print(f"  Skipped (already exists): {article_data.get('title', 'N/A')} (URL: {article_data['url']})")
-                        skipped_count += 1
-                        continue
-
-                # si l'article n'existe pas, insérer dans la collection
-                insert_result = articles_collection.insert_one(article_data)
-                # print(f"  Inserted article: {article_data.get('title', 'N/A')} (ID: {insert_result.inserted_id})")
-                inserted_count += 1
-                all_scraped_articles.append(article_data) # Keep track if needed
-
-            except PyMongoError as e:
-                print(f"  Error inserting article '{article_data.get('title', 'N/A')}': {e}")
-                skipped_count += 1
-            except Exception as e:
-                print(f"  Unexpected error inserting article '{article_data.get('title', 'N/A')}': {e}")
-                skipped_count += 1
+        print(f"--- Scraping finished for {category_url}. Found {scraped_count} articles with details. ---")
 
         print(f"--- MongoDB Insertion Summary for {category_url} ---")
-        print(f"Successfully inserted: {inserted_count} articles.")
-        print(f"Skipped or failed: {skipped_count} articles.")
-        total_inserted_count += inserted_count
-        total_skipped_count += skipped_count
+        print(f"Successfully inserted: {counts['inserted']} articles.")
+        print(f"Skipped (already in DB): {counts['skipped']} articles.")
+        print(f"Failed: {counts['errors']} articles.")
         print("----------------------------------------------------")
 
+    totals = writer.close()
+    frontier_summary = crawl_frontier.summary()
+    crawl_frontier.close()
+    if progress:
+        progress.emit('finished', articles_done=articles_done, categories_done=categories_done, **totals)
 
     print("--- Overall MongoDB Insertion Summary ---")
-    print(f"Total successfully inserted across all categories: {total_inserted_count} articles.")
-    print(f"Total skipped or failed across all categories: {total_skipped_count} articles.")
+    print(f"Total successfully inserted across all categories: {totals['inserted']} articles.")
+    print(f"Total skipped or failed across all categories: {totals['skipped'] + totals['errors']} articles ({totals['errors']} errors).")
+    print(f"Frontier: {frontier_summary}")
+    fetcher = http_client.get_fetcher()
+    if fetcher.cache:
+        cache_stats = fetcher.cache.stats
+        print(f"HTTP cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated (304), {cache_stats['misses']} misses, {cache_stats['bytes_saved'] / 1024:.0f} KiB saved.")
+    if fetcher.rate_limiter:
+        for host, host_stats in fetcher.rate_limiter.summary().items():
+            print(f"Rate limiter {host}: {host_stats['rate']} req/s (max {host_stats['max_rate']}), {host_stats['throttled']} throttled (429/503), {host_stats['slowdowns']} slowdowns.")
+    print("---------------------------------------")
+    return True
+
+# crawl asyncio (listing, articles et écritures Mongo en pipeline)
+def main_async(base_url=BASE_URL, incremental=False, stop_after_known=STOP_AFTER_KNOWN, max_pages=1, date_cutoff=None, progress=None,
+               duplicates=dedup.DUPLICATE_POLICY):
+    import async_crawler # import ici : aiohttp n'est nécessaire que pour ce mode
+
+    print("--- Connecting to MongoDB ---")
+    articles_collection = db_connector.connect_to_mongo()
+
+    if articles_collection is None:
+        print("Failed to connect to MongoDB. Cannot save data. Exiting.")
+        return False
+    dedup.configure_duplicate_detector(articles_collection, duplicates)
+
+    print("--- Starting Async Crawl ---")
+    if progress:
+        progress.emit('start', mode='async')
+    stats = async_crawler.run_async_crawl(base_url, articles_collection, incremental=incremental, stop_after_known=stop_after_known,
+                                          max_pages=max_pages, date_cutoff=date_cutoff)
+
+    print("--- Overall MongoDB Insertion Summary ---")
+    print(f"Categories scraped: {stats['categories']} | Articles scraped: {stats['articles_scraped']} | Already known: {stats['known']} | Fetch errors: {stats['fetch_errors']}")
+    print(f"Total successfully inserted across all categories: {stats['inserted']} articles.")
+    print(f"Total skipped or failed across all categories: {stats['skipped'] + stats['errors']} articles ({stats['errors']} errors).")
+    print(f"Elapsed: {stats['elapsed']:.2f}s")
+    if progress:
+        progress.emit('finished', articles_done=stats['articles_scraped'], categories_done=stats['categories'],
+                      inserted=stats['inserted'], skipped=stats['skipped'], errors=stats['errors'])
+    print("---------------------------------------")
+    return True
+
+# worker d'un crawl distribué : prend ses tâches dans la file MongoDB partagée (work_queue.py)
+# lancer plusieurs `python main.py --worker` (processus ou machines) sur la même base
+def main_worker(base_url=BASE_URL, max_pages=1, date_cutoff=None, worker_id=None, reset_queue=False, progress=None,
+                duplicates=dedup.DUPLICATE_POLICY):
+    import work_queue
+
+    print("--- Connecting to MongoDB ---")
+    articles_collection = db_connector.connect_to_mongo()
+    queue_collection = work_queue.connect_to_queue()
+
+    if articles_collection is None or queue_collection is None:
+        print("Failed to connect to MongoDB. Cannot save data. Exiting.")
+        return False
+    dedup.configure_duplicate_detector(articles_collection, duplicates)
+
+    if reset_queue:
+        print("--- Clearing the shared work queue ---")
+        work_queue.WorkQueue(queue_collection, worker_id).clear()
+
+    print("--- Starting Worker ---")
+    if progress:
+        progress.emit('start', mode='worker')
+    stats = work_queue.run_worker(base_url, articles_collection, queue_collection, worker_id=worker_id,
+                                  max_pages=max_pages, date_cutoff=date_cutoff)
+
+    print("--- Worker Summary ---")
+    print(f"Listing pages: {stats['listings']} | Articles: {stats['articles']} | Task errors: {stats['task_errors']}")
+    print(f"Inserted: {stats['inserted']} | Skipped: {stats['skipped']} | Errors: {stats['errors']}")
+    print(f"Queue: {stats['queue']}")
+    if progress:
+        progress.emit('finished', articles_done=stats['articles'], inserted=stats['inserted'],
+                      skipped=stats['skipped'], errors=stats['errors'])
     print("---------------------------------------")
+    return True
+
+# mode refresh : articles déjà en base récupérés à nouveau, seuls ceux modifiés sont réécrits (refresh.py)
+def main_refresh(limit=0, date_cutoff=None, progress=None):
+    import refresh
+
+    print("--- Connecting to MongoDB ---")
+    articles_collection = db_connector.connect_to_mongo()
+
+    if articles_collection is None:
+        print("Failed to connect to MongoDB. Exiting.")
+        return False
+
+    print("--- Refreshing Known Articles ---")
+    if progress:
+        progress.emit('start', mode='refresh')
+    start = time.time()
+    stats = refresh.refresh_articles(articles_collection, limit=limit, date_cutoff=date_cutoff, progress=progress)
+
+    print("--- Refresh Summary ---")
+    print(f"Checked: {stats['checked']} articles | Not modified (304): {stats['not_modified']} | Unchanged: {stats['unchanged']} | "
+          f"Changed: {stats['changed']} | Errors: {stats['error']}")
+    if stats['fields']:
+        print("Changed fields: " + ", ".join(f"{field} ({count})" for field, count in sorted(stats['fields'].items())))
+    print(f"Documents rewritten: {stats['written']} | Elapsed: {time.time() - start:.2f}s")
+    if progress:
+        progress.emit('finished', articles_done=stats['checked'], changed=stats['changed'], errors=stats['error'])
+    print("---------------------------------------")
+    return True
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scraping complet du Blog du Modérateur vers MongoDB.")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="utiliser le moteur de crawl asyncio")
+    parser.add_argument("--base-url", default=BASE_URL, help="URL de la page d'accueil (ex: serveur local utils/replay_server.py)")
+    parser.add_argument("--no-cache", action="store_true", help="désactiver le cache HTTP (http_cache.sqlite)")
+    parser.add_argument("--incremental", action="store_true", help="ne récupérer que les articles absents de la base")
+    parser.add_argument("--stop-after-known", type=int, default=STOP_AFTER_KNOWN,
+                        help="mode incrémental : arrêter une catégorie après N articles déjà connus d'affilée (0 = jamais)")
+    parser.add_argument("--max-pages", type=int, default=1, help="nb de pages à lire par catégorie (/page/N/), 0 = toutes")
+    parser.add_argument("--since", dest="date_cutoff", metavar="YYYY-MM-DD", help="ignorer les articles publiés avant cette date")
+    parser.add_argument("--parse-processes", type=int, nargs="?", const=parse_pool.PARSE_WORKERS, default=0, metavar="N",
+                        help="parser les pages articles dans N processus (sans N : nb de cœurs)")
+    parser.add_argument("--resume", action="store_true",
+                        help="reprendre le run précédent interrompu (catégories et articles déjà enregistrés ignorés)")
+    parser.add_argument("--worker", action="store_true",
+                        help="mode worker : crawl distribué via la file de tâches MongoDB partagée (plusieurs processus/machines)")
+    parser.add_argument("--worker-id", help="identifiant du worker (par défaut host-pid-aléatoire)")
+    parser.add_argument("--reset-queue", action="store_true", help="mode worker : vider la file de tâches avant de démarrer (nouveau crawl)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="revérifier les articles déjà en base et ne réécrire que ceux modifiés (empreintes de contenu)")
+    parser.add_argument("--refresh-limit", type=int, default=0, metavar="N",
+                        help="mode refresh : nb max d'articles vérifiés, les moins récemment vus d'abord (0 = tous)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="exposer les métriques pendant le run sur http://127.0.0.1:PORT/metrics (Prometheus) et /metrics.json")
+    parser.add_argument("--bodies", action="store_true",
+                        help="enregistrer le corps des articles (texte + HTML minimal compressés, collection bodies, bodies.py)")
+    parser.add_argument("--no-search-index", action="store_true",
+                        help="ne pas mettre à jour l'index de recherche local (search_index.sqlite) pendant le run")
+    parser.add_argument("--assets", action="store_true",
+                        help="télécharger les images des articles (stockage local dédupliqué + miniatures, assets.py)")
+    parser.add_argument("--duplicates", choices=[dedup.SKIP, dedup.FLAG, dedup.KEEP], default=dedup.DUPLICATE_POLICY,
+                        help="quasi-doublons (même article sous une autre URL, empreinte SimHash) : ignorés (skip), "
+                             "enregistrés avec duplicate_of (flag) ou non vérifiés (keep)")
+    parser.add_argument("--progress", metavar="PATH",
+                        help="écrire les événements de progression (JSON, un par ligne) dans PATH (utilisé par job_runner.py)")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="écrire le résumé JSON des métriques dans PATH (mis à jour chaque seconde, valeurs finales en fin de run)")
+    args = parser.parse_args()
+    if args.resume and args.use_async:
+        parser.error("--resume n'est disponible qu'avec le moteur synchrone")
+    if args.refresh and (args.use_async or args.worker or args.resume or args.incremental):
+        parser.error("--refresh ne se combine pas avec --async, --worker, --resume ou --incremental")
+    return args
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.no_cache:
+        http_client.configure_fetcher(use_cache=False)
+    if args.bodies:
+        bodies.configure_bodies() # avant le pool de parsing : ses processus extraient aussi le corps
+    if args.parse_processes:
+        parse_pool.configure_parse_pool(args.parse_processes)
+    if args.assets:
+        if assets.Image is None:
+            print("Pillow not installed: images are stored without thumbnails (pip install pillow).")
+        assets.configure_asset_store()
+    # articles insérés / modifiés ajoutés à l'index de recherche de l'explorateur au fil du run
+    search_index.configure_search_index(enabled=search_index.SEARCH_INDEX_ENABLED and not args.no_search_index)
+    if args.metrics_port is not None:
+        _, metrics_url = metrics.start_metrics_server(args.metrics_port)
+        print(f"Metrics available at {metrics_url}")
+    metrics_dumper = metrics.JsonDumper(args.metrics_json) if args.metrics_json else None
+    progress = job_runner.ProgressReporter(args.progress) if args.progress else None
+    completed = False
+    try:
+        if args.refresh:
+            completed = main_refresh(args.refresh_limit, args.date_cutoff, progress)
+        elif args.worker:
+            completed = main_worker(args.base_url, args.max_pages, args.date_cutoff, args.worker_id, args.reset_queue, progress, args.duplicates)
+        elif args.use_async:
+            completed = main_async(args.base_url, args.incremental, args.stop_after_known, args.max_pages, args.date_cutoff, progress, args.duplicates)
+        else:
+            completed = main(args.base_url, args.incremental, args.stop_after_known, args.max_pages, args.date_cutoff, args.resume, progress,
+                             args.duplicates)
+    finally:
+        detector = dedup.get_duplicate_detector()
+        if detector is not None:
+            print(f"Near-duplicates ({detector.policy}): {detector.stats['previews']} listing previews, "
+                  f"{detector.stats['articles']} scraped articles.")
+            dedup.configure_duplicate_detector(None)
+        parse_pool.close_parse_pool()
+        assets.configure_asset_store(enabled=False)
+        search_index.configure_search_index(enabled=False)
+        if progress:
+            progress.close()
+        if metrics_dumper:
+            metrics_dumper.stop()
+        print("--- Pipeline Metrics ---")
+        print(metrics.get_metrics().format_summary())
+        print("---------------------------------------")
+    sys.exit(0 if completed else 1)
\ No newline at end of file
@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# métriques du pipeline de scraping (process courant) : compteurs et histogrammes de durée par étape
+#   fetch (requête complète), fetch_ttfb (envoi -> headers, DNS + connexion + retries compris),
+#   fetch_download (lecture du corps), parse (construction de l'arbre), extract (sélecteurs CSS),
+#   parse_pool (envoi -> résultat du pool de processus), db_write (bulk_write MongoDB)
+# export : texte Prometheus (serveur HTTP /metrics) ou résumé JSON (fin de main.py, fichier lu par app_front.py)
+
+#CONFIG (surcharge possible par variables d'environnement)
+METRICS_ENABLED = os.environ.get("CRAWL_METRICS", "1") != "0"
+METRIC_PREFIX = "bdm_scraper_"
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # secondes
+SAMPLES_HISTORY = 1000 # dernières mesures gardées par histogramme (p50 / p99 du résumé JSON)
+DUMP_INTERVAL = 1.0 # secondes entre 2 écritures du fichier JSON
+
+
+class Histogram:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1) # dernier = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=SAMPLES_HISTORY)
+
+    def observe(self, value):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _label_text(key):
+    return ",".join(f'{name}="{value}"' for name, value in key)
+
+
+# registre thread-safe : compteurs et histogrammes identifiés par (nom, labels)
+class Metrics:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    # durée d'un bloc -> histogramme stage_seconds{stage=...}
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - start, stage=stage)
+
+    # une requête HTTP (client synchrone ou asyncio)
+    def record_fetch(self, status, ttfb, total, downloaded, cache=None, retries=0):
+        self.inc('http_requests_total', status=status, cache=cache or 'none')
+        self.inc('http_bytes_downloaded_total', downloaded)
+        if retries:
+            self.inc('http_retries_total', retries)
+        if cache in ('hit', 'revalidated'):
+            self.inc('http_cache_hits_total', result=cache)
+        self.observe('stage_seconds', total, stage='fetch')
+        if cache != 'hit': # page servie par le cache : pas de requête
+            self.observe('stage_seconds', ttfb, stage='fetch_ttfb')
+            self.observe('stage_seconds', max(0.0, total - ttfb), stage='fetch_download')
+
+    # résumé JSON : {uptime, counters: {nom: {labels: valeur}}, stages: {étape: {count, total, avg, p50, p99}}}
+    def summary(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: (histogram.count, histogram.sum, histogram.percentile(50), histogram.percentile(99))
+                          for key, histogram in self.histograms.items()}
+        result = {'uptime': round(time.time() - self.started, 3), 'counters': {}, 'stages': {}}
+        for (name, key), value in sorted(counters.items()):
+            result['counters'].setdefault(name, {})[",".join(f"{k}={v}" for k, v in key)] = value
+        for (name, key), (count, total, p50, p99) in sorted(histograms.items()):
+            stats = {'count': count, 'total': round(total, 4), 'avg': round(total / count, 6) if count else 0.0,
+                     'p50': round(p50, 6), 'p99': round(p99, 6)}
+            if name == 'stage_seconds':
+                result['stages'][dict(key)['stage']] = stats
+            else:
+                result.setdefault('histograms', {}).setdefault(name, {})[",".join(f"{k}={v}" for k, v in key)] = stats
+        return result
+
+    # format d'exposition texte Prometheus
+    def to_prometheus(self):
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, list(histogram.bucket_counts), histogram.count, histogram.sum)
+                                for key, histogram in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, key), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+            lines.append(f"{METRIC_PREFIX}{name}{{{_label_text(key)}}} {value}" if key else f"{METRIC_PREFIX}{name} {value}")
+        for (name, key), bucket_counts, count, total in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+            labels = _label_text(key)
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + ['+Inf'], bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}")
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{METRIC_PREFIX}{name}_sum{suffix} {total}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{suffix} {count}")
+        return "\n".join(lines) + "\n"
+
+    # résumé lisible (fin de main.py)
+    def format_summary(self):
+        summary = self.summary()
+        counters = summary['counters']
+        total = lambda name: sum(counters.get(name, {}).values())
+        lines = [
+            f"HTTP: {total('http_requests_total')} requests, {total('http_bytes_downloaded_total') / 1024:.0f} KiB downloaded, "
+            f"{total('http_cache_hits_total')} cache hits, {total('http_retries_total')} retries, {total('http_errors_total')} errors.",
+            f"{'stage':<16} {'count':>7} {'total s':>9} {'avg ms':>8} {'p50 ms':>8} {'p99 ms':>8}",
+        ]
+        for stage, stats in summary['stages'].items():
+            lines.append(f"{stage:<16} {stats['count']:>7} {stats['total']:>9.2f} {stats['avg'] * 1000:>8.1f} "
+                         f"{stats['p50'] * 1000:>8.1f} {stats['p99'] * 1000:>8.1f}")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f)
+        os.replace(tmp_path, path) # le lecteur (app_front.py) ne voit jamais un fichier à moitié écrit
+
+
+# registre inerte quand les métriques sont désactivées (CRAWL_METRICS=0)
+class NullMetrics(Metrics):
+    def inc(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+
+# registre partagé par tout le process
+_metrics = Metrics() if METRICS_ENABLED else NullMetrics()
+
+def get_metrics():
+    return _metrics
+
+def reset_metrics():
+    global _metrics
+    _metrics = Metrics() if METRICS_ENABLED else NullMetrics()
+    return _metrics
+
+
+# --- export ---
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] == '/metrics':
+            body, content_type = get_metrics().to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+        elif self.path.split('?')[0] == '/metrics.json':
+            body, content_type = json.dumps(get_metrics().summary()), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # pas de log à chaque scrape Prometheus
+
+
+# serveur HTTP en tâche de fond : /metrics (Prometheus) et /metrics.json -> (serveur, URL)
+def start_metrics_server(port, host='127.0.0.1'):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/metrics"
+
+
+# écrit le résumé JSON dans path toutes les interval secondes (suivi en direct depuis un autre process)
+class JsonDumper:
+    def __init__(self, path, interval=DUMP_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._dump()
+
+    def _dump(self):
+        try:
+            get_metrics().write_json(self.path)
+        except OSError as e:
+            print(f"Could not write metrics to {self.path}: {e}")
+
+    # arrêt + dernière écriture (valeurs finales)
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._dump()
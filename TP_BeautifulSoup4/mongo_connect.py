@@ -1,26 +1,86 @@
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+import os
+import threading
+import time
 
-#CONFIG
-MONGO_URI = "mongodb://localhost:27017/" 
-DATABASE_NAME = "ipssi_webscraping"
-COLLECTION_NAME = "data"
+from pymongo import MongoClient, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
 
-# connection mangodb
-def connect_to_mongo():
+# custom
+import bodies
+import change_detection
+import mongo_indexes
+from assets import get_asset_store
+from dedup import canonicalize_url, get_duplicate_detector, stamp_signatures
+from search_index import get_search_index
+from metrics import get_metrics
+
+#CONFIG (surcharge possible par variables d'environnement)
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
+DATABASE_NAME = os.environ.get("MONGO_DB", "ipssi_webscraping")
+COLLECTION_NAME = os.environ.get("MONGO_COLLECTION", "data")
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 30000))
+HEALTH_CHECK_INTERVAL = int(os.environ.get("MONGO_HEALTH_CHECK_INTERVAL", 30)) # secondes entre 2 pings
+BULK_BATCH_SIZE = 100 # nb d'articles par bulk_write
+
+# client partagé par tout le process (créé au premier appel, pool de connexions géré par pymongo)
+_client = None
+_client_lock = threading.Lock()
+_last_health_check = 0.0
+_last_health_ok = False
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MongoClient(
+                MONGO_URI,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            )
+        return _client
+
+# ping du serveur : un succès reste valable HEALTH_CHECK_INTERVAL secondes (sauf force=True),
+# un échec est revérifié au prochain appel
+def check_health(force=False):
+    global _last_health_check, _last_health_ok
+    now = time.time()
+    if not force and _last_health_ok and now - _last_health_check < HEALTH_CHECK_INTERVAL:
+        return True
     try:
-        # création client mongo
-        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000) # Timeout after 5 seconds
-        client.admin.command('ismaster')
-        print("MongoDB connection successful!")
+        get_client().admin.command('ping')
+        if not _last_health_ok:
+            print("MongoDB connection successful!")
+        _last_health_ok = True
+    except PyMongoError as e:
+        print(f"Could not connect to MongoDB: {e}")
+        _last_health_ok = False
+    _last_health_check = now
+    return _last_health_ok
 
-        # accès à la database
-        db = client[DATABASE_NAME]
+def close_client():
+    global _client, _last_health_check, _last_health_ok
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        _last_health_check = 0.0
+        _last_health_ok = False
 
-        # accès à la table
-        collection = db[COLLECTION_NAME]
-        print(f"Successfully accessed database '{DATABASE_NAME}' and collection '{COLLECTION_NAME}'.")
+# connection mangodb (réutilise le client partagé)
+def connect_to_mongo():
+    try:
+        if not check_health():
+            return None
 
+        # accès à la database et à la table
+        collection = get_client()[DATABASE_NAME][COLLECTION_NAME]
         return collection
 
     except ConnectionFailure as e:
@@ -43,6 +103,149 @@ def insert_sample_data(collection, sample_data):
         print(f"Error inserting data: {e}")
         return None
 
+# écriture des articles par lots : upserts sur l'URL envoyés en un seul bulk_write non ordonné
+# remplace find_one + insert_one (2 allers-retours par article)
+# utilisé par main.py, async_crawler.py, work_queue.py et les pages Scrap_category / Scrap_article
+class BulkWriter:
+    # on_flush (optionnel) : appelé après chaque lot avec la liste des articles écrits (ou déjà présents)
+    # duplicate_detector (optionnel) : détecteur de quasi-doublons de ce writer (par défaut celui configuré par main.py)
+    def __init__(self, collection, batch_size=BULK_BATCH_SIZE, on_flush=None, duplicate_detector=None):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.duplicate_detector = duplicate_detector
+        self.buffer = []
+        self.counts = {'inserted': 0, 'skipped': 0, 'errors': 0}
+        mongo_indexes.ensure_indexes_once(collection)
+
+    def add(self, article):
+        self.buffer.append(article)
+        if len(self.buffer) >= self.batch_size:
+            return self.flush()
+        return None
+
+    def add_many(self, articles):
+        for article in articles:
+            self.add(article)
+
+    # envoie le buffer -> compteurs de ce lot (inserted, skipped, errors)
+    def flush(self):
+        batch_counts = {'inserted': 0, 'skipped': 0, 'errors': 0}
+        if not self.buffer:
+            return batch_counts
+
+        articles = self.buffer
+        failed_ops = set() # index des opérations en erreur
+        prepared = [] # (article, document, corps)
+        now = time.time()
+        for article in articles:
+            doc = mongo_indexes.normalize_article({key: value for key, value in article.items() if key != '_id'})
+            doc['url'] = canonicalize_url(doc.get('url'))
+            body = doc.pop('body', None) # jamais dans le document de l'article (collection bodies)
+            stamp_signatures(doc, body['text'] if body else None) # simhash, body_simhash
+            change_detection.stamp_new_article(doc, now) # content_hash, last_seen, last_changed
+            prepared.append((article, doc, body))
+        detector = self.duplicate_detector or get_duplicate_detector()
+        if detector is not None:
+            # quasi-doublons non repérés sur l'aperçu (corps, mode async/worker) : ignorés ou marqués
+            kept = {id(doc) for doc in detector.filter_documents([doc for _, doc, _ in prepared])}
+            batch_counts['skipped'] += len(prepared) - len(kept)
+            prepared = [item for item in prepared if id(item[1]) in kept]
+        self.buffer = []
+        if not prepared:
+            self._record(batch_counts, articles)
+            return batch_counts
+        asset_store = get_asset_store()
+        if asset_store is not None:
+            # images des seuls articles conservés, téléchargées en parallèle (main.py --assets)
+            # après les empreintes : les champs des images locales n'entrent pas dans content_hash
+            asset_store.process_articles([doc for _, doc, _ in prepared])
+
+        operations = []
+        docs = [] # documents envoyés (même ordre que les opérations)
+        article_bodies = [] # (index de l'opération, url, corps, body_hash) : main.py --bodies
+        for _, doc, body in prepared:
+            if body and doc.get('url'):
+                article_bodies.append((len(operations), doc['url'], body, doc.get('body_hash')))
+            docs.append(doc)
+            if doc.get('url'):
+                # insert si l'URL est nouvelle, sinon rien (article déjà présent = ignoré, mis à jour par refresh.py)
+                operations.append(UpdateOne({'url': doc['url']}, {'$setOnInsert': doc}, upsert=True))
+            else:
+                operations.append(InsertOne(doc))
+
+        metrics = get_metrics()
+        start = time.perf_counter()
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get('writeErrors', []):
+                # 11000 sur un upsert : URL insérée entre-temps par un autre process -> déjà présente
+                # (sur un InsertOne d'article sans URL c'est une vraie erreur : l'article n'est pas enregistré)
+                if error.get('code') == 11000 and docs[error['index']].get('url'):
+                    batch_counts['skipped'] += 1
+                else:
+                    print(f"  Error writing article (op #{error.get('index')}): {error.get('errmsg')}")
+                    batch_counts['errors'] += 1
+                    failed_ops.add(error.get('index'))
+        except PyMongoError as e:
+            print(f"  Error writing batch of {len(operations)} articles: {e}")
+            batch_counts['errors'] += len(operations)
+            failed_ops = set(range(len(operations)))
+            details = None
+
+        if details:
+            batch_counts['inserted'] += details.get('nUpserted', 0) + details.get('nInserted', 0)
+            batch_counts['skipped'] += details.get('nMatched', 0) # $setOnInsert : un article déjà en base n'est jamais modifié
+
+        metrics.observe('stage_seconds', time.perf_counter() - start, stage='db_write')
+        items = [(url, body, body_hash) for i, url, body, body_hash in article_bodies if i not in failed_ops]
+        if items:
+            bodies.write_bodies(bodies.get_bodies_collection(self.collection), items)
+        search_index = get_search_index()
+        if search_index is not None and details:
+            # seuls les articles insérés (un article déjà en base est réindexé par refresh.py s'il change)
+            body_texts = {i: body['text'] for i, _, body, _ in article_bodies}
+            search_index.index_articles([dict(docs[upsert['index']], body_text=body_texts.get(upsert['index']))
+                                         for upsert in details.get('upserted', [])])
+        # articles traités = tous sauf ceux en erreur (quasi-doublons ignorés compris)
+        failed_articles = {id(prepared[i][0]) for i in failed_ops}
+        self._record(batch_counts, [article for article in articles if id(article) not in failed_articles])
+        return batch_counts
+
+    def _record(self, batch_counts, flushed_articles):
+        for key, value in batch_counts.items():
+            self.counts[key] += value
+            if value:
+                get_metrics().inc('articles_written_total', value, result=key)
+        if self.on_flush:
+            self.on_flush(flushed_articles)
+
+    def close(self):
+        self.flush()
+        return self.counts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# URLs déjà présentes en base parmi une liste (une seule requête, projection sur url)
+# utilisé par le mode incrémental de main.py
+def find_known_urls(collection, urls):
+    urls = [url for url in urls if url]
+    if not urls:
+        return set()
+    try:
+        return {doc['url'] for doc in collection.find({'url': {'$in': urls}}, {'url': 1, '_id': 0})}
+    except PyMongoError as e:
+        print(f"Error looking up known URLs: {e}")
+        return set()
+
 # récup la data de la bdd
 def find_all_data(collection):
     if collection is None:
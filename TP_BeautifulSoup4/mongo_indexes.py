@@ -0,0 +1,112 @@
+import threading
+
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+from pymongo.errors import PyMongoError
+
+# index de la collection des articles (créés/vérifiés au démarrage)
+# - url : unicité + recherche par URL (upserts, mode incrémental) ; partiel : plusieurs articles sans URL possibles
+# - (date_iso, _id) : tri et pagination de l'explorateur
+# - author_lc / tags_lc : filtres par préfixe sur les champs normalisés en minuscules
+# - texte (title, summary) : recherche $text de l'explorateur
+# - last_seen : mode refresh (articles les moins récemment vérifiés d'abord)
+# - simhash_bands (multiclé) : recherche des quasi-doublons (dedup.py)
+INDEXES = [
+    {'keys': [('url', ASCENDING)], 'name': 'url_unique', 'unique': True, 'partialFilterExpression': {'url': {'$type': 'string'}}},
+    {'keys': [('date_iso', DESCENDING), ('_id', DESCENDING)], 'name': 'date_iso_id'},
+    {'keys': [('author_lc', ASCENDING), ('date_iso', DESCENDING)], 'name': 'author_lc_date_iso'},
+    {'keys': [('tags_lc', ASCENDING), ('date_iso', DESCENDING)], 'name': 'tags_lc_date_iso'},
+    {'keys': [('title', TEXT), ('summary', TEXT)], 'name': 'title_summary_text',
+     'default_language': 'french', 'weights': {'title': 3, 'summary': 1}},
+    {'keys': [('last_seen', ASCENDING)], 'name': 'last_seen'},
+    {'keys': [('simhash_bands', ASCENDING)], 'name': 'simhash_bands'},
+]
+
+
+# options qui changent le comportement d'un index : un index existant avec d'autres valeurs est recréé
+REBUILT_OPTIONS = ('unique', 'partialFilterExpression')
+
+
+# crée les index manquants (create_index ne fait rien si l'index existe déjà) -> noms des index en échec
+def ensure_indexes(collection):
+    failed = []
+    try:
+        existing = collection.index_information()
+    except PyMongoError:
+        existing = {}
+    for spec in INDEXES:
+        options = {key: value for key, value in spec.items() if key != 'keys'}
+        try:
+            current = existing.get(spec['name'])
+            if current and any(current.get(key) != options.get(key) for key in REBUILT_OPTIONS):
+                # ex : url_unique créé avant le filtre partiel (un seul article sans URL accepté)
+                print(f"Rebuilding index '{spec['name']}' with its new definition.")
+                collection.drop_index(spec['name'])
+            collection.create_index(spec['keys'], **options)
+        except PyMongoError as e:
+            # ex : doublons d'URL déjà présents, index texte existant avec une autre définition
+            print(f"Could not create index '{spec['name']}': {e}")
+            failed.append(spec['name'])
+    return failed
+
+# collections dont les index ont été vérifiés par ce process : nom complet -> client
+# (un autre client, ex : autre serveur ou base de test, revérifie)
+_ensured = {}
+_ensured_lock = threading.Lock()
+
+# ensure_indexes une seule fois par collection et par process (BulkWriter : chaque run, lot de worker, sauvegarde de l'interface)
+def ensure_indexes_once(collection):
+    with _ensured_lock:
+        if _ensured.get(collection.full_name) is collection.database.client:
+            return []
+        failed = ensure_indexes(collection)
+        if not failed:
+            _ensured[collection.full_name] = collection.database.client
+        return failed
+
+# noms des index attendus absents de la collection
+def verify_indexes(collection):
+    try:
+        existing = set(collection.index_information().keys())
+    except PyMongoError as e:
+        print(f"Could not list indexes: {e}")
+        return [spec['name'] for spec in INDEXES]
+    return [spec['name'] for spec in INDEXES if spec['name'] not in existing]
+
+
+# normalisation pour les filtres (égalité / préfixe sur index)
+def normalize_text(value):
+    return value.strip().lower() if isinstance(value, str) else value
+
+# ajoute author_lc et tags_lc à un article
+def normalize_article(article):
+    article['author_lc'] = normalize_text(article.get('author'))
+    article['tags_lc'] = [normalize_text(tag) for tag in article.get('tags') or []]
+    return article
+
+# complète les articles enregistrés avant l'ajout des champs normalisés -> nb d'articles mis à jour
+def backfill_normalized_fields(collection, batch_size=500):
+    updated = 0
+    operations = []
+    try:
+        for doc in collection.find({'author_lc': {'$exists': False}}, {'author': 1, 'tags': 1}):
+            normalized = normalize_article({'author': doc.get('author'), 'tags': doc.get('tags')})
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'author_lc': normalized['author_lc'], 'tags_lc': normalized['tags_lc']}}))
+            if len(operations) >= batch_size:
+                updated += collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+    except PyMongoError as e:
+        print(f"Error while backfilling normalized fields: {e}")
+    return updated
+
+
+if __name__ == "__main__":
+    import mongo_connect as db_connector
+
+    articles_collection = db_connector.connect_to_mongo()
+    if articles_collection is not None:
+        ensure_indexes(articles_collection)
+        print(f"Backfilled normalized fields on {backfill_normalized_fields(articles_collection)} articles.")
+        missing = verify_indexes(articles_collection)
+        print(f"Missing indexes: {missing}" if missing else "All indexes present.")
@@ -1,8 +1,14 @@
 import streamlit as st
 import re
+import sqlite3
+import time
 
 # custom
 import mongo_connect as db_connector 
+import mongo_indexes
+import bodies # corps des articles (main.py --bodies)
+import search_index as local_search # index de recherche local (SQLite FTS5)
+from assets import local_image # miniatures locales (main.py --assets)
 
 st.set_page_config(layout="wide")
 
@@ -15,10 +21,33 @@ def get_db_collection():
     collection = db_connector.connect_to_mongo()
     if collection is None:
         st.error("❌ Échec de la connexion à MongoDB. Vérifiez que le serveur est lancé et accessible.")
+    else:
+        # index des filtres + champs normalisés des anciens articles (une fois par process)
+        mongo_indexes.ensure_indexes(collection)
+        mongo_indexes.backfill_normalized_fields(collection)
+        missing = mongo_indexes.verify_indexes(collection)
+        if missing:
+            st.warning(f"Index manquants : {', '.join(missing)}. Les recherches peuvent être lentes.")
     return collection
 
 articles_collection = get_db_collection()
 
+# index de recherche local : complété au démarrage avec les articles absents ou modifiés, puis tenu à jour par main.py
+# (et par les scrapings lancés depuis les autres pages de l'application, même process)
+@st.cache_resource
+def get_search_index(_collection):
+    if _collection is None or not local_search.SEARCH_INDEX_ENABLED:
+        return None
+    try:
+        index = local_search.configure_search_index()
+        local_search.sync_from_mongo(_collection, index)
+    except sqlite3.Error as e:
+        st.warning(f"Index de recherche local indisponible ({e}) : recherche MongoDB $text utilisée.")
+        return None
+    return index
+
+search_index = get_search_index(articles_collection)
+
 # requêtes MongoDB
 def build_mongo_query(start_date, end_date, author, category_or_tag, title_substring):
     query = {}
@@ -29,21 +58,82 @@ def build_mongo_query(start_date, end_date, author, category_or_tag, title_subst
         date_query["$lte"] = end_date.strftime('%Y-%m-%d')
     if date_query:
         query["date_iso"] = date_query
+    # préfixe ancré sur les champs en minuscules -> utilise les index author_lc / tags_lc
     if author:
-        query["author"] = {"$regex": re.escape(author), "$options": "i"}
+        query["author_lc"] = {"$regex": "^" + re.escape(mongo_indexes.normalize_text(author))}
     if category_or_tag:
-        query["tags"] = {"$regex": re.escape(category_or_tag), "$options": "i"}
+        query["tags_lc"] = {"$regex": "^" + re.escape(mongo_indexes.normalize_text(category_or_tag))}
+    # recherche plein texte (index texte sur title + summary)
     if title_substring:
-        query["title"] = {"$regex": re.escape(title_substring), "$options": "i"}
+        query["$text"] = {"$search": title_substring}
     return query
 
+# champs lourds exclus de la liste, chargés seulement à la demande pour une carte
+# (le corps des articles est dans une collection séparée, jamais lu par les requêtes de liste)
+LIST_PROJECTION = {"content_images": 0}
+SORT_ORDER = [("date_iso", -1), ("_id", -1)]
+PAGE_SIZE_OPTIONS = [10, 20, 50, 100]
+
+# total des résultats (requête séparée, mise en cache quelques secondes)
+@st.cache_data(ttl=30)
+def count_articles(_collection, query):
+    return _collection.count_documents(query)
+
+# images du contenu d'un article (chargées quand la carte est dépliée)
+@st.cache_data(ttl=300)
+def get_content_images(_collection, article_id):
+    doc = _collection.find_one({"_id": article_id}, {"content_images": 1})
+    return doc.get("content_images", []) if doc else []
+
+# texte de l'article (collection bodies, décompressé quand la carte est dépliée), None s'il n'est pas enregistré
+@st.cache_data(ttl=300)
+def get_body_text(_collection, url):
+    body = bodies.load_body(bodies.get_bodies_collection(_collection), url)
+    return body['text'] if body else None
+
+# recherche par mots-clés dans l'index local (classement BM25, préfixes, fautes de frappe)
+# -> (articles de la page, chargés depuis MongoDB dans l'ordre du classement, nb total, extraits surlignés)
+def search_page(collection, index, text, author, category_or_tag, start_date, end_date, offset, page_size):
+    start = time.perf_counter()
+    hits, total, corrections = index.search(
+        text, author, category_or_tag,
+        start_date.strftime('%Y-%m-%d') if start_date else None, end_date.strftime('%Y-%m-%d') if end_date else None,
+        limit=page_size, offset=offset)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    urls = [hit["url"] for hit in hits]
+    docs = {doc["url"]: doc for doc in collection.find({"url": {"$in": urls}}, LIST_PROJECTION)} if urls else {}
+    caption = f"Recherche locale : {total} résultat(s) classés en {elapsed_ms:.1f} ms."
+    if corrections:
+        caption += " Mots proches utilisés : " + ", ".join(f"{term} → {' / '.join(words)}" for term, words in corrections.items())
+    st.caption(caption)
+    return [docs[url] for url in urls if url in docs], total, {hit["url"]: hit["snippet"] for hit in hits}
+
+# pagination par curseur sur (date_iso, _id) : la page suivante commence après le dernier article affiché
+# (les articles sans date sont triés en dernier)
+def keyset_condition(last_date, last_id):
+    if last_date is None:
+        return {"date_iso": None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {"date_iso": {"$lt": last_date}},
+        {"date_iso": last_date, "_id": {"$lt": last_id}},
+        {"date_iso": None},
+    ]}
+
+def fetch_page(collection, query, cursor, page_size):
+    page_query = dict(query)
+    if cursor is not None:
+        # $and séparé : $text doit rester au premier niveau de la requête
+        page_query["$and"] = [keyset_condition(*cursor)]
+    return list(collection.find(page_query, LIST_PROJECTION).sort(SORT_ORDER).limit(page_size))
+
 # sidebar
 st.sidebar.header("🔍 Filtres de Recherche")
-title_input = st.sidebar.text_input("Titre", key="search_title")
-author_input = st.sidebar.text_input("Auteur", key="search_author")
-category_input = st.sidebar.text_input("Tag ou Catégorie", key="search_category")
+title_input = st.sidebar.text_input("Mots-clés (titre, résumé, auteur, tags, texte)", key="search_title")
+author_input = st.sidebar.text_input("Auteur (début du nom)", key="search_author")
+category_input = st.sidebar.text_input("Tag ou Catégorie (début du tag)", key="search_category")
 start_date_input = st.sidebar.date_input("Date de début", value=None, key="search_start_date")
 end_date_input = st.sidebar.date_input("Date de fin", value=None, key="search_end_date")
+page_size = st.sidebar.selectbox("Articles par page", PAGE_SIZE_OPTIONS, index=1, key="page_size")
 
 # afficher les articles
 if articles_collection is not None:
@@ -51,15 +141,33 @@ if articles_collection is not None:
     query = build_mongo_query(start_date_input, end_date_input, author_input, category_input, title_input)
     st.subheader(f"Résultats ({'Filtres actifs' if query else 'Tous les articles'})")
 
+    # mots-clés : résultats classés par l'index local (curseur = décalage), sinon pagination MongoDB par curseur
+    ranked = search_index is not None and bool(title_input.strip())
+
+    # curseurs des pages déjà vues (retour arrière), remis à zéro quand les filtres changent
+    query_signature = (repr(query), page_size, ranked)
+    if st.session_state.get("query_signature") != query_signature:
+        st.session_state.query_signature = query_signature
+        st.session_state.page_cursors = [None]
+
     try:
-        filtered_articles = list(articles_collection.find(query).sort("date_iso", -1))
-        if not filtered_articles:
+        page_index = len(st.session_state.page_cursors) - 1
+        snippets = {}
+        if ranked:
+            page_articles, total_count, snippets = search_page(
+                articles_collection, search_index, title_input, author_input, category_input, start_date_input, end_date_input,
+                st.session_state.page_cursors[-1] or 0, page_size)
+        else:
+            total_count = count_articles(articles_collection, query)
+            page_articles = fetch_page(articles_collection, query, st.session_state.page_cursors[-1], page_size)
+        if not page_articles:
             st.warning("Aucun article ne correspond à vos critères.")
         else:
-            st.info(f"{len(filtered_articles)} article(s) trouvé(s).")
+            total_pages = max(1, -(-total_count // page_size))
+            st.info(f"{total_count} article(s) trouvé(s). Page {page_index + 1} / {total_pages}.")
             num_columns = 2
             cols = st.columns(num_columns)
-            for i, article in enumerate(filtered_articles):
+            for i, article in enumerate(page_articles):
                 col_index = i % num_columns
                 with cols[col_index]:
                     with st.container(border=True):
@@ -67,8 +175,12 @@ if articles_collection is not None:
                             st.subheader(f"[{article['title']}]({article['url']})")
                         elif article.get("title"):
                             st.subheader(article['title'])
-                        if article.get("thumbnail"):
-                            st.image(article["thumbnail"], use_column_width=True)
+                        if snippets.get(article.get("url")):
+                            st.markdown(snippets[article["url"]])
+                        # miniature locale compacte si l'article est passé par l'étape assets, sinon image distante
+                        thumbnail = local_image(article.get("thumbnail_local")) or article.get("thumbnail")
+                        if thumbnail:
+                            st.image(thumbnail, use_column_width=True)
                         meta_info = []
                         if article.get("author"): meta_info.append(f"👤 {article['author']}")
                         if article.get("date_iso"): meta_info.append(f"📅 {article['date_iso']}")
@@ -80,10 +192,38 @@ if articles_collection is not None:
                         if article.get("summary"):
                             with st.expander("Résumé"): st.write(article["summary"])
                         if article.get("url"): st.link_button("Lire l'article ↗️", article["url"])
-                        if article.get("content_images"):
-                             with st.expander(f"{len(article['content_images'])} image(s)"):
-                                 for img_data in article["content_images"]:
-                                     st.image(img_data.get("url"), caption=img_data.get("caption_or_alt", ""), use_column_width=True)
+                        if article.get("url") and st.toggle("📄 Texte de l'article", key=f"body_{article['_id']}"):
+                            body_text = get_body_text(articles_collection, article["url"])
+                            if body_text:
+                                st.write(body_text)
+                            else:
+                                st.caption("Texte non enregistré (scraping avec main.py --bodies).")
+                        # images chargées seulement si demandées
+                        if st.toggle("🖼️ Images du contenu", key=f"images_{article['_id']}"):
+                            content_images = get_content_images(articles_collection, article["_id"])
+                            if not content_images:
+                                st.caption("Aucune image.")
+                            for img_data in content_images:
+                                st.image(local_image(img_data.get("thumb_path")) or img_data.get("url"),
+                                         caption=img_data.get("caption_or_alt", ""), use_column_width=True)
+
+            # navigation
+            nav_prev, nav_info, nav_next = st.columns([1, 2, 1])
+            with nav_prev:
+                if st.button("◀ Précédent", disabled=page_index == 0, use_container_width=True):
+                    st.session_state.page_cursors.pop()
+                    st.rerun()
+            with nav_info:
+                st.caption(f"Page {page_index + 1} / {total_pages}")
+            with nav_next:
+                has_next = (page_index + 1) * page_size < total_count and (ranked or len(page_articles) == page_size)
+                if st.button("Suivant ▶", disabled=not has_next, use_container_width=True):
+                    if ranked:
+                        st.session_state.page_cursors.append((page_index + 1) * page_size)
+                    else:
+                        last_article = page_articles[-1]
+                        st.session_state.page_cursors.append((last_article.get("date_iso"), last_article["_id"]))
+                    st.rerun()
     except Exception as e:
         st.error(f"Erreur lors de la récupération des articles : {e}")
 else:
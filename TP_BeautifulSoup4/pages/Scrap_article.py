@@ -1,10 +1,11 @@
 import streamlit as st
 import requests
-from pymongo.errors import PyMongoError
 
 # custom
 import TP_BeautifulSoup4 as scraper
 import mongo_connect as db_connector
+import dedup
+import search_index
 
 
 # cache de session
@@ -91,16 +92,21 @@ if st.session_state.article_data_to_display:
     if st.button("Sauvegarder cet article dans MongoDB", key="save_scraped"):
         collection = db_connector.connect_to_mongo()
         if collection is not None:
-            try:
-                existing = collection.find_one({'url': article_data['url']})
-                if existing:
-                    st.warning(f"Cet article (URL: {article_data['url']}) existe déjà dans la base de données (ID: {existing['_id']}).")
-                else:
-                    insert_result = collection.insert_one(article_data)
-                    st.success(f"Article sauvegardé avec succès ! (ID: {insert_result.inserted_id})")
-            except PyMongoError as e:
-                st.error(f"Erreur MongoDB lors de la sauvegarde : {e}")
-            except Exception as e:
-                st.error(f"Erreur inattendue lors de la sauvegarde : {e}")
+            # même chemin d'écriture que main.py : URL canonique, empreintes, quasi-doublons, corps, index de recherche
+            search_index.ensure_search_index()
+            detector = dedup.make_duplicate_detector(collection)
+            writer = db_connector.BulkWriter(collection, duplicate_detector=detector)
+            writer.add(dict(article_data))
+            counts = writer.close()
+
+            duplicate = detector is not None and detector.stats['articles'] > 0
+            if duplicate and detector.policy == dedup.SKIP:
+                st.warning("Cet article est un quasi-doublon d'un article déjà en base : il n'a pas été sauvegardé.")
+            elif counts['inserted']:
+                st.success("Article sauvegardé avec succès !" + (" (marqué comme quasi-doublon, champ duplicate_of)" if duplicate else ""))
+            elif counts['errors']:
+                st.error("Erreur MongoDB lors de la sauvegarde (détails dans la console).")
+            else:
+                st.warning(f"Cet article (URL: {article_data['url']}) existe déjà dans la base de données.")
         else:
             st.error("Connexion à MongoDB échouée, impossible de sauvegarder.")
@@ -1,13 +1,16 @@
 import streamlit as st
-from pymongo.errors import PyMongoError #debug pour error mongo
 import requests
 
 # custom
 import TP_BeautifulSoup4 as scraper
 import mongo_connect as db_connector
+import dedup
+import search_index
+from assets import local_image # miniatures locales (main.py --assets)
 
 #CONFIG
 BASE_URL = "https://www.blogdumoderateur.com/"
+NUM_COLUMNS = 2 # nb col des cartes
 
 # récupérer les URLs des catégories
 @st.cache_data(ttl=3600) # cache 1 heure
@@ -17,6 +20,45 @@ def get_category_urls():
     print(f"Fetched URLs: {urls}")
     return urls
 
+# carte d'un article
+def render_article_card(article):
+    with st.container(border=True):
+        # titre
+        if article.get("title") and article.get("url"):
+            st.subheader(f"[{article['title']}]({article['url']})")
+        elif article.get("title"):
+            st.subheader(article['title'])
+
+        # miniature
+        thumbnail = local_image(article.get("thumbnail_local")) or article.get("thumbnail")
+        if thumbnail:
+            st.image(thumbnail, use_column_width=True)
+
+        # auteur, date, tags
+        meta_info = []
+        if article.get("author"): meta_info.append(f"👤 {article['author']}")
+        if article.get("date_iso"): meta_info.append(f"📅 {article['date_iso']}")
+        elif article.get("date_display"): meta_info.append(f"📅 {article['date_display']}")
+        if article.get("tags"):
+            tags_str = ", ".join(article["tags"]) # joint les tags en une seule chaîne
+            meta_info.append(f"🏷️ Tags: {tags_str}")
+        if meta_info: st.caption(" | ".join(meta_info))
+
+        # résumé
+        if article.get("summary"):
+            with st.expander("Résumé"): st.write(article["summary"])
+
+        # bouton "Lire l'article"
+        if article.get("url"): st.link_button("Lire l'article ↗️", article["url"])
+
+        # images de l'article
+        if article.get("content_images"):
+             with st.expander(f"{len(article['content_images'])} image(s) dans le contenu"):
+                 for img_data in article["content_images"]:
+                     st.image(local_image(img_data.get("thumb_path")) or img_data.get("url"),
+                              caption=img_data.get("caption_or_alt", ""), use_column_width=True)
+
+
 # cache de session
 if 'category_articles_to_display' not in st.session_state:
     st.session_state.category_articles_to_display = None
@@ -55,8 +97,18 @@ if scrape_category_button and st.session_state.selected_category_url:
     selected_url = st.session_state.selected_category_url
     with st.spinner(f"Scraping de la catégorie et des détails des articles : {selected_url}..."):
         try:
-            # Utiliser la nouvelle fonction fusionnée
-            articles_data = scraper.scrape_articles_from_listing(selected_url)
+            # les cartes s'affichent dès que chaque article est récupéré
+            articles_data = []
+            live_placeholder = st.empty()
+            with live_placeholder.container():
+                progress_text = st.empty()
+                live_cols = st.columns(NUM_COLUMNS)
+                for article in scraper.iter_articles_from_listing(selected_url):
+                    with live_cols[len(articles_data) % NUM_COLUMNS]:
+                        render_article_card(article)
+                    articles_data.append(article)
+                    progress_text.caption(f"{len(articles_data)} article(s) récupéré(s)...")
+            live_placeholder.empty() # remplacé par l'affichage complet ci-dessous
 
             if not articles_data:
                 st.warning("Aucun article trouvé sur cette page ou erreur lors du scraping.")
@@ -83,44 +135,10 @@ if st.session_state.category_articles_to_display:
     st.info(f"{len(articles_data)} article(s) trouvé(s). Prêt(s) à être sauvegardé(s).")
 
     # mise en page
-    num_columns = 2 # nb col
-    cols = st.columns(num_columns)
+    cols = st.columns(NUM_COLUMNS)
     for i, article in enumerate(articles_data):
-        col_index = i % num_columns
-        with cols[col_index]:
-            with st.container(border=True):
-                # titre
-                if article.get("title") and article.get("url"):
-                    st.subheader(f"[{article['title']}]({article['url']})")
-                elif article.get("title"):
-                    st.subheader(article['title'])
-
-                # miniature
-                if article.get("thumbnail"):
-                    st.image(article["thumbnail"], use_column_width=True)
-
-                # auteur, date, tags
-                meta_info = []
-                if article.get("author"): meta_info.append(f"👤 {article['author']}")
-                if article.get("date_iso"): meta_info.append(f"📅 {article['date_iso']}")
-                elif article.get("date_display"): meta_info.append(f"📅 {article['date_display']}")
-                if article.get("tags"):
-                    tags_str = ", ".join(article["tags"]) # joint les tags en une seule chaîne
-                    meta_info.append(f"🏷️ Tags: {tags_str}")
-                if meta_info: st.caption(" | ".join(meta_info))
-
-                # résumé
-                if article.get("summary"):
-                    with st.expander("Résumé"): st.write(article["summary"])
-
-                # bouton "Lire l'article"
-                if article.get("url"): st.link_button("Lire l'article ↗️", article["url"])
-
-                # images de l'article
-                if article.get("content_images"):
-                     with st.expander(f"{len(article['content_images'])} image(s) dans le contenu"):
-                         for img_data in article["content_images"]:
-                             st.image(img_data.get("url"), caption=img_data.get("caption_or_alt", ""), use_column_width=True)
+        with cols[i % NUM_COLUMNS]:
+            render_article_card(article)
 
     st.divider()
 
@@ -128,32 +146,24 @@ if st.session_state.category_articles_to_display:
     if st.button(f"Sauvegarder les {len(articles_data)} articles dans MongoDB", key="save_category_articles"):
         collection = db_connector.connect_to_mongo()
         if collection is not None:
-            inserted_count = 0
-            skipped_count = 0
-            error_count = 0
             with st.spinner("Sauvegarde des articles en cours..."):
-                for article in articles_data:
-                    try:
-                        # verif si l'URL existe déjà
-                        if article.get('url'):
-                            existing = collection.find_one({'url': article['url']})
-                            if existing:
-                                skipped_count += 1
-                                continue
-                        collection.insert_one(article)
-                        inserted_count += 1
-                    except PyMongoError as e:
-                        st.warning(f"Erreur MongoDB lors de la sauvegarde de '{article.get('title', 'N/A')}': {e}")
-                        error_count += 1
-                    except Exception as e:
-                        st.warning(f"Erreur inattendue lors de la sauvegarde de '{article.get('title', 'N/A')}': {e}")
-                        error_count += 1
-
-            st.success(f"Sauvegarde terminée : {inserted_count} articles insérés.")
-            if skipped_count > 0:
-                st.info(f"{skipped_count} articles déjà présents ont été ignorés.")
-            if error_count > 0:
-                st.error(f"{error_count} erreurs rencontrées lors de la sauvegarde.")
+                # upserts par lots sur l'URL (index unique), les articles déjà présents sont ignorés
+                # même chemin d'écriture que main.py : quasi-doublons vérifiés, index de recherche tenu à jour
+                search_index.ensure_search_index()
+                detector = dedup.make_duplicate_detector(collection)
+                writer = db_connector.BulkWriter(collection, duplicate_detector=detector)
+                writer.add_many(articles_data)
+                counts = writer.close()
+
+            st.success(f"Sauvegarde terminée : {counts['inserted']} articles insérés.")
+            duplicates = detector.stats['articles'] if detector is not None else 0
+            skipped_duplicates = duplicates if duplicates and detector.policy == dedup.SKIP else 0 # comptés dans skipped
+            if duplicates:
+                st.info(f"{duplicates} quasi-doublons d'articles déjà en base " + ("ignorés." if skipped_duplicates else "marqués (champ duplicate_of)."))
+            if counts['skipped'] - skipped_duplicates > 0:
+                st.info(f"{counts['skipped'] - skipped_duplicates} articles déjà présents ont été ignorés.")
+            if counts['errors'] > 0:
+                st.error(f"{counts['errors']} erreurs rencontrées lors de la sauvegarde.")
 
         else:
             st.error("Connexion à MongoDB échouée, impossible de sauvegarder.")
\ No newline at end of file
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# custom
+from metrics import get_metrics
+
+# étape de parsing multi-processus : le HTML brut (bytes) des pages articles est envoyé à un pool de processus
+# qui renvoie les dicts d'articles -> le parsing BeautifulSoup n'est plus limité à un cœur par le GIL
+# les threads (ou l'asyncio) ne font plus que les requêtes HTTP
+
+#CONFIG
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "0") or 0) or (os.cpu_count() or 1) # nb de processus (défaut : nb de cœurs)
+PARSE_CHUNK_SIZE = 16 # max de pages par envoi à un processus (gros lots)
+
+
+# --- côté processus worker ---
+
+# une page article -> dict de l'article (fonction au niveau module pour être picklable)
+def parse_article_job(job):
+    import TP_BeautifulSoup4 as scraper # import ici : évite l'import circulaire, chargé une fois par processus
+
+    body, encoding, data, title_preview = job
+    html = body.decode(encoding, errors='replace') if encoding else body # sans encodage -> détection par BeautifulSoup
+    return scraper.parse_article_details(html, data, title_preview)
+
+
+# --- côté processus principal ---
+
+class ParsePool:
+    def __init__(self, workers=PARSE_WORKERS, chunk_size=PARSE_CHUNK_SIZE):
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    # une page -> Future du dict de l'article
+    # (les métriques parse / extract restent dans les processus du pool : on mesure ici l'aller-retour complet)
+    def submit(self, body, encoding, data, title_preview):
+        start = time.perf_counter()
+        future = self.executor.submit(parse_article_job, (body, encoding, data, title_preview))
+        future.add_done_callback(lambda _: get_metrics().observe('stage_seconds', time.perf_counter() - start, stage='parse_pool'))
+        return future
+
+    # lot de jobs (body, encoding, data, title_preview) -> liste des dicts, dans l'ordre
+    # envoyés par paquets pour limiter le coût des échanges entre processus
+    def parse_many(self, jobs):
+        jobs = list(jobs)
+        if not jobs:
+            return []
+        chunk_size = min(self.chunk_size, max(1, len(jobs) // (self.workers * 4)))
+        return list(self.executor.map(parse_article_job, jobs, chunksize=chunk_size))
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+# pool partagé par le scraper (désactivé par défaut : parsing dans les threads de récupération)
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+def configure_parse_pool(workers=PARSE_WORKERS, **kwargs):
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.close()
+        _parse_pool = ParsePool(workers, **kwargs) if workers else None
+        return _parse_pool
+
+def get_parse_pool():
+    return _parse_pool
+
+def close_parse_pool():
+    configure_parse_pool(0)
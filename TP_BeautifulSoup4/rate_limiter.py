@@ -0,0 +1,197 @@
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+# custom
+from metrics import get_metrics
+
+#CONFIG (surcharge possible par variables d'environnement)
+RATE_LIMIT = os.environ.get("CRAWL_RATE_LIMIT", "1") != "0" # 0 = pas de limitation
+INITIAL_RATE = float(os.environ.get("CRAWL_INITIAL_RATE", 4.0)) # requêtes/s par host au démarrage
+MIN_RATE = float(os.environ.get("CRAWL_MIN_RATE", 0.2))
+MAX_RATE = float(os.environ.get("CRAWL_MAX_RATE", 20.0))
+BURST = 4 # requêtes envoyables d'un coup (taille du seau)
+ADDITIVE_INCREASE = 0.5 # +req/s par "aller-retour" réussi (AIMD)
+MULTIPLICATIVE_DECREASE = 0.5 # rate x 0.5 sur 429 / 503
+DECREASE_COOLDOWN = 1.0 # une seule baisse par seconde (les 429 d'une même rafale ne comptent qu'une fois)
+LATENCY_SLOWDOWN = 2.0 # latence > 2x la latence de référence -> le serveur sature
+LATENCY_DECREASE = 0.9 # rate x 0.9 dans ce cas
+LATENCY_SMOOTHING = 0.2 # poids de la dernière mesure dans la moyenne glissante
+THROTTLE_STATUSES = (429, 503)
+ROBOTS_USER_AGENT = "*"
+ROBOTS_TIMEOUT = 5 # secondes
+
+
+# seau à jetons d'un host : débit adapté en AIMD (hausse additive tant que tout va bien,
+# baisse multiplicative sur 429/503, baisse douce si la latence se dégrade)
+class HostBucket:
+    def __init__(self, rate=INITIAL_RATE, max_rate=MAX_RATE, min_rate=MIN_RATE, burst=BURST):
+        self.max_rate = max_rate # plafond (robots.txt crawl-delay / request-rate)
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = max(self.min_rate, min(rate, max_rate))
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0 # Retry-After
+        self.last_decrease = 0.0
+        self.latency = None # moyenne glissante
+        self.base_latency = None # meilleure latence observée (serveur non chargé)
+        self.stats = {'requests': 0, 'throttled': 0, 'slowdowns': 0}
+        self._lock = threading.Lock()
+
+    # réserve un jeton -> secondes à attendre avant d'envoyer la requête
+    # (le solde peut devenir négatif : chaque appelant reçoit son propre créneau)
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self.blocked_until - now)
+
+    def record(self, status, latency, throttled=False, retry_after=None):
+        with self._lock:
+            self.stats['requests'] += 1
+            if throttled or status in THROTTLE_STATUSES:
+                self.stats['throttled'] += 1
+                now = time.monotonic()
+                if now - self.last_decrease >= DECREASE_COOLDOWN:
+                    self.rate = max(self.min_rate, self.rate * MULTIPLICATIVE_DECREASE)
+                    self.last_decrease = now
+                self.tokens = min(self.tokens, 0.0)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+                return
+
+            if latency is None:
+                return
+            self.latency = latency if self.latency is None else (1 - LATENCY_SMOOTHING) * self.latency + LATENCY_SMOOTHING * latency
+            self.base_latency = self.latency if self.base_latency is None else min(self.base_latency, self.latency)
+            if self.latency > LATENCY_SLOWDOWN * self.base_latency and self.latency - self.base_latency > 0.05:
+                self.stats['slowdowns'] += 1
+                self.rate = max(self.min_rate, self.rate * LATENCY_DECREASE)
+            else:
+                # ~ +ADDITIVE_INCREASE req/s par seconde de réponses réussies
+                self.rate = min(self.max_rate, self.rate + ADDITIVE_INCREASE / max(self.rate, 1.0))
+
+
+# "120", ou date HTTP -> secondes (None si absent / illisible)
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# robots.txt lu par le client HTTP partagé (mêmes en-têtes que le scraper, keep-alive)
+# hors limiteur : il est lu pendant la création du seau du host
+def fetch_robots_txt(robots_url):
+    from http_client import get_fetcher # import ici : évite l'import circulaire (http_client importe ce module)
+    try:
+        response = get_fetcher().get(robots_url, use_cache=False, rate_limit=False, timeout=ROBOTS_TIMEOUT)
+    except requests.exceptions.RequestException:
+        return None
+    return response.text if response.status_code == 200 else None
+
+
+# limiteur partagé par tous les chemins de récupération (Fetcher, crawler asyncio) : un seau par host,
+# plafonné par le Crawl-delay / Request-rate de robots.txt (lu une fois par host)
+class RateLimiter:
+    def __init__(self, initial_rate=INITIAL_RATE, max_rate=MAX_RATE, min_rate=MIN_RATE, burst=BURST,
+                 user_agent=ROBOTS_USER_AGENT, robots_fetcher=fetch_robots_txt):
+        self.initial_rate = initial_rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.user_agent = user_agent
+        self.robots_fetcher = robots_fetcher # None = robots.txt ignoré
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    # plafond de débit imposé par robots.txt (req/s) ou None
+    # (robotparser ne lit que les Crawl-delay entiers)
+    def robots_rate_cap(self, scheme, host):
+        if self.robots_fetcher is None:
+            return None
+        text = self.robots_fetcher(f"{scheme}://{host}/robots.txt")
+        if not text:
+            return None
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        parser.modified() # sinon crawl_delay() / request_rate() renvoient None
+        caps = []
+        crawl_delay = parser.crawl_delay(self.user_agent)
+        if crawl_delay:
+            caps.append(1.0 / float(crawl_delay))
+        request_rate = parser.request_rate(self.user_agent)
+        if request_rate and request_rate.seconds:
+            caps.append(request_rate.requests / request_rate.seconds)
+        return min(caps) if caps else None
+
+    def bucket(self, url):
+        parsed = urlparse(url)
+        host = parsed.netloc
+        with self._lock:
+            bucket = self.buckets.get(host)
+        if bucket is not None:
+            return bucket
+
+        # robots.txt lu hors verrou (requête HTTP), un seul seau gardé si 2 threads arrivent en même temps
+        cap = self.robots_rate_cap(parsed.scheme or 'https', host)
+        max_rate = min(self.max_rate, cap) if cap else self.max_rate
+        burst = 1 if cap else self.burst # Crawl-delay : un intervalle entre chaque requête, pas de rafale
+        with self._lock:
+            if host not in self.buckets:
+                self.buckets[host] = HostBucket(min(self.initial_rate, max_rate), max_rate, self.min_rate, burst)
+            return self.buckets[host]
+
+    def wait(self, url):
+        delay = self.bucket(url).reserve()
+        get_metrics().observe('stage_seconds', delay, stage='rate_limit_wait')
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url):
+        bucket = await asyncio.to_thread(self.bucket, url) # 1er appel pour un host : lecture de robots.txt
+        delay = bucket.reserve()
+        get_metrics().observe('stage_seconds', delay, stage='rate_limit_wait')
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record(self, url, status, latency, throttled=False, retry_after=None):
+        self.bucket(url).record(status, latency, throttled, parse_retry_after(retry_after))
+
+    # {host: {rate, max_rate, latency, requests, throttled, slowdowns}}
+    def summary(self):
+        with self._lock:
+            buckets = dict(self.buckets)
+        return {host: dict(bucket.stats, rate=round(bucket.rate, 2), max_rate=round(bucket.max_rate, 2),
+                           latency=round(bucket.latency, 3) if bucket.latency is not None else None)
+                for host, bucket in buckets.items()}
+
+
+# instance partagée (créée au premier appel), None si CRAWL_RATE_LIMIT=0
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    global _rate_limiter
+    if not RATE_LIMIT:
+        return None
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
@@ -0,0 +1,154 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+# custom
+import TP_BeautifulSoup4 as scraper
+import bodies
+import change_detection
+import dedup
+from assets import get_asset_store
+from http_client import get_fetcher
+from metrics import get_metrics
+from search_index import get_search_index
+from utils.debug_color import debug_print
+
+# mode refresh (main.py --refresh) : les articles déjà en base sont récupérés à nouveau et comparés
+# (change_detection.py) ; seuls les champs modifiés sont réécrits, un article inchangé ne reçoit qu'un last_seen
+# regroupé avec les autres du lot (un seul update_many)
+# les pages passent par un GET conditionnel (classe 'refresh' = jamais fraîche dans le cache HTTP) :
+# une réponse 304 signifie page identique à la dernière récupération -> pas de parsing
+
+#CONFIG
+REFRESH_BATCH_SIZE = 100 # articles vérifiés puis écrits par lot
+
+# résultat de la vérification d'un article
+NOT_MODIFIED = 'not_modified' # 304, page non parsée
+UNCHANGED = 'unchanged'
+CHANGED = 'changed'
+ERROR = 'error'
+
+PROJECTION = {field: 1 for field in change_detection.UPDATABLE_FIELDS + ('url', 'content_hash', 'body_hash', 'last_changed')}
+
+
+# récup + comparaison d'un article en base -> (statut, update MongoDB ou None, champs modifiés, version récupérée si modifié)
+def check_article(stored, per_host_limit=scraper.PER_HOST_LIMIT):
+    url = stored['url']
+    try:
+        with scraper._get_host_semaphore(url, per_host_limit):
+            response = get_fetcher().get(url, url_class='refresh', headers=scraper.headers)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        debug_print(f"  Refresh Error for {url}: {e}", level="error")
+        return ERROR, None, [], None
+    if response.timing['cache'] == 'revalidated' and stored.get('content_hash'):
+        return NOT_MODIFIED, None, [], None
+
+    # la catégorie (et le résumé si la page n'a pas de chapô) viennent de l'aperçu du listing : ceux en base sont gardés
+    fresh = {'url': url, 'title': None, 'summary': stored.get('summary'), 'author': None, 'date_display': None, 'date_iso': None,
+             'thumbnail': None, 'category': stored.get('category'), 'tags': [], 'content_images': []}
+    try:
+        scraper.parse_article_details(response.text, fresh, stored.get('title'))
+    except Exception as e:
+        debug_print(f"  Refresh Parsing Error for {url}: {e}", level="error")
+        return ERROR, None, [], None
+    fresh['content_hash'] = change_detection.content_hash(fresh)
+
+    changes = change_detection.changed_fields(stored, fresh)
+    asset_store = get_asset_store()
+    if asset_store is not None and ('thumbnail' in changes or 'content_images' in changes):
+        asset_store.process_articles([fresh]) # nouvelles images téléchargées (main.py --assets)
+    changes, update = change_detection.build_update(stored, fresh)
+    if update is None:
+        return UNCHANGED, None, [], None
+    # sans last_changed : article enregistré avant les empreintes, identique -> empreintes ajoutées seulement
+    if 'last_changed' not in update['$set']:
+        return UNCHANGED, update, changes, None
+    _update_signatures(update, fresh, 'title' in changes or 'summary' in changes,
+                       fresh.get('body') and stored.get('body_hash') != fresh.get('body_hash'))
+    return CHANGED, update, changes, fresh
+
+# empreintes SimHash (dedup.py) recalculées si le titre / résumé ou le corps ont changé
+def _update_signatures(update, fresh, text_changed, body_changed):
+    signed = dedup.stamp_signatures({'title': fresh['title'], 'summary': fresh['summary']},
+                                    fresh['body']['text'] if body_changed else None)
+    fields = (['simhash', 'simhash_bands'] if text_changed else []) + (['body_simhash'] if body_changed else [])
+    for field in fields:
+        if field in signed:
+            update['$set'][field] = signed[field]
+        else:
+            update.setdefault('$unset', {})[field] = "" # texte trop court
+
+
+# vérifie les articles en base (les moins récemment vus d'abord) -> compteurs
+# limit : nb max d'articles (0 = tous), date_cutoff : seulement les articles publiés depuis cette date
+def refresh_articles(collection, limit=0, date_cutoff=None, max_workers=scraper.MAX_WORKERS,
+                     per_host_limit=scraper.PER_HOST_LIMIT, batch_size=REFRESH_BATCH_SIZE, progress=None):
+    stats = {'checked': 0, NOT_MODIFIED: 0, UNCHANGED: 0, CHANGED: 0, ERROR: 0, 'written': 0, 'fields': {}}
+    query = {'url': {'$nin': [None, '']}}
+    if date_cutoff:
+        query['date_iso'] = {'$gte': date_cutoff}
+    cursor = collection.find(query, PROJECTION).sort('last_seen', 1)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    batch = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for stored in cursor:
+            batch.append(stored)
+            if len(batch) >= batch_size:
+                _refresh_batch(collection, executor, batch, per_host_limit, stats, progress)
+                batch = []
+        if batch:
+            _refresh_batch(collection, executor, batch, per_host_limit, stats, progress)
+    return stats
+
+def _refresh_batch(collection, executor, batch, per_host_limit, stats, progress):
+    results = list(executor.map(lambda stored: check_article(stored, per_host_limit), batch))
+    now = time.time()
+    operations = []
+    seen_ids = [] # inchangés : last_seen seul, en une requête
+    changed_bodies = []
+    changed_articles = []
+    for stored, (status, update, changes, fresh) in zip(batch, results):
+        stats['checked'] += 1
+        stats[status] += 1
+        for field in changes:
+            stats['fields'][field] = stats['fields'].get(field, 0) + 1
+        if update is not None:
+            operations.append(UpdateOne({'_id': stored['_id']}, update))
+            if status == CHANGED:
+                debug_print(f"  Changed: {stored['url']} ({', '.join(changes) or 'body'})", level="info")
+        elif status != ERROR:
+            seen_ids.append(stored['_id'])
+        if fresh is not None:
+            changed_articles.append(fresh)
+            # corps réécrit s'il a changé (main.py --bodies)
+            if fresh.get('body') and stored.get('body_hash') != fresh.get('body_hash'):
+                changed_bodies.append((stored['url'], fresh['body'], fresh.get('body_hash')))
+
+    metrics = get_metrics()
+    with metrics.timer('db_write'):
+        try:
+            if operations:
+                result = collection.bulk_write(operations, ordered=False)
+                stats['written'] += result.modified_count
+            if seen_ids:
+                collection.update_many({'_id': {'$in': seen_ids}}, {'$set': {'last_seen': now}})
+        except PyMongoError as e:
+            print(f"  Error writing refresh batch of {len(batch)} articles: {e}")
+    if changed_bodies:
+        bodies.write_bodies(bodies.get_bodies_collection(collection), changed_bodies, replace=True)
+    search_index = get_search_index()
+    if search_index is not None and changed_articles:
+        search_index.index_articles([dict(article, body_text=(article.get('body') or {}).get('text')) for article in changed_articles])
+    for status in (NOT_MODIFIED, UNCHANGED, CHANGED, ERROR):
+        count = sum(1 for result in results if result[0] == status)
+        if count:
+            metrics.inc('articles_refreshed_total', count, result=status)
+    if progress:
+        progress.emit('articles', articles_done=stats['checked'], changed=stats[CHANGED], unchanged=stats[UNCHANGED] + stats[NOT_MODIFIED],
+                      errors=stats[ERROR], rate=round(stats['checked'] / (time.time() - progress.started), 2))
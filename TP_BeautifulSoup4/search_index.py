@@ -0,0 +1,286 @@
+import argparse
+import difflib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+# custom
+import bodies
+from metrics import get_metrics
+
+# index de recherche local (SQLite FTS5) sur les articles : titre, résumé, auteur, tags et corps (main.py --bodies)
+# - texte découpé et sans accents ni majuscules (tokenizer unicode61, remove_diacritics) : "écran" = "ecran"
+# - classement BM25 (poids par champ), recherche par préfixe ("intellig" -> intelligence)
+# - tolérance aux fautes : un mot absent de l'index est remplacé par les mots proches du vocabulaire
+# - filtres auteur / tag / dates appliqués dans SQLite : MongoDB ne sert qu'à charger les articles de la page
+# tenu à jour pendant main.py par BulkWriter (nouveaux articles) et refresh.py (articles modifiés), synchronisé avec
+# la base au démarrage de l'explorateur ou par `python search_index.py` (--rebuild pour tout réindexer)
+
+#CONFIG (surcharge possible par variables d'environnement)
+SEARCH_INDEX_ENABLED = os.environ.get("SEARCH_INDEX", "1") != "0"
+SEARCH_INDEX_PATH = os.environ.get("SEARCH_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_index.sqlite"))
+FIELD_WEIGHTS = {'title': 5.0, 'summary': 2.0, 'author': 3.0, 'tags': 3.0, 'body': 1.0} # poids BM25 (ordre des colonnes)
+FUZZY_MAX_CANDIDATES = 3 # mots proches essayés pour un mot inconnu
+FUZZY_CUTOFF = 0.75 # similarité minimale (difflib, 0..1)
+MIN_PREFIX_LENGTH = 2 # mots plus courts cherchés tels quels
+SYNC_BATCH_SIZE = 500
+SNIPPET_TOKENS = 16
+
+WORD_RE = re.compile(r"[^\W_]+") # même découpage que unicode61 (le _ sépare les mots)
+
+
+# même normalisation que le tokenizer (minuscules, sans accents)
+def fold(text):
+    text = unicodedata.normalize('NFKD', text.lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+def query_terms(text):
+    return WORD_RE.findall(fold(text or ""))
+
+
+class SearchIndex:
+    def __init__(self, path=SEARCH_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE,
+                content_hash TEXT,
+                author_lc TEXT,
+                tags_lc TEXT,
+                date_iso TEXT,
+                indexed_at REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_docs_date_iso ON docs(date_iso)")
+        # préfixes de 2 à 4 caractères indexés : requêtes "mot*" sans parcours du vocabulaire
+        self._conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                {", ".join(FIELD_WEIGHTS)},
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3 4'
+            )""")
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS articles_vocab USING fts5vocab(articles_fts, 'row')")
+        self._conn.commit()
+        self._vocabulary = None # mots de l'index triés (recherche floue), rechargés quand l'index change
+        self._vocabulary_version = None
+
+    # articles (dicts de la base : url, title, summary, author, tags, date_iso, content_hash, body_text optionnel)
+    # -> nb d'articles (ré)indexés ; un article déjà indexé avec la même empreinte est ignoré
+    def index_articles(self, articles, force=False):
+        articles = [article for article in articles if article.get('url')]
+        if not articles:
+            return 0
+        try:
+            indexed = self._index_articles(articles, force)
+        except sqlite3.Error as e: # l'index se reconstruit depuis la base : une erreur ne bloque pas le scraping
+            print(f"  Search index error: {e}")
+            return 0
+        if indexed:
+            get_metrics().inc('search_indexed_total', indexed)
+        return indexed
+
+    def _index_articles(self, articles, force):
+        with get_metrics().timer('search_index'), self._lock:
+            known = dict(self._conn.execute(
+                f"SELECT url, content_hash FROM docs WHERE url IN ({','.join('?' * len(articles))})",
+                [article['url'] for article in articles]).fetchall())
+            indexed = 0
+            now = time.time()
+            for article in articles:
+                url = article['url']
+                if not force and url in known and known[url] is not None and known[url] == article.get('content_hash'):
+                    continue
+                tags = article.get('tags') or []
+                self._conn.execute(
+                    "INSERT INTO docs (url, content_hash, author_lc, tags_lc, date_iso, indexed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash, author_lc = excluded.author_lc, "
+                    "tags_lc = excluded.tags_lc, date_iso = excluded.date_iso, indexed_at = excluded.indexed_at",
+                    (url, article.get('content_hash'), fold(article.get('author') or ""),
+                     "\n" + "\n".join(fold(tag) for tag in tags) + "\n", article.get('date_iso'), now))
+                doc_id = self._conn.execute("SELECT id FROM docs WHERE url = ?", (url,)).fetchone()[0]
+                self._conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (doc_id,))
+                self._conn.execute(
+                    "INSERT INTO articles_fts (rowid, title, summary, author, tags, body) VALUES (?, ?, ?, ?, ?, ?)",
+                    (doc_id, article.get('title') or "", article.get('summary') or "", article.get('author') or "",
+                     " ".join(tags), article.get('body_text') or ""))
+                indexed += 1
+            self._conn.commit()
+        return indexed
+
+    # {url: content_hash} des articles indexés
+    def indexed_hashes(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT url, content_hash FROM docs").fetchall())
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM docs")
+            self._conn.execute("DELETE FROM articles_fts")
+            self._conn.commit()
+
+    # vocabulaire de l'index, rechargé si un autre process (main.py) a écrit depuis
+    def _load_vocabulary(self):
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0], self._conn.total_changes
+        if self._vocabulary is None or version != self._vocabulary_version:
+            self._vocabulary = [term for (term,) in self._conn.execute("SELECT term FROM articles_vocab ORDER BY term")]
+            self._vocabulary_version = version
+        return self._vocabulary
+
+    # mot de l'index commençant par term ?
+    def _has_prefix(self, term, vocabulary):
+        position = bisect_left(vocabulary, term)
+        return position < len(vocabulary) and vocabulary[position].startswith(term)
+
+    # mots proches d'un mot absent de l'index (fautes de frappe)
+    # candidats : même première lettre, longueur proche (le vocabulaire complet serait trop long à comparer)
+    def _close_terms(self, term, vocabulary):
+        candidates = [word for word in vocabulary[bisect_left(vocabulary, term[0]):bisect_left(vocabulary, chr(ord(term[0]) + 1))]
+                      if abs(len(word) - len(term)) <= 2]
+        return difflib.get_close_matches(term, candidates, n=FUZZY_MAX_CANDIDATES, cutoff=FUZZY_CUTOFF)
+
+    # requête + filtres -> (résultats [{url, score, snippet}], nb total, mots corrigés {mot: [proches]})
+    # score BM25 : plus petit = plus pertinent (convention SQLite)
+    def search(self, text, author=None, tag=None, start_date=None, end_date=None, limit=20, offset=0):
+        terms = query_terms(text)
+        if not terms:
+            return [], 0, {}
+        with get_metrics().timer('search'), self._lock:
+            vocabulary = self._load_vocabulary()
+            expressions = []
+            corrections = {}
+            for term in terms:
+                # mot exact s'il est très court, préfixe s'il existe dans l'index, sinon mots proches
+                if len(term) < MIN_PREFIX_LENGTH:
+                    expressions.append(f'"{term}"')
+                    continue
+                matches = [] if self._has_prefix(term, vocabulary) else self._close_terms(term, vocabulary)
+                if matches:
+                    corrections[term] = matches
+                    expressions.append("(" + " OR ".join(f'"{word}"' for word in matches) + ")")
+                else:
+                    expressions.append(f'"{term}"*')
+
+            conditions, params = ["articles_fts MATCH ?"], [" AND ".join(expressions)]
+            if author:
+                conditions.append("docs.author_lc LIKE ? ESCAPE '\\'")
+                params.append(_like_prefix(fold(author.strip())))
+            if tag:
+                conditions.append("docs.tags_lc LIKE ? ESCAPE '\\'")
+                params.append("%\n" + _like_prefix(fold(tag.strip())))
+            if start_date:
+                conditions.append("docs.date_iso >= ?")
+                params.append(start_date)
+            if end_date:
+                conditions.append("docs.date_iso <= ?")
+                params.append(end_date)
+            where = " AND ".join(conditions)
+            join = "articles_fts JOIN docs ON docs.id = articles_fts.rowid"
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {join} WHERE {where}", params).fetchone()[0]
+            weights = ", ".join(str(weight) for weight in FIELD_WEIGHTS.values())
+            rows = self._conn.execute(
+                f"SELECT docs.url, bm25(articles_fts, {weights}) AS score, "
+                f"snippet(articles_fts, -1, '**', '**', '…', {SNIPPET_TOKENS}) "
+                f"FROM {join} WHERE {where} ORDER BY score LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+        results = [{'url': url, 'score': score, 'snippet': snippet} for url, score, snippet in rows]
+        return results, total, corrections
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _like_prefix(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+# index partagé, mis à jour par BulkWriter / refresh.py (activé par main.py, None sinon : benchmarks, pages Streamlit)
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def configure_search_index(enabled=SEARCH_INDEX_ENABLED, **kwargs):
+    global _search_index
+    with _search_index_lock:
+        if _search_index is not None:
+            _search_index.close()
+        _search_index = SearchIndex(**kwargs) if enabled else None
+        return _search_index
+
+def get_search_index():
+    return _search_index
+
+# index partagé du process, configuré au premier besoin (pages de l'interface) -> None si désactivé ou indisponible
+def ensure_search_index():
+    if _search_index is None and SEARCH_INDEX_ENABLED:
+        try:
+            configure_search_index()
+        except sqlite3.Error as e:
+            print(f"Search index unavailable: {e}")
+    return _search_index
+
+
+# indexe les articles de la base absents de l'index ou modifiés depuis (empreinte différente) -> nb indexés
+# le corps (collection bodies) est indexé quand il a été enregistré
+def sync_from_mongo(collection, index, rebuild=False, batch_size=SYNC_BATCH_SIZE):
+    if rebuild:
+        index.clear()
+    known = index.indexed_hashes()
+    bodies_collection = bodies.get_bodies_collection(collection)
+    projection = {'url': 1, 'title': 1, 'summary': 1, 'author': 1, 'tags': 1, 'date_iso': 1, 'content_hash': 1, '_id': 0}
+    indexed = 0
+    batch = []
+    for article in collection.find({'url': {'$nin': [None, '']}}, projection):
+        if article['url'] in known and known[article['url']] is not None and known[article['url']] == article.get('content_hash'):
+            continue
+        batch.append(article)
+        if len(batch) >= batch_size:
+            indexed += _sync_batch(index, bodies_collection, batch)
+            batch = []
+    if batch:
+        indexed += _sync_batch(index, bodies_collection, batch)
+    return indexed
+
+def _sync_batch(index, bodies_collection, articles):
+    stored_bodies = {doc['_id']: doc for doc in bodies_collection.find({'_id': {'$in': [article['url'] for article in articles]}},
+                                                                       {'codec': 1, 'text': 1})}
+    for article in articles:
+        body = stored_bodies.get(article['url'])
+        if body:
+            article['body_text'] = bodies.decompress(body['text'], body['codec'])
+    return index.index_articles(articles, force=True)
+
+
+if __name__ == "__main__":
+    import mongo_connect as db_connector
+
+    parser = argparse.ArgumentParser(description="Synchronise l'index de recherche local avec la base, ou l'interroge.")
+    parser.add_argument("--rebuild", action="store_true", help="tout réindexer")
+    parser.add_argument("--query", help="recherche de test (affiche les 10 premiers résultats)")
+    args = parser.parse_args()
+
+    search_index = SearchIndex()
+    if args.query:
+        start = time.perf_counter()
+        results, total, corrections = search_index.search(args.query, limit=10)
+        print(f"{total} results in {(time.perf_counter() - start) * 1000:.1f} ms" + (f" (fuzzy: {corrections})" if corrections else ""))
+        for result in results:
+            print(f"  {result['score']:8.3f}  {result['url']}\n            {result['snippet']}")
+    else:
+        articles_collection = db_connector.connect_to_mongo()
+        if articles_collection is None:
+            print("Failed to connect to MongoDB. Exiting.")
+        else:
+            start = time.time()
+            print(f"Articles indexed: {sync_from_mongo(articles_collection, search_index, args.rebuild)} "
+                  f"({search_index.count()} in index, {time.time() - start:.2f}s)")
+    search_index.close()
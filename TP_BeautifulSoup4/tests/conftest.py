@@ -0,0 +1,68 @@
+import contextlib
+import functools
+import io
+import os
+import shutil
+import sys
+
+import mongomock
+import pytest
+
+# accès aux modules du projet (pytest lancé depuis la racine ou depuis TP_BeautifulSoup4/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedup
+import frontier
+import http_client
+import main
+import mongo_connect as db_connector
+from utils.replay_server import start_replay_server, DEFAULT_FIXTURES_DIR
+
+
+# base MongoDB en mémoire (mongomock) à la place du serveur : client partagé et ping remplacés
+@pytest.fixture
+def mongo_client(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(db_connector, "get_client", lambda: client)
+    monkeypatch.setattr(db_connector, "check_health", lambda *args, **kwargs: True)
+    yield client
+    dedup.configure_duplicate_detector(None) # détecteur configuré par main.py pendant le test
+
+@pytest.fixture
+def articles(mongo_client):
+    return mongo_client[db_connector.DATABASE_NAME][db_connector.COLLECTION_NAME]
+
+# copie des fixtures HTML (un test peut en retirer pour simuler une page en erreur) servie par le serveur de rejeu
+@pytest.fixture
+def fixtures_dir(tmp_path):
+    path = tmp_path / "fixtures"
+    shutil.copytree(DEFAULT_FIXTURES_DIR, path)
+    return path
+
+# serveur de rejeu -> (serveur, URL de base) ; server.requests = nb de requêtes reçues
+@pytest.fixture
+def replay_server(fixtures_dir):
+    server, url = start_replay_server(str(fixtures_dir))
+    yield server, url
+    server.shutdown()
+
+# URL du serveur de rejeu, fetcher partagé sans cache HTTP ni limitation de débit
+@pytest.fixture
+def site(replay_server):
+    http_client.configure_fetcher(use_cache=False, rate_limit=False)
+    return replay_server[1]
+
+# frontière de crawl de main.py dans le dossier du test
+@pytest.fixture
+def frontier_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "frontier.sqlite")
+    monkeypatch.setattr(frontier, "Frontier", functools.partial(frontier.Frontier, path=path))
+    return path
+
+# main.main sans sa sortie console -> sa valeur de retour
+@pytest.fixture
+def run_main(frontier_path):
+    def run(*args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return main.main(*args, **kwargs)
+    return run
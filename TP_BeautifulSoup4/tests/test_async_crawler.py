@@ -0,0 +1,24 @@
+import asyncio
+
+import async_crawler
+
+
+def test_async_crawl_totals_match_writes(articles, site):
+    # lots de l'async crawler de la taille de ceux du writer : chaque add_many écrit un lot complet
+    stats = asyncio.run(async_crawler.AsyncCrawler(site, articles, batch_size=5).run())
+    assert stats['articles_scraped'] > 5
+    assert stats['inserted'] == articles.count_documents({})
+    assert stats['inserted'] + stats['skipped'] + stats['errors'] == stats['articles_scraped']
+
+def test_async_crawl_is_idempotent(articles, site):
+    first = asyncio.run(async_crawler.AsyncCrawler(site, articles).run())
+    second = asyncio.run(async_crawler.AsyncCrawler(site, articles).run())
+    assert second['inserted'] == 0
+    assert articles.count_documents({}) == first['inserted']
+
+async def collect(listing_url):
+    return [article async for article in async_crawler.aiter_articles_from_listing(listing_url)]
+
+def test_aiter_articles_from_listing_yields_full_articles(site):
+    found = asyncio.run(collect(site + "web/"))
+    assert found and all(article.get('url') and article.get('title') for article in found)
@@ -0,0 +1,40 @@
+import mongo_connect as db_connector
+import mongo_indexes
+
+
+def make_article(i, **fields):
+    return dict({'url': f"https://www.blogdumoderateur.com/article-{i}/", 'title': f"Article {i}",
+                 'summary': f"Résumé numéro {i}", 'author': "Auteur", 'tags': ["Web"]}, **fields)
+
+
+def test_bulk_writer_counts_every_auto_flushed_batch(articles):
+    flushed = []
+    writer = db_connector.BulkWriter(articles, batch_size=5, on_flush=flushed.append)
+    writer.add_many(make_article(i) for i in range(12)) # 2 lots complets écrits par add
+    assert writer.counts['inserted'] == 10
+    counts = writer.close()
+    assert counts == {'inserted': 12, 'skipped': 0, 'errors': 0}
+    assert [len(batch) for batch in flushed] == [5, 5, 2]
+    assert articles.count_documents({}) == 12
+
+def test_bulk_writer_skips_known_urls(articles):
+    with db_connector.BulkWriter(articles) as writer:
+        writer.add_many(make_article(i) for i in range(3))
+    writer = db_connector.BulkWriter(articles)
+    writer.add_many(make_article(i) for i in range(5))
+    assert writer.close() == {'inserted': 2, 'skipped': 3, 'errors': 0}
+
+def test_bulk_writer_keeps_articles_without_url(articles):
+    writer = db_connector.BulkWriter(articles)
+    writer.add_many(make_article(i, url=None) for i in range(3))
+    assert writer.close() == {'inserted': 3, 'skipped': 0, 'errors': 0}
+    assert articles.count_documents({'url': None}) == 3
+
+def test_indexes_are_created_once_per_collection(articles, monkeypatch):
+    created = []
+    create_index = articles.create_index
+    monkeypatch.setattr(articles, "create_index", lambda *args, **kwargs: created.append(args) or create_index(*args, **kwargs))
+    for _ in range(3):
+        db_connector.BulkWriter(articles).close()
+    assert len(created) == len(mongo_indexes.INDEXES)
+    assert 'url_unique' in articles.index_information()
@@ -0,0 +1,145 @@
+import pytest
+
+import dedup
+
+
+ARTICLE = {
+    'url': "https://www.blogdumoderateur.com/google-recherche-chrome/",
+    'title': "Google lance une nouvelle fonctionnalité de recherche dans Chrome",
+    'summary': "Le navigateur de Google intègre désormais une recherche contextuelle alimentée par l'intelligence "
+               "artificielle, disponible en France dès cette semaine pour tous les utilisateurs.",
+}
+# même article republié sous une autre URL, un mot modifié
+REPOST = dict(ARTICLE, url="https://www.blogdumoderateur.com/tech/google-chrome-recherche/",
+              summary=ARTICLE['summary'].replace("France", "Europe"))
+OTHERS = [
+    {'url': "https://www.blogdumoderateur.com/mistral-ai-levee-de-fonds/", 'title': "Mistral AI lève 600 millions d'euros",
+     'summary': "La startup française spécialisée dans les modèles de langage annonce une levée de fonds record "
+                "auprès d'investisseurs américains et européens."},
+    {'url': "https://www.blogdumoderateur.com/wordpress-6-8-nouveautes/", 'title': "WordPress 6.8 : les nouveautés",
+     'summary': "La nouvelle version du CMS apporte un éditeur de site amélioré, de meilleures performances et une "
+                "gestion simplifiée des blocs réutilisables."},
+]
+
+
+def signed(article):
+    return dedup.stamp_signatures(dict(article))
+
+
+# --- URLs canoniques ---
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.blogdumoderateur.com/article/?utm_source=x&utm_medium=y&fbclid=z",
+     "https://www.blogdumoderateur.com/article/"),
+    ("https://www.blogdumoderateur.com/article/?page=2&utm_campaign=x&ref=home",
+     "https://www.blogdumoderateur.com/article/?page=2"),
+    ("https://www.blogdumoderateur.com/article/amp/", "https://www.blogdumoderateur.com/article/"),
+    ("https://www.blogdumoderateur.com:443/article/", "https://www.blogdumoderateur.com/article/"),
+    ("http://www.blogdumoderateur.com:80/article/", "http://www.blogdumoderateur.com/article/"),
+    ("http://127.0.0.1:8765/article/", "http://127.0.0.1:8765/article/"),
+    ("https://WWW.BlogDuModerateur.com/article", "https://www.blogdumoderateur.com/article/"),
+    ("https://www.blogdumoderateur.com/article/#comments", "https://www.blogdumoderateur.com/article/"),
+    ("https://www.blogdumoderateur.com/image.jpg", "https://www.blogdumoderateur.com/image.jpg"),
+    ("https://www.blogdumoderateur.com", "https://www.blogdumoderateur.com/"),
+])
+def test_canonicalize_url(url, expected):
+    assert dedup.canonicalize_url(url) == expected
+
+def test_canonicalize_url_keeps_missing_url():
+    assert dedup.canonicalize_url(None) is None
+
+
+# --- SimHash ---
+
+def test_simhash_is_close_for_a_reposted_article():
+    assert dedup.hamming(signed(ARTICLE)['simhash'], signed(REPOST)['simhash']) <= dedup.HAMMING_THRESHOLD
+
+def test_distinct_articles_do_not_collide():
+    values = [dedup.simhash(dedup.signature_text(article)) for article in [ARTICLE] + OTHERS]
+    for i, value in enumerate(values):
+        for other in values[i + 1:]:
+            assert dedup.hamming(value, other) > 3 * dedup.HAMMING_THRESHOLD
+
+def test_short_text_has_no_signature():
+    assert dedup.simhash("Chrome") is None
+    assert 'simhash' not in signed({'title': "Chrome", 'summary': None})
+
+def test_close_signatures_share_a_band():
+    value = dedup.simhash(dedup.signature_text(ARTICLE))
+    for bit in range(dedup.SIMHASH_BITS - 5):
+        flipped = value ^ (0b11111 << bit) # 5 bits d'écart
+        assert set(dedup.bands(value)) & set(dedup.bands(flipped))
+
+
+# --- détection ---
+
+@pytest.fixture
+def stored(articles):
+    articles.insert_many([signed(article) for article in [ARTICLE] + OTHERS])
+    return articles
+
+def test_skip_policy_drops_near_duplicate(stored):
+    detector = dedup.DuplicateDetector(stored, dedup.SKIP)
+    assert detector.filter_documents([signed(REPOST)]) == []
+    assert detector.stats['articles'] == 1
+
+def test_flag_policy_marks_near_duplicate(stored):
+    detector = dedup.DuplicateDetector(stored, dedup.FLAG)
+    kept = detector.filter_documents([signed(REPOST)])
+    assert len(kept) == 1
+    assert kept[0]['duplicate_of'] == ARTICLE['url']
+    assert kept[0]['duplicate_distance'] <= dedup.HAMMING_THRESHOLD
+
+def test_keep_policy_has_no_detector(articles):
+    assert dedup.make_duplicate_detector(articles, dedup.KEEP) is None
+
+def test_article_is_not_its_own_duplicate(stored):
+    detector = dedup.DuplicateDetector(stored, dedup.SKIP)
+    assert len(detector.filter_documents([signed(ARTICLE)])) == 1
+
+def test_duplicates_within_a_run_are_detected(articles):
+    detector = dedup.DuplicateDetector(articles, dedup.SKIP)
+    kept = detector.filter_documents([signed(ARTICLE), signed(REPOST)])
+    assert [doc['url'] for doc in kept] == [ARTICLE['url']]
+
+def test_filter_previews_uses_title_preview(stored):
+    detector = dedup.DuplicateDetector(stored, dedup.SKIP)
+    preview = {'url': REPOST['url'], 'title': None, 'summary': REPOST['summary']}
+    new = {'url': "https://www.blogdumoderateur.com/nouveau/", 'title': None,
+           'summary': "Un article sans rapport avec les autres, consacré aux réseaux sociaux et aux créateurs de contenu."}
+    kept = detector.filter_previews([(preview, REPOST['title']), (new, "Réseaux sociaux et créateurs")])
+    assert [data['url'] for data, _ in kept] == [new['url']]
+    assert detector.stats['previews'] == 1
+
+def test_body_signature_separates_articles_with_close_titles(articles):
+    articles.insert_one(dedup.stamp_signatures(dict(ARTICLE), "Premier corps d'article consacré au navigateur Chrome et à ses nouveautés de recherche pour le grand public."))
+    repost = dedup.stamp_signatures(dict(REPOST), "Un tout autre texte : comparatif des offres de stockage en ligne pour les entreprises et les indépendants.")
+    detector = dedup.DuplicateDetector(articles, dedup.SKIP)
+    assert len(detector.filter_documents([repost])) == 1
+
+
+# --- recherche par bandes ---
+
+def test_candidates_only_share_a_band(articles):
+    value = dedup.simhash(dedup.signature_text(ARTICLE))
+    edges = [dedup.SIMHASH_BITS * i // dedup.SIMHASH_BANDS for i in range(dedup.SIMHASH_BANDS + 1)]
+    same_first_band = value ^ sum(1 << edges[i] for i in range(1, dedup.SIMHASH_BANDS)) # 1 bit modifié dans chacune des 5 autres bandes
+    no_common_band = value ^ sum(1 << edges[i] for i in range(dedup.SIMHASH_BANDS))
+    for url, other in [("https://example.com/shared", same_first_band), ("https://example.com/none", no_common_band)]:
+        articles.insert_one({'url': url, 'simhash': dedup.to_signed(other), 'simhash_bands': dedup.bands(other)})
+
+    detector = dedup.DuplicateDetector(articles, dedup.SKIP)
+    candidates = detector._candidates([(value, None)])
+    assert [url for _, url in candidates] == ["https://example.com/shared"]
+    # 5 bits d'écart, une bande commune : quasi-doublon trouvé par la recherche
+    assert detector.filter_documents([{'url': "https://example.com/new", 'simhash': dedup.to_signed(value)}]) == []
+
+def test_find_duplicate_pairs(stored):
+    stored.insert_one(signed(REPOST))
+    pairs = dedup.find_duplicate_pairs(stored)
+    assert [(url, other_url) for url, other_url, _ in pairs] == [tuple(sorted((ARTICLE['url'], REPOST['url'])))]
+
+def test_signed_simhash_roundtrip():
+    value = (1 << 64) - 1
+    assert dedup.from_signed(dedup.to_signed(value)) == value
+    assert dedup.to_signed(value) < 0
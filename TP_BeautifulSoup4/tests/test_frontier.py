@@ -0,0 +1,73 @@
+import frontier
+
+
+def make_frontier(tmp_path, **kwargs):
+    return frontier.Frontier(path=str(tmp_path / "frontier.sqlite"), **kwargs)
+
+def test_frontier_states(tmp_path):
+    crawl_frontier = make_frontier(tmp_path)
+    crawl_frontier.add(["https://example.com/a", "https://example.com/b"], 'article', parent="https://example.com/")
+    crawl_frontier.mark_in_flight("https://example.com/a")
+    crawl_frontier.mark_done(["https://example.com/a", "https://example.com/b"]) # b n'est pas en cours : reste pending
+    assert crawl_frontier.state("https://example.com/a") == frontier.DONE
+    assert crawl_frontier.state("https://example.com/b") == frontier.PENDING
+    crawl_frontier.add(["https://example.com/a"], 'article') # déjà présente : garde son état
+    assert crawl_frontier.summary() == {'article': {frontier.DONE: 1, frontier.PENDING: 1}}
+    crawl_frontier.close()
+
+def test_failed_url_is_retried_until_max_attempts(tmp_path):
+    crawl_frontier = make_frontier(tmp_path, max_attempts=2)
+    url = "https://example.com/a"
+    crawl_frontier.add([url], 'article', parent="https://example.com/")
+    crawl_frontier.mark_in_flight(url)
+    assert crawl_frontier.mark_failed(url, "404")
+    assert crawl_frontier.retryable_count("https://example.com/") == 1
+    assert crawl_frontier.skip_urls([url]) == set()
+
+    crawl_frontier.mark_in_flight(url)
+    assert not crawl_frontier.mark_failed(url, "404") # 2e échec : abandonnée
+    assert crawl_frontier.retryable_count("https://example.com/") == 0
+    assert crawl_frontier.skip_urls([url]) == {url}
+    crawl_frontier.close()
+
+def test_requeue_in_flight(tmp_path):
+    crawl_frontier = make_frontier(tmp_path)
+    crawl_frontier.add(["https://example.com/a"], 'article')
+    crawl_frontier.mark_in_flight("https://example.com/a")
+    assert crawl_frontier.requeue_in_flight() == 1
+    assert crawl_frontier.state("https://example.com/a") == frontier.PENDING
+    crawl_frontier.close()
+
+
+# --- reprise d'un run interrompu (main.py --resume) ---
+
+def test_resume_retries_category_whose_listing_failed(articles, site, fixtures_dir, run_main):
+    listing = fixtures_dir / "social.html"
+    saved = listing.read_bytes()
+    listing.unlink() # page de listing en 404
+
+    assert run_main(site)
+    crawl_frontier = frontier.Frontier()
+    assert crawl_frontier.state(site + "social/") == frontier.FAILED
+    crawl_frontier.close()
+    first_run = articles.count_documents({})
+
+    listing.write_bytes(saved)
+    assert run_main(site, resume=True)
+    crawl_frontier = frontier.Frontier()
+    assert crawl_frontier.state(site + "social/") == frontier.DONE
+    crawl_frontier.close()
+    assert articles.count_documents({}) > first_run
+
+def test_resume_replaces_failed_article(articles, site, fixtures_dir, run_main):
+    page = fixtures_dir / "tiktok-shop-france.html"
+    saved = page.read_bytes()
+    page.unlink() # page article en 404 : pas d'aperçu enregistré à sa place
+
+    assert run_main(site)
+    assert articles.count_documents({'url': {'$regex': "tiktok-shop-france"}}) == 0
+
+    page.write_bytes(saved)
+    assert run_main(site, resume=True)
+    article = articles.find_one({'url': {'$regex': "tiktok-shop-france"}})
+    assert article is not None and article.get('content_hash')
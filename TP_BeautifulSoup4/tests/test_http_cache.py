@@ -0,0 +1,105 @@
+import requests
+import pytest
+
+import http_cache
+import http_client
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = http_cache.HttpCache(path=str(tmp_path / "http_cache.sqlite"), ttls={'listing': 0, 'article': 3600})
+    yield cache
+    cache.close()
+
+@pytest.fixture
+def fetcher(cache):
+    fetcher = http_client.Fetcher(cache=cache)
+    yield fetcher
+    fetcher.session.close()
+
+def fake_response(url, size):
+    response = requests.Response()
+    response._content = b"x" * size
+    response.status_code = 200
+    response.url = url
+    return response
+
+
+# --- GET conditionnel et durée de validité par type d'URL ---
+
+def test_fresh_article_is_served_without_request(fetcher, cache, replay_server):
+    server, url = replay_server
+    first = fetcher.get(url + "tiktok-shop-france/", url_class='article')
+    requests_before = server.requests
+    second = fetcher.get(url + "tiktok-shop-france/", url_class='article')
+    assert server.requests == requests_before # TTL article : aucune requête
+    assert second.text == first.text
+    assert cache.stats['misses'] == 1 and cache.stats['hits'] == 1
+
+def test_stale_listing_is_revalidated_with_304(fetcher, cache, replay_server):
+    server, url = replay_server
+    first = fetcher.get(url + "web/", url_class='listing') # TTL listing = 0 : revalidé à chaque appel
+    second = fetcher.get(url + "web/", url_class='listing')
+    assert server.requests == 2
+    assert second.status_code == 200 and second.text == first.text # corps du cache réutilisé sur le 304
+    assert cache.stats['revalidated'] == 1 and cache.stats['bytes_saved'] == len(first.content)
+    assert fetcher.timings[-1]['cache'] == 'revalidated' and fetcher.timings[-1]['bytes'] == 0
+
+def test_changed_page_replaces_cached_body(fetcher, cache, replay_server, fixtures_dir):
+    server, url = replay_server
+    fetcher.get(url + "web/", url_class='listing')
+    page = fixtures_dir / "web.html"
+    page.write_text(page.read_text(encoding='utf-8').replace("</body>", "<p>modifié</p></body>"), encoding='utf-8')
+    response = fetcher.get(url + "web/", url_class='listing')
+    assert "modifié" in response.text
+    assert cache.stats['misses'] == 2
+    assert b"modifi" in cache.lookup(url + "web/")['body']
+
+def test_use_cache_false_bypasses_cache(fetcher, cache, replay_server):
+    server, url = replay_server
+    fetcher.get(url + "web/", url_class='article', use_cache=False)
+    assert cache.lookup(url + "web/") is None
+
+def test_error_responses_are_not_cached(fetcher, cache, replay_server):
+    server, url = replay_server
+    assert fetcher.get(url + "introuvable/").status_code == 404
+    assert cache.lookup(url + "introuvable/") is None
+
+
+# --- éviction LRU ---
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path):
+    cache = http_cache.HttpCache(path=str(tmp_path / "lru.sqlite"), max_bytes=250)
+    for name in "abc":
+        cache.store(f"https://example.com/{name}", fake_response(f"https://example.com/{name}", 100))
+    # 300 octets > 250 : la plus ancienne entrée (a) est supprimée
+    assert cache.lookup("https://example.com/a") is None
+    cache.touch("https://example.com/b") # b utilisée récemment
+    cache.store("https://example.com/d", fake_response("https://example.com/d", 100))
+    assert cache.lookup("https://example.com/b") is not None
+    assert cache.lookup("https://example.com/c") is None
+    assert cache._total_bytes == cache._table_size() == 200
+    cache.close()
+
+def test_running_total_follows_replaced_entries(tmp_path, monkeypatch):
+    cache = http_cache.HttpCache(path=str(tmp_path / "total.sqlite"), max_bytes=1000)
+    evictions = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: evictions.append(1) or evict())
+    cache.store("https://example.com/a", fake_response("https://example.com/a", 300))
+    cache.store("https://example.com/a", fake_response("https://example.com/a", 200)) # même URL : remplacée
+    cache.store("https://example.com/b", fake_response("https://example.com/b", 400))
+    assert cache._total_bytes == cache._table_size() == 600
+    assert evictions == [] # sous max_bytes : pas de parcours de la table
+    cache.clear()
+    assert cache._total_bytes == 0
+    cache.close()
+
+def test_running_total_is_restored_on_open(tmp_path):
+    path = str(tmp_path / "reopen.sqlite")
+    cache = http_cache.HttpCache(path=path)
+    cache.store("https://example.com/a", fake_response("https://example.com/a", 123))
+    cache.close()
+    cache = http_cache.HttpCache(path=path)
+    assert cache._total_bytes == 123
+    cache.close()
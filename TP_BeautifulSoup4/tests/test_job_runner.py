@@ -0,0 +1,55 @@
+import os
+import threading
+
+import pytest
+
+import job_runner
+import mongo_connect as db_connector
+
+
+class FakeRunner:
+    pid = os.getpid() # process vivant : le job reste en cours
+
+    def poll(self):
+        return None
+
+@pytest.fixture
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_runner, "JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(job_runner.subprocess, "Popen", lambda *args, **kwargs: FakeRunner())
+    return tmp_path / "jobs"
+
+def test_start_job_respects_running_limit(jobs_dir, monkeypatch):
+    monkeypatch.setattr(job_runner, "MAX_RUNNING_JOBS", 2)
+    started = []
+    threads = [threading.Thread(target=lambda: started.append(job_runner.start_job(["--async"]))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len([job_id for job_id in started if job_id]) == 2
+    assert len(job_runner.running_jobs()) == 2
+    assert not (jobs_dir / ".start.lock").exists()
+
+def test_dead_runner_marks_job_failed(jobs_dir, monkeypatch):
+    job_id = job_runner.start_job()
+    job = job_runner.read_job(job_id)
+    job['runner_pid'] = 2 ** 22 + 1 # pid inexistant
+    job_runner._write_job(job)
+    job_runner._runners.clear()
+    assert job_runner.job_status(job_runner.read_job(job_id)) == job_runner.FAILED
+
+def test_read_events_skips_partial_line(jobs_dir):
+    job_id = job_runner.start_job()
+    reporter = job_runner.ProgressReporter(os.path.join(job_runner.job_dir(job_id), 'events.jsonl'))
+    reporter.emit('start', mode='sync')
+    events, offset = job_runner.read_events(job_id)
+    assert [event['event'] for event in events] == ['start']
+    with open(reporter.path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "articl') # ligne en cours d'écriture
+    assert job_runner.read_events(job_id, offset) == ([], offset)
+    reporter.close()
+
+def test_main_reports_unreachable_mongo(monkeypatch, site, run_main):
+    monkeypatch.setattr(db_connector, "check_health", lambda *args, **kwargs: False)
+    assert run_main(site) is False
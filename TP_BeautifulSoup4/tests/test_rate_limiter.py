@@ -0,0 +1,108 @@
+import time
+
+import pytest
+
+import http_client
+import rate_limiter
+from utils.replay_server import start_replay_server
+
+
+@pytest.fixture
+def make_server(fixtures_dir):
+    servers = []
+    def start(**kwargs):
+        server, url = start_replay_server(str(fixtures_dir), **kwargs)
+        servers.append(server)
+        return server, url
+    yield start
+    for server in servers:
+        server.shutdown()
+
+def limited_fetcher(initial_rate=8.0, **kwargs):
+    limiter = rate_limiter.RateLimiter(initial_rate=initial_rate, robots_fetcher=None)
+    return http_client.Fetcher(rate_limiter=limiter, **kwargs), limiter
+
+
+# --- AIMD ---
+
+def test_429_halves_the_rate(make_server):
+    server, url = make_server(max_rps=2)
+    fetcher, limiter = limited_fetcher(max_retries=0)
+    for _ in range(2):
+        assert fetcher.get(url + "web/").status_code == 200
+    bucket = limiter.bucket(url)
+    rate = bucket.rate
+    assert rate > 8.0 # hausse additive après les réponses réussies
+
+    assert fetcher.get(url + "web/").status_code == 429
+    assert server.rejected == 1
+    assert bucket.rate == pytest.approx(rate * rate_limiter.MULTIPLICATIVE_DECREASE)
+    assert bucket.stats['throttled'] == 1
+
+    # Retry-After: 1 -> la requête suivante attend la fin du blocage
+    start = time.monotonic()
+    assert fetcher.get(url + "web/").status_code == 200
+    assert time.monotonic() - start >= 0.9
+    fetcher.close()
+
+def test_429_absorbed_by_retries_still_slows_down(make_server):
+    server, url = make_server(max_rps=1)
+    fetcher, limiter = limited_fetcher()
+    assert fetcher.get(url + "web/").status_code == 200
+    rate = limiter.bucket(url).rate
+    response = fetcher.get(url + "web/") # 429 puis nouvel essai après le Retry-After
+    assert response.status_code == 200 and response.timing['retries'] == 1
+    assert server.rejected == 1
+    assert limiter.bucket(url).rate == pytest.approx(rate * rate_limiter.MULTIPLICATIVE_DECREASE)
+    fetcher.close()
+
+def test_one_decrease_per_burst_of_429():
+    bucket = rate_limiter.HostBucket(rate=8.0)
+    for _ in range(3):
+        bucket.record(429, None)
+    assert bucket.rate == 8.0 * rate_limiter.MULTIPLICATIVE_DECREASE
+    assert bucket.stats['throttled'] == 3
+
+def test_rate_stays_within_bounds():
+    bucket = rate_limiter.HostBucket(rate=1.0, max_rate=2.0, min_rate=0.5)
+    for _ in range(100):
+        bucket.record(200, 0.01)
+    assert bucket.rate == 2.0
+    bucket.last_decrease = 0.0
+    for _ in range(5):
+        bucket.record(503, None)
+        bucket.last_decrease = 0.0 # sans délai entre les baisses
+    assert bucket.rate == 0.5
+
+
+# --- robots.txt ---
+
+def test_crawl_delay_caps_rate(make_server):
+    server, url = make_server(crawl_delay=2)
+    fetcher = http_client.configure_fetcher(use_cache=False, rate_limit=False)
+    limiter = rate_limiter.RateLimiter()
+    bucket = limiter.bucket(url + "web/")
+    assert bucket.max_rate == bucket.rate == 0.5
+    assert bucket.capacity == 1 # pas de rafale
+    # robots.txt lu une fois, par le fetcher partagé (en-têtes du scraper)
+    assert limiter.bucket(url + "social/") is bucket
+    assert server.requests == 1
+    assert [timing['url'] for timing in fetcher.timings] == [url + "robots.txt"]
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.1) # une requête toutes les 2 secondes
+
+def test_crawl_delay_is_never_exceeded_by_additive_increase(make_server):
+    _, url = make_server(crawl_delay=1)
+    http_client.configure_fetcher(use_cache=False, rate_limit=False)
+    bucket = rate_limiter.RateLimiter().bucket(url)
+    for _ in range(50):
+        bucket.record(200, 0.01)
+    assert bucket.rate == 1.0
+
+def test_missing_robots_txt_leaves_rate_uncapped(make_server):
+    _, url = make_server()
+    http_client.configure_fetcher(use_cache=False, rate_limit=False)
+    bucket = rate_limiter.RateLimiter().bucket(url)
+    assert bucket.max_rate == rate_limiter.MAX_RATE
+    assert bucket.capacity == rate_limiter.BURST
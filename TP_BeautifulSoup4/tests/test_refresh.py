@@ -0,0 +1,86 @@
+import pytest
+
+import http_cache
+import http_client
+import refresh
+
+
+ARTICLE = "tiktok-shop-france"
+
+
+@pytest.fixture
+def stored(articles, site, run_main):
+    assert run_main(site)
+    # dates remises à zéro : tout passage de refresh est visible
+    articles.update_many({}, {'$set': {'last_seen': 0, 'last_changed': 0}})
+    return articles
+
+# fetcher avec cache HTTP : la page déjà récupérée revient en 304
+@pytest.fixture
+def cached_fetcher(tmp_path, monkeypatch):
+    fetcher = http_client.Fetcher(cache=http_cache.HttpCache(path=str(tmp_path / "http_cache.sqlite")))
+    monkeypatch.setattr(http_client, '_fetcher', fetcher)
+    yield fetcher
+    fetcher.close()
+
+def snapshot(articles):
+    return {doc['url']: doc for doc in articles.find()}
+
+
+def test_unchanged_pages_only_bump_last_seen(stored):
+    before = snapshot(stored)
+    stats = refresh.refresh_articles(stored)
+    assert stats['checked'] == len(before)
+    assert stats[refresh.UNCHANGED] == len(before)
+    assert stats['written'] == 0 and stats['fields'] == {}
+    for url, doc in snapshot(stored).items():
+        assert doc['last_seen'] > 0
+        assert doc['last_changed'] == 0
+        assert doc['content_hash'] == before[url]['content_hash']
+        assert doc['body_hash'] == before[url]['body_hash']
+
+def test_not_modified_pages_are_not_parsed(stored, cached_fetcher):
+    refresh.refresh_articles(stored) # cache HTTP rempli
+    stored.update_many({}, {'$set': {'last_seen': 0}})
+    stats = refresh.refresh_articles(stored)
+    assert stats[refresh.NOT_MODIFIED] == stats['checked'] > 0
+    assert stats['written'] == 0
+    assert cached_fetcher.cache.stats['revalidated'] == stats['checked']
+    for doc in stored.find():
+        assert doc['last_seen'] > 0
+        assert doc['last_changed'] == 0
+
+def test_modified_title_is_rewritten(stored, fixtures_dir):
+    before = snapshot(stored)
+    page = fixtures_dir / f"{ARTICLE}.html"
+    page.write_text(page.read_text(encoding="utf-8").replace(
+        '<h1 class="entry-title">TikTok Shop arrive officiellement en France</h1>',
+        '<h1 class="entry-title">TikTok Shop est désormais disponible en France</h1>'), encoding="utf-8")
+
+    stats = refresh.refresh_articles(stored)
+    assert stats[refresh.CHANGED] == 1 and stats['written'] == 1
+    assert stats['fields'] == {'title': 1}
+    for url, doc in snapshot(stored).items():
+        if ARTICLE in url:
+            assert doc['title'] == "TikTok Shop est désormais disponible en France"
+            assert doc['last_changed'] > 0
+            assert doc['content_hash'] != before[url]['content_hash']
+            assert doc['body_hash'] == before[url]['body_hash']
+        else:
+            assert doc['last_changed'] == 0
+            assert doc['content_hash'] == before[url]['content_hash']
+
+def test_modified_body_updates_body_hash(stored, fixtures_dir):
+    before = snapshot(stored)
+    page = fixtures_dir / f"{ARTICLE}.html"
+    html = page.read_text(encoding="utf-8")
+    start = html.index('<div class="entry-content">')
+    page.write_text(html[:start] + html[start:].replace("<p>", "<p>Mise à jour : ", 1), encoding="utf-8")
+
+    stats = refresh.refresh_articles(stored)
+    assert stats[refresh.CHANGED] == 1 and stats['written'] == 1
+    doc = next(doc for url, doc in snapshot(stored).items() if ARTICLE in url)
+    previous = before[doc['url']]
+    assert doc['body_hash'] != previous['body_hash']
+    assert doc['content_hash'] == previous['content_hash']
+    assert doc['last_changed'] > 0
@@ -0,0 +1,90 @@
+import pytest
+
+import bodies
+import search_index
+
+
+ARTICLES = [
+    {'url': "https://example.com/mistral/", 'title': "Intelligence artificielle : Mistral AI lève des fonds",
+     'summary': "La startup française annonce une levée record.", 'author': "Alice Durand", 'tags': ["IA", "Startups"],
+     'date_iso': "2025-03-10", 'content_hash': "a1"},
+    {'url': "https://example.com/ecran/", 'title': "Un écran OLED pour les développeurs",
+     'summary': "Le constructeur présente un moniteur pensé pour le code.", 'author': "Jérôme Martin", 'tags': ["Matériel"],
+     'date_iso': "2025-04-02", 'content_hash': "b1"},
+    {'url': "https://example.com/navigateurs/", 'title': "Les navigateurs web en 2025",
+     'summary': "Parts de marché des navigateurs.", 'author': "Alice Durand", 'tags': ["Web"],
+     'date_iso': "2025-05-20", 'content_hash': "c1", 'body_text': "Chrome reste en tête devant Safari et Firefox."},
+    {'url': "https://example.com/chrome/", 'title': "Chrome ajoute des onglets",
+     'summary': "Le navigateur de Google évolue.", 'author': "Paul Leroy", 'tags': ["Web"],
+     'date_iso': "2025-06-01", 'content_hash': "d1"},
+]
+
+
+@pytest.fixture
+def index():
+    index = search_index.SearchIndex(path=":memory:")
+    index.index_articles(ARTICLES)
+    yield index
+    index.close()
+
+def urls(index, text, **filters):
+    results, total, _ = index.search(text, **filters)
+    assert total == len(results)
+    return [result['url'] for result in results]
+
+
+def test_prefix_query(index):
+    results, total, corrections = index.search("intellig")
+    assert [result['url'] for result in results] == ["https://example.com/mistral/"]
+    assert corrections == {}
+
+def test_title_match_ranks_before_body_match(index):
+    # BM25 : "chrome" dans le titre (poids 5) devant "chrome" dans le corps (poids 1)
+    assert urls(index, "chrome") == ["https://example.com/chrome/", "https://example.com/navigateurs/"]
+
+def test_diacritics_and_case_are_folded(index):
+    assert urls(index, "ecran") == urls(index, "ÉCRAN") == ["https://example.com/ecran/"]
+    assert urls(index, "developpeurs") == ["https://example.com/ecran/"]
+    assert urls(index, "oled", author="jerome") == ["https://example.com/ecran/"]
+
+def test_unknown_word_falls_back_to_close_terms(index):
+    results, _, corrections = index.search("mistarl")
+    assert corrections == {'mistarl': ['mistral']}
+    assert [result['url'] for result in results] == ["https://example.com/mistral/"]
+
+def test_unknown_word_without_close_terms_finds_nothing(index):
+    assert index.search("zzzzzz") == ([], 0, {})
+
+def test_filters(index):
+    assert sorted(urls(index, "navigateur", tag="web")) == ["https://example.com/chrome/", "https://example.com/navigateurs/"]
+    assert urls(index, "navigateur", tag="ia") == []
+    assert urls(index, "navigateur", author="alice") == ["https://example.com/navigateurs/"]
+    assert urls(index, "navigateur", start_date="2025-06-01") == ["https://example.com/chrome/"]
+    assert urls(index, "navigateur", end_date="2025-05-31") == ["https://example.com/navigateurs/"]
+
+def test_same_content_hash_is_not_reindexed(index):
+    assert index.index_articles(ARTICLES) == 0
+    edited = dict(ARTICLES[0], title="Mistral AI publie un nouveau modèle", content_hash="a2")
+    assert index.index_articles([edited]) == 1
+    assert urls(index, "intelligence") == []
+    assert urls(index, "modele") == ["https://example.com/mistral/"]
+
+
+# --- synchronisation avec la base ---
+
+def test_sync_from_mongo(articles):
+    articles.insert_many([{key: value for key, value in article.items() if key != 'body_text'} for article in ARTICLES])
+    body = {'text': ARTICLES[2]['body_text'], 'html': f"<p>{ARTICLES[2]['body_text']}</p>"}
+    bodies.write_bodies(bodies.get_bodies_collection(articles), [(ARTICLES[2]['url'], body, "h")])
+    index = search_index.SearchIndex(path=":memory:")
+
+    assert search_index.sync_from_mongo(articles, index) == len(ARTICLES)
+    assert index.count() == len(ARTICLES)
+    assert urls(index, "safari") == ["https://example.com/navigateurs/"] # corps indexé depuis la collection bodies
+
+    assert search_index.sync_from_mongo(articles, index) == 0
+    articles.update_one({'url': ARTICLES[1]['url']}, {'$set': {'title': "Un moniteur 4K", 'content_hash': "b2"}})
+    assert search_index.sync_from_mongo(articles, index) == 1
+    assert urls(index, "4k") == ["https://example.com/ecran/"]
+    assert search_index.sync_from_mongo(articles, index, rebuild=True) == len(ARTICLES)
+    index.close()
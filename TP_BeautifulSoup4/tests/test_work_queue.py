@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+import mongo_connect as db_connector
+import work_queue
+
+
+@pytest.fixture
+def queue_collection(mongo_client):
+    return mongo_client[db_connector.DATABASE_NAME][work_queue.QUEUE_COLLECTION_NAME]
+
+def test_work_queue_lease_is_exclusive(queue_collection):
+    first = work_queue.WorkQueue(queue_collection, "worker-1")
+    second = work_queue.WorkQueue(queue_collection, "worker-2")
+    assert first.enqueue([{'url': "https://example.com/a", 'kind': 'article'}]) == 1
+    assert first.enqueue([{'url': "https://example.com/a", 'kind': 'article'}]) == 0 # déjà en file
+
+    task = first.claim()
+    assert task['lease_owner'] == "worker-1" and task['attempts'] == 1
+    assert second.claim() is None # bail en cours
+    second.complete([task['_id']]) # bail d'un autre worker : sans effet
+    assert first.summary() == {work_queue.LEASED: 1}
+    first.complete([task['_id']])
+    assert first.summary() == {work_queue.DONE: 1}
+    assert not first.has_work()
+
+def test_work_queue_expired_lease_is_reclaimed(queue_collection):
+    dead = work_queue.WorkQueue(queue_collection, "dead-worker", lease_seconds=0.05, max_attempts=2)
+    other = work_queue.WorkQueue(queue_collection, "other-worker", max_attempts=2)
+    dead.enqueue([{'url': "https://example.com/a", 'kind': 'article'}])
+    assert dead.claim() is not None
+    time.sleep(0.1)
+
+    task = other.claim()
+    assert task['lease_owner'] == "other-worker" and task['attempts'] == 2
+    dead.complete([task['_id']]) # le worker arrêté ne peut plus clore la tâche
+    assert other.summary() == {work_queue.LEASED: 1}
+
+def test_work_queue_fails_after_max_attempts(queue_collection):
+    worker = work_queue.WorkQueue(queue_collection, "worker", lease_seconds=0, max_attempts=2)
+    worker.enqueue([{'url': "https://example.com/a", 'kind': 'article'}])
+    worker.fail(worker.claim(), "timeout")
+    assert worker.summary() == {work_queue.PENDING: 1}
+    worker.claim() # 2e tentative, bail expiré aussitôt
+    time.sleep(0.01)
+    assert worker.claim() is None
+    assert not worker.has_work()
+    assert worker.summary() == {work_queue.FAILED: 1}
+
+def test_run_worker_drains_the_queue(articles, queue_collection, site):
+    stats = work_queue.run_worker(site, articles, queue_collection, worker_id="worker-1", batch_size=5)
+    assert stats['articles'] > 0 and stats['task_errors'] == 0
+    assert stats['inserted'] == articles.count_documents({})
+    assert set(stats['queue']) == {work_queue.DONE}
+
+def test_second_crawl_requeues_finished_listings(articles, queue_collection, site):
+    first = work_queue.run_worker(site, articles, queue_collection, worker_id="worker-1")
+    second = work_queue.run_worker(site, articles, queue_collection, worker_id="worker-2")
+    assert first['listings'] > 0
+    assert second['listings'] == first['listings'] # listings de nouveau parcourus (nouveaux articles)
+    assert second['articles'] == 0 and second['inserted'] == 0 # articles déjà écrits : pas de nouvelle tâche
+    assert set(second['queue']) == {work_queue.DONE}
+
+def test_restart_waits_for_running_crawl(queue_collection):
+    worker = work_queue.WorkQueue(queue_collection, "worker")
+    worker.enqueue([{'url': "https://example.com/", 'kind': 'listing'}, {'url': "https://example.com/web/", 'kind': 'listing'}])
+    worker.complete([worker.claim()['_id']])
+    assert worker.restart_finished_crawl() == 0 # une tâche encore en attente : crawl en cours
+    worker.complete([worker.claim()['_id']])
+    assert worker.restart_finished_crawl() == 2
+    assert worker.summary() == {work_queue.PENDING: 2}
@@ -10,7 +10,8 @@ class Colors:
     MAGENTA = '\033[95m'
     CYAN = '\033[96m'
 
-def debug_print(message, level="info", end='\n', file=sys.stdout):
+def debug_print(message, level="info", end='\n', file=None):
+    file = file or sys.stdout # résolu à l'appel (redirect_stdout possible)
     color_map = {
         "info": Colors.BLUE,
         "success": Colors.GREEN,
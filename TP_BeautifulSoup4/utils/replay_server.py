@@ -0,0 +1,154 @@
+import argparse
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+#CONFIG
+LIVE_BASE_URL = "https://www.blogdumoderateur.com/"
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+# serveur HTTP local qui rejoue les pages HTML sauvegardées du Blog du Modérateur
+# '/' -> index.html, '/web/' -> web.html, '/web/page/2/' -> web__page__2.html
+# les liens absolus vers le vrai site sont réécrits vers le serveur local
+# les images ('/wp-content/uploads/...') sont servies depuis fixtures/images/ (une image par URL,
+# choisie parmi quelques placeholders : plusieurs URLs ont le même contenu)
+
+# chemin URL -> nom du fichier de fixture
+def fixture_name_for_path(path):
+    path = path.split('?', 1)[0].split('#', 1)[0].strip('/')
+    if not path:
+        return "index.html"
+    return path.replace('/', '__') + ".html"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    fixtures_dir = DEFAULT_FIXTURES_DIR
+    latency = 0.0 # délai simulé par requête (secondes)
+    max_rps = 0 # au-delà de max_rps requêtes/s -> 429 (0 = pas de limite)
+    crawl_delay = None # Crawl-delay annoncé dans /robots.txt (None = pas de robots.txt)
+
+    def do_GET(self):
+        with self.server.rate_lock:
+            self.server.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.max_rps and self._over_limit():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path == "/robots.txt" and self.crawl_delay is not None:
+            body = f"User-agent: *\nCrawl-delay: {self.crawl_delay}\n".encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path.startswith("/wp-content/uploads/"):
+            self._send_image()
+            return
+
+        file_path = os.path.join(self.fixtures_dir, fixture_name_for_path(self.path))
+        if not os.path.isfile(file_path):
+            self.send_error(404, "Fixture not found")
+            return
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        local_base = f"http://{self.headers.get('Host', '%s:%d' % self.server.server_address)}/"
+        body = html.replace(LIVE_BASE_URL, local_base).encode('utf-8')
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        last_modified = formatdate(os.path.getmtime(file_path), usegmt=True)
+
+        # GET conditionnel -> 304 sans corps
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_image(self):
+        images_dir = os.path.join(self.fixtures_dir, "images")
+        images = sorted(os.listdir(images_dir)) if os.path.isdir(images_dir) else []
+        if not images:
+            self.send_error(404, "No fixture images")
+            return
+        index = int(hashlib.md5(self.path.encode('utf-8')).hexdigest(), 16) % len(images)
+        with open(os.path.join(images_dir, images[index]), 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # fenêtre glissante d'une seconde, partagée par toutes les requêtes du serveur
+    def _over_limit(self):
+        now = time.monotonic()
+        with self.server.rate_lock:
+            window = self.server.request_times
+            while window and now - window[0] > 1.0:
+                window.popleft()
+            if len(window) >= self.max_rps:
+                self.server.rejected += 1
+                return True
+            window.append(now)
+            return False
+
+    def log_message(self, format, *args):
+        pass # pas de log par requête
+
+
+# démarre le serveur dans un thread -> (server, base_url)
+# server.shutdown() pour l'arrêter
+# max_rps : simule un serveur qui renvoie des 429 au-delà de N requêtes/s (server.rejected = nb de 429)
+# server.requests : nb de requêtes reçues
+def start_replay_server(fixtures_dir=DEFAULT_FIXTURES_DIR, host="127.0.0.1", port=0, latency=0.0, max_rps=0, crawl_delay=None):
+    handler = type("BoundReplayHandler", (ReplayHandler,), {"fixtures_dir": fixtures_dir, "latency": latency,
+                                                            "max_rps": max_rps, "crawl_delay": crawl_delay})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.rate_lock = threading.Lock()
+    server.request_times = deque()
+    server.rejected = 0
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}/"
+    return server, base_url
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serveur local qui rejoue les fixtures HTML du Blog du Modérateur.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="dossier des fixtures HTML")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="délai simulé par requête (secondes)")
+    parser.add_argument("--max-rps", type=float, default=0, help="renvoyer des 429 au-delà de N requêtes/s (0 = pas de limite)")
+    parser.add_argument("--crawl-delay", type=float, help="Crawl-delay annoncé dans /robots.txt")
+    args = parser.parse_args()
+
+    server, base_url = start_replay_server(args.fixtures, args.host, args.port, args.latency, args.max_rps, args.crawl_delay)
+    print(f"Replay server listening on {base_url} (fixtures: {args.fixtures})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,199 @@
+import os
+import socket
+import time
+import uuid
+
+import requests
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
+
+# custom
+import TP_BeautifulSoup4 as scraper
+import mongo_connect as db_connector
+from http_client import get_fetcher
+from utils.debug_color import debug_print
+
+#CONFIG (surcharge possible par variables d'environnement)
+QUEUE_COLLECTION_NAME = os.environ.get("MONGO_QUEUE_COLLECTION", "crawl_queue")
+LEASE_SECONDS = int(os.environ.get("CRAWL_LEASE_SECONDS", 120)) # durée d'un bail avant qu'un autre worker reprenne la tâche
+MAX_ATTEMPTS = int(os.environ.get("CRAWL_MAX_ATTEMPTS", 3))
+POLL_INTERVAL = 2 # secondes d'attente quand toutes les tâches restantes sont louées par d'autres workers
+WORKER_BATCH_SIZE = 20 # articles par bulk_write (petits lots : les baux sont clos après l'écriture)
+
+# états d'une tâche
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+# file de travail partagée (collection MongoDB) : une tâche par URL (page de listing ou article)
+# chaque worker prend une tâche avec un bail (find_one_and_update atomique) ;
+# un bail expiré (worker mort) rend la tâche à nouveau disponible
+class WorkQueue:
+    def __init__(self, collection, worker_id=None, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.collection = collection
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        try:
+            self.collection.create_index([('state', ASCENDING), ('lease_expires', ASCENDING)], name='state_lease_expires')
+        except PyMongoError as e:
+            print(f"Could not create queue index: {e}")
+
+    # ajoute des tâches (une URL déjà en file garde son état) -> nb de nouvelles tâches
+    def enqueue(self, tasks):
+        now = time.time()
+        operations = [
+            UpdateOne({'_id': task['url']}, {'$setOnInsert': {
+                'kind': task['kind'], 'payload': task.get('payload'), 'state': PENDING,
+                'attempts': 0, 'lease_owner': None, 'lease_expires': 0, 'enqueued_at': now,
+            }}, upsert=True)
+            for task in tasks if task.get('url')
+        ]
+        if not operations:
+            return 0
+        result = self.collection.bulk_write(operations, ordered=False)
+        return result.upserted_count
+
+    # prend la prochaine tâche disponible (en attente ou bail expiré) -> document de la tâche ou None
+    def claim(self):
+        now = time.time()
+        return self.collection.find_one_and_update(
+            {'$or': [
+                {'state': PENDING},
+                {'state': LEASED, 'lease_expires': {'$lt': now}},
+            ], 'attempts': {'$lt': self.max_attempts}},
+            {'$set': {'state': LEASED, 'lease_owner': self.worker_id, 'lease_expires': now + self.lease_seconds},
+             '$inc': {'attempts': 1}},
+            sort=[('enqueued_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    # tâches terminées (seulement si le bail est toujours à ce worker)
+    def complete(self, urls):
+        urls = [url for url in urls if url]
+        if urls:
+            self.collection.update_many({'_id': {'$in': urls}, 'lease_owner': self.worker_id},
+                                        {'$set': {'state': DONE, 'lease_expires': 0, 'done_at': time.time()}})
+
+    # échec : remise en file, ou failed après max_attempts tentatives
+    def fail(self, task, error):
+        state = FAILED if task['attempts'] >= self.max_attempts else PENDING
+        self.collection.update_one({'_id': task['_id'], 'lease_owner': self.worker_id},
+                                   {'$set': {'state': state, 'lease_expires': 0, 'last_error': str(error)[:500]}})
+
+    # reste-t-il du travail (en attente ou loué par un worker) ?
+    # les baux expirés sans tentative restante passent en failed
+    def has_work(self):
+        now = time.time()
+        self.collection.update_many({'state': LEASED, 'lease_expires': {'$lt': now}, 'attempts': {'$gte': self.max_attempts}},
+                                    {'$set': {'state': FAILED, 'last_error': 'lease expired'}})
+        return self.collection.count_documents({'state': {'$in': [PENDING, LEASED]}}, limit=1) > 0
+
+    # nouveau crawl sur une file dont le crawl précédent est terminé (plus rien en attente ni loué) :
+    # pages de listing et articles en échec remis en attente -> nb de tâches remises
+    # (les articles déjà écrits restent done ; un worker qui rejoint un crawl en cours ne remet rien)
+    def restart_finished_crawl(self):
+        if self.has_work():
+            return 0
+        result = self.collection.update_many(
+            {'$or': [{'kind': 'listing', 'state': {'$in': [DONE, FAILED]}}, {'kind': 'article', 'state': FAILED}]},
+            {'$set': {'state': PENDING, 'attempts': 0, 'lease_owner': None, 'lease_expires': 0}})
+        return result.modified_count
+
+    # {state: nb}
+    def summary(self):
+        return {row['_id']: row['count'] for row in self.collection.aggregate([{'$group': {'_id': '$state', 'count': {'$sum': 1}}}])}
+
+    def clear(self):
+        self.collection.delete_many({})
+
+
+def connect_to_queue():
+    if not db_connector.check_health():
+        return None
+    return db_connector.get_client()[db_connector.DATABASE_NAME][QUEUE_COLLECTION_NAME]
+
+
+# --- worker ---
+
+# tâche 'listing' : une page de listing -> tâches articles (+ pages suivantes si c'est la page 1)
+def _process_listing(queue, task, max_pages, date_cutoff):
+    payload = task['payload']
+    response = get_fetcher().get(task['_id'], url_class='listing', headers=scraper.headers)
+    response.raise_for_status()
+    previews, last_page = scraper.parse_listing_page(response.text)
+
+    cutoff_reached = False
+    if date_cutoff:
+        previews, cutoff_reached = scraper.filter_previews_since(previews, date_cutoff)
+    previews = scraper.filter_duplicate_previews(previews) # quasi-doublons : pas de tâche article
+
+    tasks = [{'url': data['url'], 'kind': 'article', 'payload': {'data': data, 'title_preview': title_preview}}
+             for data, title_preview in previews if data['url']]
+    if payload['page'] == 1 and not cutoff_reached:
+        if max_pages:
+            last_page = min(last_page, max_pages)
+        tasks += [{'url': scraper.listing_page_url(payload['listing_url'], page), 'kind': 'listing',
+                   'payload': {'listing_url': payload['listing_url'], 'page': page}}
+                  for page in range(2, last_page + 1)]
+    added = queue.enqueue(tasks)
+    queue.complete([task['_id']])
+    debug_print(f"[{queue.worker_id}] Listing {task['_id']}: {added} new tasks.", level="info")
+
+# tâche 'article' : page article -> détails -> BulkWriter (tâche close après l'écriture du lot)
+def _process_article(task, writer):
+    data, title_preview = task['payload']['data'], task['payload']['title_preview']
+    response = get_fetcher().get(task['_id'], url_class='article', headers=scraper.headers)
+    response.raise_for_status()
+    scraper.parse_article_details(response.text, data, title_preview)
+    writer.add(data)
+
+
+# boucle d'un worker : prend des tâches jusqu'à ce que la file soit vide -> stats
+# plusieurs workers (processus, machines) peuvent tourner en même temps sur la même file
+def run_worker(base_url, collection, queue_collection, worker_id=None, max_pages=1, date_cutoff=None,
+               batch_size=WORKER_BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+    queue = WorkQueue(queue_collection, worker_id, lease_seconds)
+    stats = {'listings': 0, 'articles': 0, 'task_errors': 0}
+    writer = db_connector.BulkWriter(collection, batch_size=batch_size,
+                                     on_flush=lambda articles: queue.complete([article.get('url') for article in articles]))
+
+    # amorçage : catégories de la page d'accueil (idempotent, chaque worker peut le faire)
+    restarted = queue.restart_finished_crawl()
+    if restarted:
+        debug_print(f"[{queue.worker_id}] Previous crawl finished: {restarted} tasks requeued for a new crawl.", level="info")
+    category_urls = scraper.scrape_category_urls(base_url) or [base_url]
+    queue.enqueue([{'url': url, 'kind': 'listing', 'payload': {'listing_url': url, 'page': 1}} for url in category_urls])
+
+    debug_print(f"[{queue.worker_id}] Worker started ({queue.summary()}).", level="info")
+    try:
+        while True:
+            task = queue.claim()
+            if task is None:
+                writer.flush() # tâches en attente d'écriture -> closes
+                if not queue.has_work():
+                    break
+                time.sleep(POLL_INTERVAL) # le reste est loué par d'autres workers
+                continue
+
+            try:
+                if task['kind'] == 'listing':
+                    _process_listing(queue, task, max_pages, date_cutoff)
+                    stats['listings'] += 1
+                else:
+                    _process_article(task, writer)
+                    stats['articles'] += 1
+            except (requests.exceptions.RequestException, PyMongoError) as e:
+                debug_print(f"[{queue.worker_id}] Error on {task['_id']}: {e}", level="error")
+                stats['task_errors'] += 1
+                queue.fail(task, e)
+            except Exception as e:
+                debug_print(f"[{queue.worker_id}] Parsing Error on {task['_id']}: {e}", level="error")
+                stats['task_errors'] += 1
+                queue.fail(task, e)
+    finally:
+        stats.update(writer.close())
+    stats['queue'] = queue.summary()
+    return stats
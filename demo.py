@@ -1,64 +1,35 @@
+import os
+import sys
 import requests
-from bs4 import BeautifulSoup
 
-def fetch_articles(url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+# client HTTP partagé + moteur d'extraction (TP_BeautifulSoup4/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'TP_BeautifulSoup4'))
+from http_client import get_fetcher
+from html_parsing import make_soup, LISTING_STRAINER
+from extraction import extract_preview
 
+def fetch_articles(url):
     try:
-        response = requests.get(url, headers=headers)
+        response = get_fetcher().get(url, url_class='listing')
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(response.text, LISTING_STRAINER)
 
         articles_data = []
 
-        # Only find articles within the <main> tag
-        main_tag = soup.find('main')
-        if not main_tag:
-            print("No <main> tag found.")
+        articles = soup.find_all('article')
+        if not articles:
+            print("No <article> tag found.")
             return []
 
-        articles = soup.find_all('article')
         for article in articles:
-            img_div = article.find(
-                'div',
-                class_='post-thumbnail picture rounded-img'
-            )
-            print(img_div)
-            img_tag = img_div.find('img') if img_div else None
-            print(img_tag)
-            img_url = img_tag['data-lazy-src'] if img_tag and img_tag.has_attr('data-lazy-src') else None
-
-            meta_div = article.find(
-                'div',
-                class_='entry-meta ms-md-5 pt-md-0 pt-3'
-            )
-            tag = (meta_div.find('span', class_='favtag color-b')
-                       .get_text(strip=True)
-                   ) if meta_div else None
-            date = (meta_div.find('span', class_='posted-on t-def px-3')
-                        .get_text(strip=True)
-                   ) if meta_div else None
-
-            header = (meta_div.find('header', class_='entry-header pt-1')
-                      ) if meta_div else None
-            a_tag = header.find('a') if header else None
-            article_url = a_tag['href'] if a_tag and a_tag.has_attr('href') else None
-            title = (a_tag.find('h3').get_text(strip=True)
-                     ) if a_tag and a_tag.find('h3') else None
-
-            summary_div = (meta_div.find('div', class_='entry-excerpt t-def t-size-def pt-1')
-                           ) if meta_div else None
-            summary = summary_div.get_text(strip=True) if summary_div else None
-
+            preview = extract_preview(article)
             articles_data.append({
-                'image': img_url,
-                'tag': tag,
-                'date': date,
-                'url': article_url,
-                'title': title,
-                'summary': summary
+                'image': preview['thumbnail'],
+                'tag': preview['category'],
+                'date': preview['date_display'],
+                'url': preview['url'],
+                'title': preview['title'],
+                'summary': preview['summary']
             })
 
         return articles_data